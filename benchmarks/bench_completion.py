@@ -0,0 +1,136 @@
+"""
+Autocompletion cost.  Counts a synthetic corpus of millions of identifier
+tokens (Zipf-distributed over a large vocabulary, as in a big monorepo),
+builds the project's prefix index from it, and reports the build time and
+the time one completion lookup takes for prefixes of every length; then
+keystroke-to-popup latency in an editor with that index behind it.
+"""
+import argparse
+import random
+import statistics
+import time
+
+from benchmarks.common import generate_module, qt_app, report
+
+SYLLABLES = ["get", "set", "load", "save", "item", "value", "data", "node", "tree", "path", "file", "user",
+             "name", "index", "cache", "parse", "read", "write", "count", "list", "map", "key", "view", "model"]
+
+
+def synthetic_counts(tokens, vocabulary, seed=1):
+    """``{identifier: occurrences}`` for ``tokens`` tokens drawn from ``vocabulary`` identifiers."""
+    rng = random.Random(seed)
+    words = set()
+    while len(words) < vocabulary:
+        parts = [rng.choice(SYLLABLES) for _ in range(rng.randint(1, 4))]
+        word = "_".join(parts) if rng.random() < 0.7 else "".join(p.capitalize() for p in parts)
+        words.add(word + (str(rng.randint(0, 99)) if rng.random() < 0.3 else ""))
+    words = sorted(words)
+    rng.shuffle(words)
+    # Zipf: the n-th most common word occurs about tokens / (n * H) times
+    harmonic = sum(1 / n for n in range(1, vocabulary + 1))
+    return {word: max(1, round(tokens / (n * harmonic))) for n, word in enumerate(words, 1)}
+
+
+def lookup_latency(tokens, vocabulary, samples=2000):
+    """Return ``(seconds to build the index, {prefix length: (median, p95, max) seconds})``."""
+    from ide.words import STATIC_INDEX, PrefixIndex, complete_words
+
+    counts = synthetic_counts(tokens, vocabulary)
+    start = time.perf_counter()
+    index = PrefixIndex(counts)
+    build = time.perf_counter() - start
+
+    rng = random.Random(2)
+    words = list(counts)
+    nearby = generate_module(80)
+    results = {}
+    for length in (1, 2, 3, 5):
+        times = []
+        for _ in range(samples):
+            prefix = rng.choice(words)[:length]
+            start = time.perf_counter()
+            complete_words(prefix, [(index, 1.0), (STATIC_INDEX, 1.0)], nearby)
+            times.append(time.perf_counter() - start)
+        times.sort()
+        results[length] = (statistics.median(times), times[int(len(times) * 0.95) - 1], times[-1])
+    return build, results
+
+
+def keystroke_latency(tokens, vocabulary, samples=50):
+    """Return ``(median, p95)`` seconds from a key press to the painted, refilled popup."""
+    from PyQt5.QtCore import Qt, QEvent
+    from PyQt5.QtGui import QKeyEvent, QTextCursor
+    from ide.completion import CompletionService
+    from ide.editor import CodeEditor
+    from ide.words import PrefixIndex
+    from ui.completion_popup import CompletionPopup
+
+    app = qt_app()
+    index = PrefixIndex(synthetic_counts(tokens, vocabulary))
+    service = CompletionService()
+    editor = CodeEditor()
+    editor.resize(1200, 900)
+    editor.show()
+    editor.setPlainText(generate_module(2000))
+    service.watch(editor.shared_document)
+    popup = CompletionPopup(lambda editor, prefix, qualifier, nearby: service.complete(
+        editor.shared_document, prefix, qualifier, nearby, index))
+    popup.attach(editor)
+    cursor = QTextCursor(editor.document().findBlockByNumber(1000))
+    editor.setTextCursor(cursor)
+    editor.insertPlainText("\n    ")
+    app.processEvents()
+
+    def press(key, text):
+        for kind in (QEvent.KeyPress, QEvent.KeyRelease):
+            app.sendEvent(editor, QKeyEvent(kind, key, Qt.NoModifier, text))
+        editor.viewport().repaint()
+        popup.repaint()
+
+    times = []
+    for n in range(samples):
+        press(Qt.Key_G, "g")
+        start = time.perf_counter()
+        press(Qt.Key_E, "e")  # The first character shows no popup yet; the second does
+        times.append(time.perf_counter() - start)
+        assert popup.isVisible()
+        press(Qt.Key_Backspace, "")
+        press(Qt.Key_Backspace, "")
+        app.processEvents()
+    service.stop()
+    editor.viewport_highlighter.idle_timer.stop()
+    editor.close()
+    popup.close()
+    # Delete everything now, the document before the service that watches it;
+    # outside a running event loop deleteLater alone would never get to it
+    for obj in (editor, editor.shared_document, popup, service):
+        obj.deleteLater()
+    app.sendPostedEvents(None, QEvent.DeferredDelete)
+    times.sort()
+    return statistics.median(times), times[int(len(times) * 0.95) - 1]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--tokens", type=int, nargs="+", default=[100000, 5000000])
+    parser.add_argument("--vocabulary", type=int, default=200000, help="distinct identifiers")
+    parser.add_argument("--samples", type=int, default=2000)
+    args = parser.parse_args()
+
+    qt_app()
+    rows = []
+    for tokens in args.tokens:
+        vocabulary = min(args.vocabulary, tokens // 5)
+        build, results = lookup_latency(tokens, vocabulary, args.samples)
+        median, p95 = keystroke_latency(tokens, vocabulary)
+        row = [tokens, vocabulary, f"{build * 1000:.0f}"]
+        for length in sorted(results):
+            row.append(f"{results[length][1] * 1000:.3f}")
+        rows.append(row + [f"{max(r[2] for r in results.values()) * 1000:.3f}", f"{median * 1000:.2f}",
+                           f"{p95 * 1000:.2f}"])
+    report("Completion: index build, lookup p95 by prefix length, keystroke to popup (ms)", rows,
+           ("tokens", "words", "build", "p95 1", "p95 2", "p95 3", "p95 5", "max", "key median", "key p95"))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,107 @@
+"""
+Console throughput in lines per second.  "per-chunk" appends every 4 KB read
+as it arrives, "batched" goes through ShellSession.queue_output, "hidden" is
+the same into a session that is not on screen (shown once afterwards), and
+"process" floods stdout from a real child of the session's shell.
+"""
+import argparse
+import sys
+import time
+
+from benchmarks.common import qt_app, report
+
+READ_SIZE = 4096
+SENTINEL = "__BENCH_DONE__"
+
+
+def flood_bytes(lines):
+    return "".join(f"line {i} " + "x" * 60 + "\n" for i in range(lines)).encode()
+
+
+def make_console():
+    from ui.console import ShellSession
+
+    console = ShellSession()
+    console.resize(1000, 600)
+    console.show()
+    return console
+
+
+def close_console(console):
+    console.process.kill()
+    console.process.waitForFinished(1000)
+    console.close()
+
+
+def feed(console, data, batched):
+    app = qt_app()
+    start = time.perf_counter()
+    for offset in range(0, len(data), READ_SIZE):
+        chunk = data[offset:offset + READ_SIZE]
+        if batched:
+            console.queue_output(chunk)
+        else:
+            console.append_text(chunk.decode("utf-8", errors="replace"))
+        app.processEvents()
+    console.flush_output()
+    app.processEvents()
+    return time.perf_counter() - start
+
+
+def run_in_shell(console, command, sentinel, timeout=120):
+    """Write ``command`` to the console's shell and wait until ``sentinel`` is shown."""
+    app = qt_app()
+    document = console.output_area.document()
+    start = time.perf_counter()
+    console.process.write(command.encode())
+    while time.perf_counter() - start < timeout:
+        app.processEvents()
+        last = document.lastBlock()
+        if sentinel in last.text() or sentinel in last.previous().text():
+            break
+    return time.perf_counter() - start
+
+
+def flood_process(console, lines):
+    # Wait for the login shell to come up so only the flood is timed
+    run_in_shell(console, "echo __BENCH_READY__\n", "__BENCH_READY__")
+    script = (
+        f"import sys; w = sys.stdout.write; [w('line %d ' % i + 'x' * 60 + '\\n') for i in range({lines})]; "
+        f"print('__BENCH' + '_DONE__')"
+    )
+    return run_in_shell(console, f'"{sys.executable}" -c "{script}"\n', SENTINEL)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--lines", type=int, nargs="+", default=[10000, 50000, 200000])
+    args = parser.parse_args()
+
+    qt_app()
+    rows = []
+    for lines in args.lines:
+        data = flood_bytes(lines)
+        row = [lines]
+        for batched in (False, True):
+            console = make_console()
+            row.append(f"{lines / feed(console, data, batched):,.0f}")
+            close_console(console)
+        console = make_console()
+        console.hide()
+        seconds = feed(console, data, True)
+        start = time.perf_counter()
+        console.show()
+        qt_app().processEvents()
+        row.append(f"{lines / seconds:,.0f} + {time.perf_counter() - start:.2f}s on show")
+        close_console(console)
+        console = make_console()
+        row.append(f"{lines / flood_process(console, lines):,.0f}")
+        row.append(console.output_area.blockCount())
+        close_console(console)
+        rows.append(row)
+    report("Console throughput (lines/s)", rows,
+           ("lines", "per-chunk", "batched", "hidden", "process", "blocks kept"))
+
+
+if __name__ == "__main__":
+    main()
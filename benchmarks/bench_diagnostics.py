@@ -0,0 +1,102 @@
+"""
+Cost of the diagnostics service: how long one check of a file takes in the
+worker, and keystroke-to-paint latency in an editor while the service
+watches it and a number of other open documents, compared with no service.
+Reports the median and 95th percentile per file size.
+"""
+import argparse
+import statistics
+import time
+
+from benchmarks.common import best_of, generate_module, qt_app, report
+
+
+def check_time(lines):
+    """Return the seconds one check of a ``lines``-line module takes."""
+    from ide.lint import check_source
+
+    text = generate_module(lines)
+    return best_of(lambda: check_source(text), repeat=3)
+
+
+def typing_latency(lines, tabs, samples=50):
+    """
+    Return ``(median, p95)`` seconds from key press to painted viewport in a
+    ``lines``-line file; with ``tabs`` > 0 the diagnostics service watches it
+    and ``tabs`` other documents, whose first checks run while typing.
+    """
+    from PyQt5.QtCore import Qt, QEvent
+    from PyQt5.QtGui import QKeyEvent, QTextCursor
+    from ide.diagnostics import DiagnosticsService
+    from ide.editor import CodeEditor, SharedDocument
+
+    app = qt_app()
+    service = DiagnosticsService()
+    documents = [SharedDocument() for _ in range(tabs + 1)]
+    editor = CodeEditor(documents[0])
+    editor.resize(1200, 900)
+    editor.show()
+    editor.setPlainText(generate_module(lines))
+    if tabs:
+        service.diagnostics_changed.connect(
+            lambda document: document is editor.shared_document
+            and editor.set_diagnostics(service.diagnostics_for(document)))
+        service.watch(editor.shared_document)
+        for n, document in enumerate(documents[1:]):
+            document.set_plain_text(generate_module(lines) + f"value_{n} = (\n")
+            service.watch(document)
+    cursor = QTextCursor(editor.document().findBlockByNumber(lines // 2))
+    cursor.movePosition(QTextCursor.EndOfBlock)
+    editor.setTextCursor(cursor)
+    editor.centerCursor()
+    app.processEvents()
+
+    def press(key, text):
+        for kind in (QEvent.KeyPress, QEvent.KeyRelease):
+            app.sendEvent(editor, QKeyEvent(kind, key, Qt.NoModifier, text))
+        editor.viewport().repaint()
+        editor.lineNumberArea.repaint()
+
+    times = []
+    for _ in range(samples):
+        start = time.perf_counter()
+        press(Qt.Key_X, "x")
+        times.append(time.perf_counter() - start)
+        press(Qt.Key_Backspace, "")
+        app.processEvents()
+    service.stop()
+    editor.viewport_highlighter.idle_timer.stop()
+    editor.close()
+    # Delete everything now, documents before the service that watches them;
+    # outside a running event loop deleteLater alone would never get to it
+    for obj in [editor] + documents + [service]:
+        obj.deleteLater()
+    app.sendPostedEvents(None, QEvent.DeferredDelete)
+    times.sort()
+    return statistics.median(times), times[int(len(times) * 0.95) - 1]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 20000])
+    parser.add_argument("--tabs", type=int, default=30, help="other documents the service watches")
+    parser.add_argument("--samples", type=int, default=50)
+    args = parser.parse_args()
+
+    qt_app()
+    rows = []
+    for lines in args.sizes:
+        row = [lines, f"{check_time(lines) * 1000:.1f}"]
+        for tabs in (0, args.tabs):
+            median, p95 = typing_latency(lines, tabs, args.samples)
+            row += [f"{median * 1000:.2f}", f"{p95 * 1000:.2f}"]
+        rows.append(row)
+    report(f"Diagnostics: check time and keystroke to paint (ms), {args.tabs} other tabs watched", rows,
+           ("lines", "check", "off median", "off p95", "on median", "on p95"))
+
+    from ide.workers import shutdown_process_pool
+    shutdown_process_pool()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,104 @@
+"""
+A branch switch as the file watcher sees it: every open file and thousands
+of others are rewritten at once.  Reports the time from the first write
+until every open document has the new text, and the longest stretch the
+event loop was blocked meanwhile.
+"""
+import argparse
+import os
+import shutil
+import tempfile
+import time
+
+from benchmarks.common import generate_module, qt_app, report
+
+
+def reload_burst(open_files, other_files, lines=2000, timeout=60):
+    """Return ``(seconds until all open documents are reloaded, longest event-loop gap in seconds)``."""
+    from PyQt5.QtCore import QEvent, QEventLoop, QTimer
+    from ide.editor import SharedDocument
+    from ide.file_watch import FileWatcher
+
+    app = qt_app()
+    root = tempfile.mkdtemp()
+    try:
+        text = generate_module(lines)
+        paths = [os.path.join(root, f"open_{n}.py") for n in range(open_files)]
+        for path in paths:
+            with open(path, "w") as file:
+                file.write(text)
+        watcher = FileWatcher()
+        documents = []
+        for path in paths:
+            document = SharedDocument(path)
+            document.set_plain_text(text)
+            document.text_document.setModified(False)
+            watcher.watch(document)
+            documents.append(document)
+        reloaded = set()
+        watcher.reloaded.connect(reloaded.add)
+        app.processEvents()
+
+        # As git does: write each file next to its target, then rename it over
+        changed = text.replace("value=0x1F", "value=0x2F")
+        start = time.perf_counter()
+        for n in range(other_files):
+            with open(os.path.join(root, f"other_{n}.py"), "w") as file:
+                file.write("pass\n")
+        for path in paths:
+            with open(path + ".tmp", "w") as file:
+                file.write(changed)
+            os.replace(path + ".tmp", path)
+
+        # A running event loop sleeps while idle, as the IDE's does; a 5 ms
+        # timer measures how late the loop gets around to it
+        loop = QEventLoop()
+        ticks = [time.perf_counter()]
+        gaps = []
+
+        def tick():
+            now = time.perf_counter()
+            gaps.append(now - ticks[-1])
+            ticks.append(now)
+            if len(reloaded) == len(documents) or now - start > timeout:
+                loop.quit()
+
+        timer = QTimer()
+        timer.setInterval(5)
+        timer.timeout.connect(tick)
+        timer.start()
+        loop.exec_()
+        timer.stop()
+        elapsed = time.perf_counter() - start
+        assert all(document.text_document.toPlainText() == changed for document in documents)
+
+        watcher.stop()
+        for document in documents:
+            document.deleteLater()
+        watcher.deleteLater()
+        app.sendPostedEvents(None, QEvent.DeferredDelete)
+        return elapsed, max(gaps)
+    finally:
+        shutil.rmtree(root, ignore_errors=True)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--open-files", type=int, nargs="+", default=[10, 50])
+    parser.add_argument("--other-files", type=int, default=10000)
+    args = parser.parse_args()
+
+    qt_app()
+    rows = []
+    for open_files in args.open_files:
+        elapsed, gap = reload_burst(open_files, args.other_files)
+        rows.append([open_files, args.other_files, f"{elapsed * 1000:.0f}", f"{gap * 1000:.1f}"])
+    report("Reload after a burst of file changes (ms)", rows,
+           ("open files", "other files", "all reloaded", "longest stall"))
+
+    from ide.workers import shutdown_process_pool
+    shutdown_process_pool()
+
+
+if __name__ == "__main__":
+    main()
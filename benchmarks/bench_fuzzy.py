@@ -0,0 +1,72 @@
+"""
+Go to File latency.  Ranks queries against a synthetic monorepo listing
+(200k paths by default) and reports the time to the first results, which is
+what the palette shows after a keystroke, and the time to finish.  With
+``--root`` the project at that path is indexed instead, cold and then from
+the persisted cache.
+"""
+import argparse
+import random
+import time
+
+from benchmarks.common import report
+from ide.fuzzy import FuzzyMatcher, STEP_BUDGET
+
+QUERIES = ["main", "edtr", "widget_test", "src/core", "cfgldr", "zzqx", "utils.py", "a"]
+
+
+def synthetic_paths(count, seed=1):
+    rng = random.Random(seed)
+    words = ["core", "utils", "widget", "editor", "config", "loader", "test", "api", "model",
+             "view", "service", "client", "server", "handler", "parser", "main", "data"]
+    paths = []
+    for i in range(count):
+        depth = rng.randint(2, 7)
+        parts = [rng.choice(words) + ("s" if rng.random() < 0.3 else "") for _ in range(depth)]
+        name = "_".join(rng.sample(words, 2)) + f"_{i}" + rng.choice([".py", ".js", ".md", ".json"])
+        paths.append("src/" + "/".join(parts) + "/" + name)
+    return paths
+
+
+def index_project(root):
+    from ide.indexer import ProjectIndex, GitIgnore
+
+    rows = []
+    for label in ("cold", "cached"):
+        start = time.perf_counter()
+        index = ProjectIndex.load(root) if label == "cached" else ProjectIndex(root)
+        index.walk("", GitIgnore(root))
+        if index.dirty:
+            index.save()
+        rows.append((label, index.file_count(), f"{time.perf_counter() - start:.3f}"))
+    report(f"Indexing {root}", rows, ["run", "files", "seconds"])
+    return list(index.files())
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--paths", type=int, default=200000)
+    parser.add_argument("--root", help="index this project instead of synthetic paths")
+    args = parser.parse_args()
+
+    paths = index_project(args.root) if args.root else synthetic_paths(args.paths)
+    start = time.perf_counter()
+    matcher = FuzzyMatcher(paths)
+    print(f"Matcher built for {len(matcher)} paths in {time.perf_counter() - start:.2f}s\n")
+
+    rows = []
+    for query in QUERIES:
+        start = time.perf_counter()
+        search = matcher.search(query)
+        done = search.step(STEP_BUDGET)
+        first = time.perf_counter() - start
+        first_count = len(search.results())
+        while not done:
+            done = search.step(STEP_BUDGET)
+        total = time.perf_counter() - start
+        rows.append((query, first_count, len(search.results()), f"{first * 1000:.1f}", f"{total * 1000:.1f}"))
+    report("Go to File", rows, ["query", "first hits", "hits", "first ms", "total ms"])
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,63 @@
+"""
+Highlight time against file size for PythonSyntaxHighlighter: the full pass
+run when a file is loaded, a keystroke inside a docstring in the middle of the
+file, and the worst case where a keystroke opens a triple-quoted string and
+every following block changes state.
+"""
+import argparse
+
+from benchmarks.common import best_of, generate_module, qt_app, report
+
+
+def measure(lines, repeat):
+    from PyQt5.QtGui import QTextCursor, QTextDocument
+    from PyQt5.QtWidgets import QPlainTextDocumentLayout
+    from ide.editor import PythonSyntaxHighlighter
+
+    text = generate_module(lines)
+    document = QTextDocument()
+    document.setDocumentLayout(QPlainTextDocumentLayout(document))
+    highlighter = PythonSyntaxHighlighter(document)
+
+    full = best_of(lambda: document.setPlainText(text), repeat)
+
+    # Middle of the file, inside the body of a docstring
+    block = document.findBlockByNumber(lines // 2)
+    while "Docstring" not in block.text():
+        block = block.next()
+    cursor = QTextCursor(block)
+    cursor.movePosition(QTextCursor.EndOfBlock)
+
+    def keystroke():
+        cursor.insertText("x")
+        cursor.deletePreviousChar()
+
+    def open_string():
+        cursor.insertText('"""')
+        for _ in range(3):
+            cursor.deletePreviousChar()
+
+    # Each sample performs two edits, so halve the result
+    typed = best_of(keystroke, repeat * 4) / 2
+    cascade = best_of(open_string, repeat) / 2
+    del highlighter
+    return full, typed, cascade
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 5000, 20000, 50000])
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    qt_app()
+    rows = []
+    for lines in args.sizes:
+        full, typed, cascade = measure(lines, args.repeat)
+        rows.append((lines, f"{full * 1000:.1f}", f"{typed * 1000:.3f}", f"{cascade * 1000:.1f}"))
+    report("PythonSyntaxHighlighter", rows,
+           ("lines", "full ms", "keystroke ms", "open-string ms"))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,43 @@
+"""
+Time-to-first-paint of CodeEditor against file size: setPlainText followed by
+a synchronous paint of the editor, with large-file mode on and off.
+"""
+import argparse
+import time
+
+from benchmarks.common import generate_module, qt_app, report
+
+
+def first_paint(text, large_file_lines):
+    from ide.editor import CodeEditor
+
+    editor = CodeEditor(large_file_lines=large_file_lines)
+    editor.resize(1200, 900)
+    editor.show()
+    start = time.perf_counter()
+    editor.setPlainText(text)
+    editor.grab()
+    elapsed = time.perf_counter() - start
+    editor.viewport_highlighter.idle_timer.stop()
+    editor.close()
+    editor.deleteLater()
+    return elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10000, 50000, 100000, 200000])
+    args = parser.parse_args()
+
+    qt_app()
+    rows = []
+    for lines in args.sizes:
+        text = generate_module(lines)
+        eager = first_paint(text, large_file_lines=10 ** 9)
+        lazy = first_paint(text, large_file_lines=0)
+        rows.append((lines, f"{eager * 1000:.0f}", f"{lazy * 1000:.0f}"))
+    report("CodeEditor time to first paint", rows, ("lines", "eager ms", "large-file ms"))
+
+
+if __name__ == "__main__":
+    main()
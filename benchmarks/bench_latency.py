@@ -0,0 +1,70 @@
+"""
+Keystroke-to-paint latency of CodeEditor: a key press is sent to an editor
+showing the middle of a file, and the editor and its gutter are repainted
+synchronously.  Reports the median and 95th percentile per file size, with
+large-file mode on and off.
+"""
+import argparse
+import statistics
+import time
+
+from benchmarks.common import generate_module, qt_app, report
+
+
+def keystroke_latency(lines, large_file_lines, samples=50):
+    """Return ``(median, p95)`` seconds from key press to painted viewport."""
+    from PyQt5.QtCore import Qt, QEvent
+    from PyQt5.QtGui import QKeyEvent, QTextCursor
+    from ide.editor import CodeEditor
+
+    app = qt_app()
+    editor = CodeEditor(large_file_lines=large_file_lines)
+    editor.resize(1200, 900)
+    editor.show()
+    editor.setPlainText(generate_module(lines))
+    cursor = QTextCursor(editor.document().findBlockByNumber(lines // 2))
+    cursor.movePosition(QTextCursor.EndOfBlock)
+    editor.setTextCursor(cursor)
+    editor.centerCursor()
+    app.processEvents()
+
+    def press(key, text):
+        for kind in (QEvent.KeyPress, QEvent.KeyRelease):
+            app.sendEvent(editor, QKeyEvent(kind, key, Qt.NoModifier, text))
+        editor.viewport().repaint()
+        editor.lineNumberArea.repaint()
+
+    times = []
+    for _ in range(samples):
+        start = time.perf_counter()
+        press(Qt.Key_X, "x")
+        times.append(time.perf_counter() - start)
+        press(Qt.Key_Backspace, "")
+        app.processEvents()
+    editor.viewport_highlighter.idle_timer.stop()
+    editor.close()
+    editor.deleteLater()
+    times.sort()
+    return statistics.median(times), times[int(len(times) * 0.95) - 1]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 20000, 100000])
+    parser.add_argument("--samples", type=int, default=50)
+    args = parser.parse_args()
+
+    qt_app()
+    rows = []
+    for lines in args.sizes:
+        row = [lines]
+        for large_file_lines in (10 ** 9, 0):
+            median, p95 = keystroke_latency(lines, large_file_lines, args.samples)
+            row += [f"{median * 1000:.2f}", f"{p95 * 1000:.2f}"]
+        rows.append(row)
+    report("Keystroke to paint (ms)", rows,
+           ("lines", "eager median", "eager p95", "large-file median", "large-file p95"))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,43 @@
+"""
+New Project cost: building the virtualenv with ``python -m venv`` against
+cloning the cached template, the first time (template built) and after.
+Pass ``--requirements`` and ``--wheelhouse`` to include a pinned install.
+"""
+import argparse
+import os
+import shutil
+import tempfile
+import time
+
+from benchmarks.common import report
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--requirements")
+    parser.add_argument("--wheelhouse")
+    parser.add_argument("--clones", type=int, default=3)
+    args = parser.parse_args()
+
+    os.environ["XDG_CACHE_HOME"] = tempfile.mkdtemp(prefix="bench_cache_")
+    from ide.project import create_new_project
+
+    root = tempfile.mkdtemp(prefix="bench_new_project_")
+    try:
+        def create(name, use_template):
+            start = time.perf_counter()
+            create_new_project(os.path.join(root, name), args.requirements, args.wheelhouse, use_template)
+            return time.perf_counter() - start
+
+        rows = [("python -m venv", f"{create('plain', False):.2f}")]
+        rows.append(("template, first project", f"{create('first', True):.2f}"))
+        clone = min(create(f"clone{i}", True) for i in range(args.clones))
+        rows.append(("template, later projects", f"{clone:.2f}"))
+        report("New Project", rows, ["environment", "seconds"])
+    finally:
+        shutil.rmtree(root)
+        shutil.rmtree(os.environ["XDG_CACHE_HOME"])
+
+
+if __name__ == "__main__":
+    main()
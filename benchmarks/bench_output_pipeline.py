@@ -0,0 +1,77 @@
+"""
+OutputPipeline throughput on colored tool output.  Pass ``--input`` with a
+recording (e.g. ``pytest --color=yes > run.txt`` or ``pip install ... > log``)
+to replay real output; by default a pytest/pip-like transcript is generated.
+"""
+import argparse
+import time
+
+from benchmarks.common import qt_app, report
+
+READ_SIZE = 4096
+
+
+def synthetic_transcript(lines):
+    out = []
+    for i in range(lines):
+        kind = i % 4
+        if kind == 0:
+            out.append(f"tests/test_module_{i}.py::test_case_{i} \x1b[32mPASSED\x1b[0m"
+                       f"\x1b[32m{' ' * 20}[ {i % 100:3d}%]\x1b[0m\n")
+        elif kind == 1:
+            out.append(f"\x1b[1m\x1b[31mE       AssertionError: assert {i} == {i + 1}\x1b[0m\n")
+        elif kind == 2:
+            out.append(f"  Downloading package_{i}-1.0-py3-none-any.whl (\x1b[32m{i % 900} kB\x1b[0m)"
+                       " ✔ été\n")
+        else:
+            out.append(f"\x1b[38;5;244m{i:08d}\x1b[0m \x1b[38;2;200;120;50mwarning\x1b[39m: plain text line\n")
+    return "".join(out).encode()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--input", help="recorded output to replay")
+    parser.add_argument("--lines", type=int, default=100000)
+    args = parser.parse_args()
+
+    if args.input:
+        with open(args.input, "rb") as file:
+            data = file.read()
+    else:
+        data = synthetic_transcript(args.lines)
+    lines = data.count(b"\n")
+
+    qt_app()
+    from ui.console import ShellSession
+    from ui.output_pipeline import OutputPipeline
+
+    pipeline = OutputPipeline()
+    start = time.perf_counter()
+    runs = 0
+    for offset in range(0, len(data), READ_SIZE):
+        runs += len(pipeline.feed(data[offset:offset + READ_SIZE]))
+    parse = time.perf_counter() - start
+
+    app = qt_app()
+    console = ShellSession()
+    console.resize(1000, 600)
+    console.show()
+    start = time.perf_counter()
+    for offset in range(0, len(data), READ_SIZE):
+        console.queue_output(data[offset:offset + READ_SIZE])
+        app.processEvents()
+    console.flush_output()
+    app.processEvents()
+    render = time.perf_counter() - start
+    console.process.kill()
+    console.process.waitForFinished(1000)
+
+    mb = len(data) / 1e6
+    report(f"OutputPipeline on {mb:.1f} MB, {lines} lines, {runs} runs", [
+        ("pipeline only", f"{mb / parse:.1f}", f"{lines / parse:,.0f}"),
+        ("console", f"{mb / render:.1f}", f"{lines / render:,.0f}"),
+    ], ("stage", "MB/s", "lines/s"))
+
+
+if __name__ == "__main__":
+    main()
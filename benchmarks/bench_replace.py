@@ -0,0 +1,76 @@
+"""
+Replace All in CodeEditor: every occurrence of a name is replaced in one
+batch (scan with find_matches, then SharedDocument.apply_edits), timed until
+the editor has repainted.  For small counts, the naive way, a QTextDocument
+find plus insertText per occurrence, is timed for comparison.
+"""
+import argparse
+import time
+
+from benchmarks.common import qt_app, report
+
+NAIVE_MAX = 5000  # Occurrences above this take too long the naive way
+
+
+def make_editor(occurrences):
+    from ide.editor import CodeEditor
+
+    editor = CodeEditor()
+    editor.resize(1200, 900)
+    editor.show()
+    editor.setPlainText("value = target(other)  # note\n" * occurrences)
+    qt_app().processEvents()
+    return editor
+
+
+def close_editor(editor):
+    editor.viewport_highlighter.idle_timer.stop()
+    editor.close()
+    editor.deleteLater()
+
+
+def batched_replace(occurrences):
+    """Seconds to replace ``occurrences`` matches in one batch and repaint."""
+    from ide.find_replace import compile_pattern, find_matches
+
+    editor = make_editor(occurrences)
+    start = time.perf_counter()
+    matches = find_matches(editor.toPlainText(), compile_pattern("target"), "renamed")
+    editor.shared_document.apply_edits(matches)
+    editor.grab()
+    elapsed = time.perf_counter() - start
+    assert editor.document().blockCount() == occurrences + 1 and len(matches) == occurrences
+    close_editor(editor)
+    return elapsed
+
+
+def naive_replace(occurrences):
+    """Seconds to replace the matches one QTextDocument.find at a time."""
+    editor = make_editor(occurrences)
+    document = editor.document()
+    start = time.perf_counter()
+    cursor = document.find("target")
+    while not cursor.isNull():
+        cursor.insertText("renamed")
+        cursor = document.find("target", cursor)
+    editor.grab()
+    elapsed = time.perf_counter() - start
+    close_editor(editor)
+    return elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 5000, 20000, 100000])
+    args = parser.parse_args()
+
+    qt_app()
+    rows = []
+    for occurrences in args.sizes:
+        naive = f"{naive_replace(occurrences) * 1000:.0f}" if occurrences <= NAIVE_MAX else "-"
+        rows.append((occurrences, f"{batched_replace(occurrences) * 1000:.0f}", naive))
+    report("Replace All", rows, ("occurrences", "batched ms", "one by one ms"))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,78 @@
+"""
+"Run Current File" latency: the time from submitting a script that imports
+``--modules`` until its exit is reported, with a fresh interpreter per run
+("cold") and with an already warmed-up interpreter from the WarmPool
+("warm").  Also runs ``--runs`` scripts at once to show the concurrency limit.
+"""
+import argparse
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+from benchmarks.common import qt_app, report
+
+
+def wait_for(app, condition, timeout=120):
+    start = time.perf_counter()
+    while not condition() and time.perf_counter() - start < timeout:
+        app.processEvents()
+        time.sleep(0.001)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--modules", nargs="+", default=["asyncio", "email.mime.multipart", "http.server", "decimal"])
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--runs", type=int, default=8, help="scripts submitted at once")
+    args = parser.parse_args()
+
+    app = qt_app()
+    from ide.runner import RunManager, WarmPool
+
+    root = tempfile.mkdtemp(prefix="bench_runner_")
+    script = os.path.join(root, "script.py")
+    with open(script, "w") as file:
+        file.write("".join(f"import {name}\n" for name in args.modules))
+    runner = RunManager(warm_pool=WarmPool(modules=args.modules))
+    finished = []
+    runner.run_finished.connect(finished.append)
+
+    def timed_run():
+        finished.clear()
+        start = time.perf_counter()
+        runner.submit(script, sys.executable, root)
+        wait_for(app, lambda: finished)
+        return time.perf_counter() - start
+
+    try:
+        rows = []
+        cold = min(timed_run() for _ in range(args.repeat))
+        rows.append(("cold interpreter", f"{cold * 1000:.0f}"))
+
+        runner.set_warm(True, sys.executable, root)
+        warm = float("inf")
+        for _ in range(args.repeat):
+            time.sleep(1.0)  # Let the replacement interpreter finish its imports
+            app.processEvents()
+            warm = min(warm, timed_run())
+        rows.append(("warm interpreter", f"{warm * 1000:.0f}"))
+        runner.set_warm(False)
+
+        for limit in (1, 4):
+            runner.set_max_concurrent(limit)
+            finished.clear()
+            start = time.perf_counter()
+            for _ in range(args.runs):
+                runner.submit(script, sys.executable, root)
+            wait_for(app, lambda: len(finished) == args.runs)
+            rows.append((f"{args.runs} runs, {limit} at a time", f"{(time.perf_counter() - start) * 1000:.0f}"))
+        report(f"Run latency, importing {' '.join(args.modules)}", rows, ["run", "ms"])
+    finally:
+        runner.shutdown()
+        shutil.rmtree(root)
+
+
+if __name__ == "__main__":
+    main()
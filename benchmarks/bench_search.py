@@ -0,0 +1,102 @@
+"""
+Find in Project against a naive sequential scan.  The naive scan reads and
+decodes every file and tests it line by line, as a simple loop would; the
+engine searches bytes, skips binaries and fans out over a process pool.
+A synthetic tree is generated unless ``--root`` points at a checkout.
+"""
+import argparse
+import multiprocessing
+import os
+import random
+import re
+import shutil
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from benchmarks.common import generate_module, report
+from ide.indexer import ProjectIndex, GitIgnore
+from ide.search import compile_query, search_batch
+
+BATCH_FILES = 64
+
+
+def make_tree(root, files, seed=1):
+    rng = random.Random(seed)
+    module = generate_module(400).encode()
+    for i in range(files):
+        directory = os.path.join(root, f"pkg{i % 50}", f"sub{i % 7}")
+        os.makedirs(directory, exist_ok=True)
+        if i % 25 == 0:
+            with open(os.path.join(directory, f"blob{i}.bin"), "wb") as file:
+                file.write(rng.randbytes(len(module)))
+            continue
+        body = module if i % 10 else module + b"    needle_token = compute()\n"
+        with open(os.path.join(directory, f"module{i}.py"), "wb") as file:
+            file.write(body)
+
+
+def naive_search(root, rel_paths, query):
+    pattern = re.compile(query)
+    hits = 0
+    for rel_path in rel_paths:
+        try:
+            with open(os.path.join(root, rel_path), encoding="utf-8", errors="replace") as file:
+                for line in file:
+                    if pattern.search(line):
+                        hits += 1
+        except OSError:
+            pass
+    return hits
+
+
+def engine_search(root, rel_paths, pattern, executor=None):
+    batches = [rel_paths[i:i + BATCH_FILES] for i in range(0, len(rel_paths), BATCH_FILES)]
+    if executor is None:
+        results = [search_batch(root, batch, pattern) for batch in batches]
+    else:
+        results = executor.map(search_batch, [root] * len(batches), batches, [pattern] * len(batches))
+    return sum(len(m) for _, found in results for _, m in found)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--root", help="search this checkout instead of a generated tree")
+    parser.add_argument("--files", type=int, default=4000)
+    parser.add_argument("--query", default="needle_token")
+    args = parser.parse_args()
+
+    temp_root = None
+    root = args.root
+    if root is None:
+        root = temp_root = tempfile.mkdtemp(prefix="bench_search_")
+        make_tree(root, args.files)
+    try:
+        index = ProjectIndex(root)
+        index.walk("", GitIgnore(root))
+        rel_paths = list(index.files())
+        size = sum(os.path.getsize(os.path.join(root, p)) for p in rel_paths)
+        pattern = compile_query(args.query, regex=True, case_sensitive=True)
+
+        rows = []
+
+        def timed(label, func):
+            start = time.perf_counter()
+            hits = func()
+            seconds = time.perf_counter() - start
+            rows.append((label, hits, f"{seconds:.3f}", f"{size / seconds / 1e6:.0f}"))
+
+        timed("naive sequential", lambda: naive_search(root, rel_paths, args.query))
+        timed("engine, 1 process", lambda: engine_search(root, rel_paths, pattern))
+        with ProcessPoolExecutor(mp_context=multiprocessing.get_context("spawn")) as executor:
+            executor.submit(int).result()  # Start the pool outside the timing
+            timed(f"engine, pool of {os.cpu_count()}",
+                  lambda: engine_search(root, rel_paths, pattern, executor))
+        report(f"{len(rel_paths)} files, {size / 1e6:.0f} MB", rows, ["search", "lines", "seconds", "MB/s"])
+    finally:
+        if temp_root:
+            shutil.rmtree(temp_root)
+
+
+if __name__ == "__main__":
+    main()
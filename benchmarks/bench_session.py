@@ -0,0 +1,78 @@
+"""
+Startup with a saved session of N projects: how long until MainWindow has
+run its startup stages (the session is restored), and how long until every
+project is prepared (the ProjectLoaderThreads are done).  Each generated project has ``--files``
+modules, ``--open`` of which are open in the session.
+"""
+import argparse
+import os
+import shutil
+import tempfile
+import time
+
+from benchmarks.common import generate_module, qt_app, report
+
+
+def make_projects(root, projects, files, open_files):
+    source = generate_module(200)
+    saved = {"version": 1, "active_project": 0, "projects": []}
+    for p in range(projects):
+        path = os.path.join(root, f"project{p}")
+        os.makedirs(os.path.join(path, "pkg"))
+        for f in range(files):
+            with open(os.path.join(path, "pkg", f"module_{f}.py"), "w") as file:
+                file.write(source)
+        entries = [{"path": os.path.join(path, "pkg", f"module_{f}.py"), "cursor": 0, "scroll": 0}
+                   for f in range(min(open_files, files))]
+        saved["projects"].append({"path": path, "active_file": entries[0]["path"] if entries else None,
+                                  "files": entries})
+    return saved
+
+
+def session_startup(projects, files=200, open_files=5, timeout=120):
+    """Return ``(blocking, ready)`` seconds for restoring ``projects`` projects."""
+    root = tempfile.mkdtemp(prefix="bench_session_")
+    os.environ["XDG_CACHE_HOME"] = os.path.join(root, "cache")
+    os.environ["XDG_DATA_HOME"] = os.path.join(root, "data")
+    app = qt_app()
+    from ide import session
+    from ui.main_window import MainWindow
+
+    try:
+        session.save_session(make_projects(root, projects, files, open_files))
+        start = time.perf_counter()
+        window = MainWindow()
+        started = []
+        window.startup_finished.connect(lambda: started.append(True))
+        window.show()
+        while not started:  # The session is restored by the deferred startup stages
+            app.processEvents()
+        blocking = time.perf_counter() - start
+        while (window.project_loaders or window.queued_projects) and time.perf_counter() - start < timeout:
+            app.processEvents()
+            time.sleep(0.001)
+        ready = time.perf_counter() - start
+        window.close()
+        window.deleteLater()
+        app.processEvents()
+        return blocking, ready
+    finally:
+        shutil.rmtree(root)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--projects", type=int, nargs="+", default=[1, 5, 20])
+    parser.add_argument("--files", type=int, default=200, help="modules per project")
+    parser.add_argument("--open", type=int, default=5, help="open files per project")
+    args = parser.parse_args()
+
+    rows = []
+    for projects in args.projects:
+        blocking, ready = session_startup(projects, args.files, args.open)
+        rows.append((projects, f"{blocking * 1000:.0f}", f"{ready * 1000:.0f}"))
+    report("Session startup", rows, ("projects", "GUI blocked ms", "all prepared ms"))
+
+
+if __name__ == "__main__":
+    main()
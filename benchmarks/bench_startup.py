@@ -0,0 +1,65 @@
+"""
+Cold start of the IDE: runs ``main.py --startup-profile`` in a fresh
+interpreter with an empty session and reports when each startup stage
+finished, counted from the start of main.py.  The first frame should stay
+under main.FIRST_FRAME_BUDGET_MS.
+"""
+import argparse
+import os
+import re
+import shutil
+import signal
+import statistics
+import subprocess
+import sys
+import tempfile
+
+from benchmarks.common import report
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+PROFILE_LINE = re.compile(r"startup: (.+?)\s+([\d.]+) ms")
+LAST_STAGE = "console"
+
+
+def startup_profile(timeout=60):
+    """Return ``{stage: ms}`` for one cold start."""
+    root = tempfile.mkdtemp(prefix="bench_startup_")
+    env = dict(os.environ, QT_QPA_PLATFORM="offscreen",
+               XDG_CACHE_HOME=os.path.join(root, "cache"), XDG_DATA_HOME=os.path.join(root, "data"))
+    # A session of its own, so the console's shell goes with the IDE
+    process = subprocess.Popen([sys.executable, "main.py", "--startup-profile"], cwd=ROOT, env=env,
+                               stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, text=True,
+                               start_new_session=True)
+    stages = {}
+    try:
+        for line in process.stderr:
+            match = PROFILE_LINE.match(line)
+            if match:
+                stages[match.group(1)] = float(match.group(2))
+                if match.group(1) == LAST_STAGE:
+                    break
+    finally:
+        os.killpg(process.pid, signal.SIGKILL)
+        process.wait(timeout)
+        shutil.rmtree(root)
+    return stages
+
+
+def startup_stages(repeat=5):
+    """Return ``{stage: median ms}`` over ``repeat`` cold starts."""
+    runs = [startup_profile() for _ in range(repeat)]
+    return {stage: statistics.median(run[stage] for run in runs) for stage in runs[0]}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    stages = startup_stages(args.repeat)
+    report(f"Cold start, median of {args.repeat}", [(stage, f"{ms:.1f}") for stage, ms in stages.items()],
+           ("stage", "ms"))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,76 @@
+"""
+Symbol index cost on a generated project (5,000 modules by default): a
+cold build, a rebuild from the on-disk table, a rebuild after touching one
+file, and a Go to Symbol query.  Also times parsing one large buffer for
+the outline.
+"""
+import argparse
+import os
+import shutil
+import tempfile
+import time
+
+from benchmarks.common import generate_module, qt_app, report
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--modules", type=int, default=5000)
+    parser.add_argument("--lines", type=int, default=200, help="lines per module")
+    args = parser.parse_args()
+
+    qt_app()
+    os.environ.setdefault("XDG_CACHE_HOME", tempfile.mkdtemp(prefix="bench_cache_"))
+    from ide.indexer import ProjectIndex, GitIgnore
+    from ide.symbol_index import ProjectSymbolsThread, PYTHON_SUFFIXES
+    from ide.symbols import extract_symbols
+    from ide.workers import shutdown_process_pool
+
+    root = tempfile.mkdtemp(prefix="bench_symbols_")
+    try:
+        source = generate_module(args.lines)
+        for i in range(args.modules):
+            directory = os.path.join(root, f"pkg{i % 50}")
+            os.makedirs(directory, exist_ok=True)
+            with open(os.path.join(directory, f"module_{i}.py"), "w") as file:
+                file.write(source.replace("function_", f"m{i}_function_"))
+
+        def build(table=None):
+            index = ProjectIndex(root)
+            index.walk("", GitIgnore(root))
+            files = [(p, index.dirs[p.rpartition("/")[0]][1][p.rpartition("/")[2]])
+                     for p in index.files() if p.endswith(PYTHON_SUFFIXES)]
+            thread = ProjectSymbolsThread(root, files, table)
+            result = []
+            thread.symbols_ready.connect(lambda *args: result.append(args))
+            start = time.perf_counter()
+            thread.run()
+            return time.perf_counter() - start, result[0]
+
+        rows = []
+        seconds, (table, matcher, locations) = build()
+        rows.append(("cold", len(locations), f"{seconds:.2f}"))
+        seconds, _ = build()
+        rows.append(("from cache file", len(locations), f"{seconds:.2f}"))
+        time.sleep(0.01)
+        with open(os.path.join(root, "pkg0", "module_0.py"), "a") as file:
+            file.write("\ndef added_function():\n    pass\n")
+        seconds, (table, matcher, locations) = build(table)
+        rows.append(("one file changed", len(locations), f"{seconds:.2f}"))
+
+        start = time.perf_counter()
+        matcher.match("m42func7")
+        rows.append(("Go to Symbol query", "", f"{time.perf_counter() - start:.3f}"))
+
+        big = generate_module(20000)
+        start = time.perf_counter()
+        symbols = extract_symbols(big)
+        rows.append(("outline, 20k-line buffer", len(symbols), f"{time.perf_counter() - start:.3f}"))
+        report(f"{args.modules} modules", rows, ["run", "symbols", "seconds"])
+    finally:
+        shutdown_process_pool()
+        shutil.rmtree(root)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,60 @@
+"""
+Shared helpers for the headless benchmarks.  Run a benchmark from the
+repository root, e.g. ``python -m benchmarks.bench_highlighter``, or the
+whole suite with JSON results and comparison: ``python -m benchmarks.suite``.
+"""
+import os
+import sys
+import time
+
+_app = None
+
+
+def qt_app():
+    """Return the QApplication, creating it on the offscreen platform."""
+    global _app
+    os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+    from PyQt5.QtWidgets import QApplication
+    _app = QApplication.instance() or QApplication(sys.argv[:1])
+    return _app
+
+
+def best_of(func, repeat=5):
+    """Run ``func`` ``repeat`` times and return the fastest wall time in seconds."""
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def generate_module(lines):
+    """Build a synthetic Python module of roughly ``lines`` lines."""
+    chunk = [
+        "@decorator(option=True)",
+        "def function_{n}(self, value=0x1F, scale=1.5e3):",
+        '    """',
+        "    Docstring for function {n} that spans",
+        "    several lines so the highlighter has to carry state.",
+        '    """',
+        "    result = [len(str(item)) for item in range(value)]  # comment",
+        "    message = f\"value {{value}} scaled {{value * scale}}\"",
+        "    return sorted(result), message",
+        "",
+    ]
+    out = []
+    n = 0
+    while len(out) < lines:
+        out.extend(line.format(n=n) for line in chunk)
+        n += 1
+    return "\n".join(out[:lines]) + "\n"
+
+
+def report(title, rows, headers):
+    """Print ``rows`` as a fixed-width table."""
+    print(title)
+    widths = [max(len(str(h)), *(len(str(r[i])) for r in rows)) for i, h in enumerate(headers)]
+    print("  ".join(str(h).rjust(w) for h, w in zip(headers, widths)))
+    for row in rows:
+        print("  ".join(str(c).rjust(w) for c, w in zip(row, widths)))
@@ -0,0 +1,232 @@
+"""
+Runs the headless benchmarks as one suite and stores the results as JSON.
+
+    python -m benchmarks.suite --output results.json
+    python -m benchmarks.suite --compare baseline.json            # run, then compare
+    python -m benchmarks.suite --compare baseline.json new.json   # compare two files
+
+A comparison flags every metric that got worse than the baseline by more
+than ``--threshold`` (a fraction, 0.15 = 15%) and exits with status 1 if
+there is any.
+"""
+import argparse
+import datetime
+import json
+import os
+import platform
+import sys
+
+from benchmarks.common import generate_module, qt_app, report
+
+RESULTS_VERSION = 1
+DEFAULT_THRESHOLD = 0.15
+LOWER, HIGHER = "lower", "higher"  # Which direction is better for a metric
+
+
+def editor_open(quick):
+    from benchmarks.bench_large_file import first_paint
+
+    for lines in (5000,) if quick else (10000, 50000, 200000):
+        text = generate_module(lines)
+        yield f"editor.open.eager.{lines}", first_paint(text, large_file_lines=10 ** 9) * 1000, "ms", LOWER
+        yield f"editor.open.large_file.{lines}", first_paint(text, large_file_lines=0) * 1000, "ms", LOWER
+
+
+def highlighter(quick):
+    from benchmarks.bench_highlighter import measure
+
+    for lines in (2000,) if quick else (1000, 20000, 50000):
+        full, typed, cascade = measure(lines, 2 if quick else 3)
+        yield f"highlighter.full.{lines}", full * 1000, "ms", LOWER
+        yield f"highlighter.keystroke.{lines}", typed * 1000, "ms", LOWER
+        yield f"highlighter.open_string.{lines}", cascade * 1000, "ms", LOWER
+
+
+def keystroke_to_paint(quick):
+    from benchmarks.bench_latency import keystroke_latency
+
+    for lines in (2000,) if quick else (1000, 100000):
+        median, p95 = keystroke_latency(lines, large_file_lines=20000, samples=20 if quick else 50)
+        yield f"latency.keystroke.median.{lines}", median * 1000, "ms", LOWER
+        yield f"latency.keystroke.p95.{lines}", p95 * 1000, "ms", LOWER
+
+
+def diagnostics(quick):
+    from benchmarks.bench_diagnostics import check_time, typing_latency
+
+    lines = 2000 if quick else 20000
+    yield f"diagnostics.check.{lines}", check_time(lines) * 1000, "ms", LOWER
+    median, p95 = typing_latency(lines, tabs=10 if quick else 30, samples=20 if quick else 50)
+    yield f"diagnostics.keystroke.median.{lines}", median * 1000, "ms", LOWER
+    yield f"diagnostics.keystroke.p95.{lines}", p95 * 1000, "ms", LOWER
+
+
+def file_watch(quick):
+    from benchmarks.bench_file_watch import reload_burst
+
+    open_files = 10 if quick else 50
+    elapsed, stall = reload_burst(open_files, other_files=2000 if quick else 10000)
+    yield f"file_watch.reload.{open_files}", elapsed * 1000, "ms", LOWER
+    yield f"file_watch.longest_stall.{open_files}", stall * 1000, "ms", LOWER
+
+
+def completion(quick):
+    from benchmarks.bench_completion import keystroke_latency, lookup_latency
+
+    tokens = 500000 if quick else 5000000
+    vocabulary = 50000 if quick else 200000
+    build, results = lookup_latency(tokens, vocabulary, samples=500 if quick else 2000)
+    yield f"completion.build.{tokens}", build * 1000, "ms", LOWER
+    for length, (_, p95, _) in results.items():
+        yield f"completion.lookup.p95.{length}.{tokens}", p95 * 1000, "ms", LOWER
+    median, p95 = keystroke_latency(tokens, vocabulary, samples=20 if quick else 50)
+    yield f"completion.keystroke.median.{tokens}", median * 1000, "ms", LOWER
+    yield f"completion.keystroke.p95.{tokens}", p95 * 1000, "ms", LOWER
+
+
+def console(quick):
+    from benchmarks.bench_console import close_console, feed, flood_bytes, make_console
+
+    lines = 20000 if quick else 100000
+    data = flood_bytes(lines)
+    for batched, name in ((True, "batched"), (False, "per_chunk")):
+        session = make_console()
+        yield f"console.{name}.{lines}", lines / feed(session, data, batched), "lines/s", HIGHER
+        close_console(session)
+
+
+def replace_all(quick):
+    from benchmarks.bench_replace import batched_replace
+
+    for occurrences in (5000,) if quick else (20000, 100000):
+        yield f"replace.batched.{occurrences}", batched_replace(occurrences) * 1000, "ms", LOWER
+
+
+def session_startup(quick):
+    from benchmarks.bench_session import session_startup
+
+    for projects in (3,) if quick else (1, 10):
+        blocking, ready = session_startup(projects, files=50 if quick else 200)
+        yield f"session.gui_blocked.{projects}", blocking * 1000, "ms", LOWER
+        yield f"session.ready.{projects}", ready * 1000, "ms", LOWER
+
+
+def cold_start(quick):
+    from benchmarks.bench_startup import startup_stages
+
+    stages = startup_stages(repeat=3 if quick else 7)
+    for stage in ("first frame", "console"):
+        yield f"startup.{stage.replace(' ', '_')}", stages[stage], "ms", LOWER
+
+
+GROUPS = {
+    "startup": cold_start,
+    "editor": editor_open,
+    "highlighter": highlighter,
+    "latency": keystroke_to_paint,
+    "replace": replace_all,
+    "diagnostics": diagnostics,
+    "file_watch": file_watch,
+    "completion": completion,
+    "console": console,
+    "session": session_startup,
+}
+
+
+def run_suite(groups, quick=False, repeat=1):
+    """
+    Run the benchmark ``groups`` and return the results document.  With
+    ``repeat``, each group runs that many times and the best value counts.
+    """
+    qt_app()
+    from PyQt5.QtCore import QT_VERSION_STR
+
+    metrics = {}
+    for group in groups:
+        for attempt in range(repeat):
+            print(f"running {group} ({attempt + 1}/{repeat})...", file=sys.stderr)
+            for name, value, unit, better in GROUPS[group](quick):
+                old = metrics.get(name)
+                if old is None or (value < old["value"] if better == LOWER else value > old["value"]):
+                    metrics[name] = {"value": round(value, 4), "unit": unit, "better": better}
+    return {
+        "version": RESULTS_VERSION,
+        "created": datetime.datetime.now().isoformat(timespec="seconds"),
+        "quick": quick,
+        "repeat": repeat,
+        "python": platform.python_version(),
+        "qt": QT_VERSION_STR,
+        "platform": platform.platform(),
+        "cpus": os.cpu_count(),
+        "metrics": metrics,
+    }
+
+
+def compare(baseline, current, threshold=DEFAULT_THRESHOLD):
+    """
+    Return ``(rows, regressions)`` for the metrics present in both results.
+    ``change`` is positive when a metric got worse.
+    """
+    rows = []
+    regressions = []
+    for name, new in current["metrics"].items():
+        old = baseline["metrics"].get(name)
+        if old is None or not old["value"]:
+            continue
+        change = (new["value"] - old["value"]) / old["value"]
+        if new["better"] == HIGHER:
+            change = -change
+        flag = ""
+        if change > threshold:
+            flag = "REGRESSION"
+            regressions.append(name)
+        elif change < -threshold:
+            flag = "improved"
+        rows.append((name, f"{old['value']:.3f}", f"{new['value']:.3f}", new["unit"], f"{change:+.1%}", flag))
+    return rows, regressions
+
+
+def load_results(path):
+    with open(path, encoding="utf-8") as file:
+        results = json.load(file)
+    if results.get("version") != RESULTS_VERSION:
+        raise SystemExit(f"{path}: unsupported results version {results.get('version')}")
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--output", "-o", help="write the results to this JSON file")
+    parser.add_argument("--compare", nargs="+", metavar="RESULTS",
+                        help="baseline results, and optionally results to compare instead of running")
+    parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD)
+    parser.add_argument("--only", nargs="+", choices=sorted(GROUPS), help="run only these groups")
+    parser.add_argument("--quick", action="store_true", help="smaller sizes, for a fast smoke run")
+    parser.add_argument("--repeat", type=int, default=1, help="run each group this many times and keep the best")
+    args = parser.parse_args()
+
+    if args.compare and len(args.compare) > 2:
+        parser.error("--compare takes a baseline and at most one results file")
+    if args.compare and len(args.compare) == 2:
+        current = load_results(args.compare[1])
+    else:
+        current = run_suite(args.only or list(GROUPS), args.quick, max(1, args.repeat))
+        if args.output:
+            with open(args.output, "w", encoding="utf-8") as file:
+                json.dump(current, file, indent=2)
+        report("Results", [(name, f"{m['value']:.3f}", m["unit"]) for name, m in current["metrics"].items()],
+               ("metric", "value", "unit"))
+
+    if args.compare:
+        baseline = load_results(args.compare[0])
+        rows, regressions = compare(baseline, current, args.threshold)
+        print()
+        report(f"Compared with {args.compare[0]} (threshold {args.threshold:.0%})", rows,
+               ("metric", "baseline", "current", "unit", "change", ""))
+        if regressions:
+            print(f"\n{len(regressions)} regression(s): {', '.join(regressions)}")
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,207 @@
+from collections import Counter
+
+from PyQt5.QtCore import QObject, QThread, pyqtSignal
+from ide.symbol_index import REFRESH_DELAY_MS, is_python_file, python_files
+from ide.words import (BUFFER_WEIGHT, STATIC_INDEX, PrefixIndex, complete_members, complete_words, count_files,
+                       index_buffer, module_members, module_search_paths)
+from ide.workers import BackgroundRefresh, BufferJobs, process_pool, result_or_none, run_in_batches
+
+WORDS_DELAY_MS = 300  # Quiet time after the last edit before a buffer's words are recounted
+INLINE_INDEX_CHARS = 20000  # Smaller buffers are indexed on the GUI thread; a round trip to the pool costs more
+MAX_COMPLETIONS = 30  # Rows offered at most; see ide.words.TOP_SIZE
+
+
+class ProjectWordsThread(QThread):
+    """
+    Brings the word counts of a project up to date.  Files whose mtime
+    matches the table are reused; the rest are counted again (on the
+    shared process pool when there are many) and their old counts are
+    swapped for the new ones in the project totals, which are then
+    indexed.
+    """
+
+    words_ready = pyqtSignal(object, object, object)  # Table, totals, PrefixIndex
+
+    def __init__(self, root, files, table, totals, parent=None):
+        super().__init__(parent)
+        self.root = root
+        self.files = files  # [(rel_path, mtime)]
+        self.table = table  # rel_path -> (mtime, counts)
+        self.totals = totals
+
+    def run(self):
+        table = dict(self.table)
+        totals = Counter(self.totals)
+        wanted = dict(self.files)
+        changed = [rel_path for rel_path, mtime in self.files
+                   if rel_path not in table or table[rel_path][0] != mtime]
+        for rel_path in [rel_path for rel_path in table if rel_path not in wanted]:
+            totals.subtract(table.pop(rel_path)[1])
+
+        results = run_in_batches(count_files, self.root, changed, self.isInterruptionRequested)
+        if results is None:
+            return
+        for rel_path, mtime, counts in results:
+            if rel_path in table:
+                totals.subtract(table[rel_path][1])
+            table[rel_path] = (mtime, counts)
+            totals.update(counts)
+        if not changed and len(wanted) == len(self.table):
+            return  # Nothing to re-index
+        totals = +totals  # Drop the words that are gone
+        index = PrefixIndex(totals)
+        if not self.isInterruptionRequested():
+            self.words_ready.emit(table, totals, index)
+
+
+class ProjectWords(QObject):
+    """
+    Identifier counts of a project's Python files for word completion,
+    refreshed from the project's file index whenever it changes.
+    """
+
+    updated = pyqtSignal()
+
+    def __init__(self, root, parent=None):
+        super().__init__(parent)
+        self.root = root
+        self.table = {}
+        self.totals = Counter()
+        self.index = None  # PrefixIndex, once the first refresh is done
+        self.refresher = BackgroundRefresh(self, REFRESH_DELAY_MS, self.start_thread)
+
+    def refresh(self, index):
+        """Schedule a refresh against ``index`` (a ProjectIndex)."""
+        self.refresher.refresh(index)
+
+    def start_thread(self, index):
+        thread = ProjectWordsThread(self.root, python_files(index), self.table, self.totals, self)
+        thread.words_ready.connect(self.on_words_ready)
+        return thread
+
+    def on_words_ready(self, table, totals, index):
+        self.table = table
+        self.totals = totals
+        self.index = index
+        self.updated.emit()
+
+    def stop(self):
+        self.refresher.stop()
+
+
+class CompletionService(QObject):
+    """
+    Completions for the word at the cursor, ranked by frequency and
+    locality (see ide.words.complete_words): words near the cursor first,
+    then those of the buffer, the project (a ProjectWords index) and, in
+    Python files, keywords and builtins.  After "name." the members of the
+    module ``name`` is imported as are offered instead, read from the
+    project's virtualenv.
+
+    Each watched buffer has its own small index, rebuilt a moment after
+    the last edit if its text revision moved (on the process pool for big
+    buffers), so the project index, which takes long to build, only
+    changes when files do.  Module members are resolved on the pool once
+    and cached; a lookup itself only bisects the indexes, so it stays fast
+    however many words there are.
+    """
+
+    completions_changed = pyqtSignal()  # Buffer words or module members arrived
+    index_done = pyqtSignal(object)  # Future of a buffer index; emitted from pool threads
+    members_done = pyqtSignal(object)  # Future of a module's members; emitted from pool threads
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.buffers = {}  # SharedDocument -> PrefixIndex of its words
+        self.imports = {}  # SharedDocument -> {name: module}, see find_imports
+        self.resolving = {}  # Future -> (module, search paths) whose members are being listed
+        self.members = {}  # (module, search paths) -> [name], or None while resolving
+        self.search_paths = {}  # (project path, virtualenv path) -> module_search_paths()
+        self.stopped = False
+        self.jobs = BufferJobs(self, WORDS_DELAY_MS, self.index_job, self.set_buffer, self.index_done.emit)
+        self.index_done.connect(self.jobs.finish)
+        self.members_done.connect(self.on_members_done)
+
+    def watch(self, document):
+        if self.jobs.watch(document):
+            document.destroyed.connect(lambda *args: self.forget(document))
+
+    def forget(self, document):
+        self.jobs.forget(document)
+        self.buffers.pop(document, None)
+        self.imports.pop(document, None)
+
+    def index_job(self, document, text):
+        if len(text) < INLINE_INDEX_CHARS:
+            self.set_buffer(document, index_buffer(text))
+            return None
+        return index_buffer, text
+
+    def set_buffer(self, document, result):
+        self.buffers[document], self.imports[document] = result
+        self.completions_changed.emit()
+
+    def module_members(self, module, project_path=None, venv_path=None):
+        """The members of ``module``, or None until they are resolved."""
+        search_paths = self.search_paths.get((project_path, venv_path))
+        if search_paths is None:
+            search_paths = tuple(module_search_paths(project_path, venv_path))
+            self.search_paths[(project_path, venv_path)] = search_paths
+        key = (module, search_paths)
+        if key not in self.members and not self.stopped:
+            try:
+                future = process_pool().submit(module_members, module, search_paths)
+            except RuntimeError:  # The pool is shutting down
+                return None
+            self.members[key] = None
+            self.resolving[future] = key
+            future.add_done_callback(self.on_members_future_done)
+        return self.members.get(key)
+
+    def on_members_future_done(self, future):
+        # On a pool thread: hand the future over to the GUI thread
+        if not self.stopped:
+            self.members_done.emit(future)
+
+    def on_members_done(self, future):
+        key = self.resolving.pop(future, None)
+        if key is None:
+            return
+        members = result_or_none(future)
+        if members is None:
+            del self.members[key]  # Failed; tried again on the next lookup
+        else:
+            self.members[key] = members
+            self.completions_changed.emit()
+
+    def complete(self, document, prefix, qualifier=None, nearby_text="", project_index=None,
+                 project_path=None, venv_path=None):
+        """
+        Ranked completions of ``prefix``, the word before the cursor;
+        ``qualifier`` is what precedes it up to a dot ("os.path" in
+        "os.path.jo"), ``nearby_text`` the lines around the cursor.
+        """
+        python = document is not None and is_python_file(document.file_path)
+        if qualifier:
+            name, _, rest = qualifier.partition(".")
+            module = self.imports.get(document, {}).get(name) if python else None
+            if module is not None:
+                members = self.module_members(f"{module}.{rest}" if rest else module, project_path, venv_path)
+                if members:
+                    return complete_members(prefix, members, MAX_COMPLETIONS)
+            if not prefix:
+                return []  # Too little to go on for word completion
+        indexes = []
+        if document in self.buffers:
+            indexes.append((self.buffers[document], BUFFER_WEIGHT))
+        if project_index is not None:
+            indexes.append((project_index, 1.0))
+        if python and not qualifier:
+            indexes.append((STATIC_INDEX, 1.0))
+        return complete_words(prefix, indexes, nearby_text, MAX_COMPLETIONS)
+
+    def stop(self):
+        self.stopped = True
+        self.jobs.stop()
+        for future in list(self.resolving):
+            future.cancel()
@@ -0,0 +1,52 @@
+from PyQt5.QtCore import QObject, pyqtSignal
+from ide.lint import check_source
+from ide.workers import BufferJobs
+
+DIAGNOSTICS_DELAY_MS = 600  # Quiet time after the last edit before a buffer is checked
+DIAGNOSTICS_CACHE_SIZE = 256  # Results kept by content hash
+
+
+class DiagnosticsService(QObject):
+    """
+    Keeps the diagnostics (see ide.lint) of every watched SharedDocument.
+    Checks run on the shared process pool (see ide.workers.BufferJobs),
+    so a slow check of a big file never holds the GUI thread or its GIL.
+    Edits only restart a debounce timer; when it fires, checks of older
+    content that have not started yet are cancelled, and a buffer whose
+    revision moved is hashed and only checked if that content has not been
+    seen before.  Results that arrive for outdated content are cached but
+    not shown.
+    """
+
+    diagnostics_changed = pyqtSignal(object)  # SharedDocument
+    check_done = pyqtSignal(object)  # Future; emitted from pool threads
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.diagnostics = {}  # SharedDocument -> [Diagnostic]
+        self.jobs = BufferJobs(self, DIAGNOSTICS_DELAY_MS, self.check_job, self.set_diagnostics,
+                               self.check_done.emit, cache_size=DIAGNOSTICS_CACHE_SIZE)
+        self.check_done.connect(self.jobs.finish)
+
+    def watch(self, document):
+        if self.jobs.watch(document):
+            document.destroyed.connect(lambda *args: self.forget(document))
+
+    def forget(self, document):
+        self.jobs.forget(document)
+        self.diagnostics.pop(document, None)
+
+    def diagnostics_for(self, document):
+        return self.diagnostics.get(document, [])
+
+    def check_job(self, document, text):
+        return check_source, text, document.file_path or "<buffer>"
+
+    def set_diagnostics(self, document, diagnostics):
+        if self.diagnostics.get(document, []) == diagnostics:
+            return
+        self.diagnostics[document] = diagnostics
+        self.diagnostics_changed.emit(document)
+
+    def stop(self):
+        self.jobs.stop()
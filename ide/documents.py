@@ -0,0 +1,84 @@
+import os
+
+from PyQt5.QtCore import QObject, QTimer, pyqtSignal
+from ide.editor import SharedDocument
+
+DEFAULT_MEMORY_BUDGET = 512 << 20  # Estimated bytes of open documents before idle ones are unloaded
+TRIM_DELAY_MS = 1000  # Batch budget checks after loads and tab switches
+
+
+def canonical_path(path):
+    """The key a file is registered under: symlinks, "..", and case on Windows resolved."""
+    return os.path.normcase(os.path.realpath(path))
+
+
+class DocumentRegistry(QObject):
+    """
+    One SharedDocument per file, however many editors show it.
+
+    ``open`` hands out the existing document for a path or loads a new one;
+    a document is dropped once its last view releases it.  When the
+    estimated memory of all documents exceeds ``memory_budget``, the least
+    recently used documents that are unmodified, fully loaded and not on
+    screen are offered for unloading through ``unload_requested``; the
+    owner of the views closes or replaces them, which releases the document.
+    """
+
+    unload_requested = pyqtSignal(object)  # SharedDocument
+
+    def __init__(self, memory_budget=DEFAULT_MEMORY_BUDGET, parent=None):
+        super().__init__(parent)
+        self.memory_budget = memory_budget
+        self.documents = {}  # canonical path -> SharedDocument
+        self.trim_timer = QTimer(self)
+        self.trim_timer.setSingleShot(True)
+        self.trim_timer.setInterval(TRIM_DELAY_MS)
+        self.trim_timer.timeout.connect(self.trim)
+
+    def open(self, file_path):
+        key = canonical_path(file_path)
+        document = self.documents.get(key)
+        if document is None:
+            document = SharedDocument(file_path, parent=self)
+            document.load_finished.connect(self.schedule_trim)
+            # A file that failed to load is read again by the next open()
+            document.load_failed.connect(lambda message, d=document: self.forget(d))
+            self.documents[key] = document
+            document.load()
+        document.touch()
+        return document
+
+    def release(self, document):
+        """Discard ``document`` if no view shows it any more (see CodeEditor.release_document)."""
+        if not document.views:
+            self.forget(document)
+            document.deleteLater()
+
+    def forget(self, document):
+        key = canonical_path(document.file_path)
+        if self.documents.get(key) is document:
+            del self.documents[key]
+
+    def get(self, file_path):
+        return self.documents.get(canonical_path(file_path))
+
+    def memory_estimate(self):
+        return sum(document.memory_estimate() for document in self.documents.values())
+
+    def schedule_trim(self):
+        self.trim_timer.start()
+
+    def trim(self):
+        """Ask for idle documents to be unloaded until the estimate fits the budget."""
+        total = self.memory_estimate()
+        if total <= self.memory_budget:
+            return
+        idle = [
+            document for document in self.documents.values()
+            if not document.is_modified() and not document.is_loading() and not document.is_visible()
+        ]
+        for document in sorted(idle, key=lambda d: d.last_used):
+            if total <= self.memory_budget:
+                break
+            total -= document.memory_estimate()
+            self.unload_requested.emit(document)
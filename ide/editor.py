@@ -1,6 +1,47 @@
-from PyQt5.QtWidgets import QWidget, QPlainTextEdit
-from PyQt5.QtGui import QPainter, QColor, QFont, QTextFormat, QSyntaxHighlighter, QTextCharFormat, QKeyEvent
-from PyQt5.QtCore import Qt, QRect, QRegExp
+import builtins
+import keyword
+import os
+import re
+import time
+from collections import OrderedDict
+
+from PyQt5.QtWidgets import QWidget, QPlainTextEdit, QPlainTextDocumentLayout, QTextEdit, QToolTip
+from PyQt5.QtGui import (
+    QPainter, QColor, QFont, QTextFormat, QSyntaxHighlighter, QTextCharFormat, QKeyEvent, QTextLayout,
+    QTextCursor, QPixmap, QTextDocument
+)
+from PyQt5.QtCore import Qt, QRect, QSize, QObject, QTimer, QEvent, pyqtSignal
+from ide import perf
+from ide.find_replace import edited_ranges, matches_between, normalize_edits, shift_positions, splice
+from ide.lint import ERROR
+from ide.loader import FileLoaderThread
+
+# Files with at least this many lines open in large-file mode: only the
+# viewport (plus a margin) is highlighted up front, the rest in idle time.
+LARGE_FILE_LINES = 20000
+LAZY_MARGIN_BLOCKS = 100
+IDLE_CHUNK_BLOCKS = 400
+AVERAGE_LINE_BYTES = 40  # Used to estimate the line count of a file from its size
+LINE_NUMBER_CACHE_SIZE = 512  # Rendered line-number pixmaps kept per editor
+BYTES_PER_BLOCK = 160  # Rough per-line overhead of QTextDocument and its layout
+# Batches of at least this many edits, spanning no more than SPLICE_LINES_PER_EDIT
+# lines per edit, replace the whole span in one insert instead of edit by edit
+SPLICE_MIN_EDITS = 256
+SPLICE_LINES_PER_EDIT = 1.5
+MAX_CURSORS = 10000  # Cursors beyond this are not added, e.g. when selecting every match
+MATCH_COLOR = QColor(180, 150, 30, 110)  # Background of find matches
+DIAGNOSTIC_COLORS = {ERROR: QColor(230, 60, 60)}  # Squiggle and gutter marker by severity
+WARNING_COLOR = QColor(220, 180, 40)  # Every other severity
+
+# Keys that move every cursor when several are active
+_CURSOR_MOVES = {
+    Qt.Key_Left: QTextCursor.PreviousCharacter,
+    Qt.Key_Right: QTextCursor.NextCharacter,
+    Qt.Key_Up: QTextCursor.Up,
+    Qt.Key_Down: QTextCursor.Down,
+    Qt.Key_Home: QTextCursor.StartOfBlock,
+    Qt.Key_End: QTextCursor.EndOfBlock,
+}
 
 class LineNumberArea(QWidget):
     def __init__(self, editor):
@@ -13,87 +54,990 @@ class LineNumberArea(QWidget):
     def paintEvent(self, event):
         self.editor.lineNumberAreaPaintEvent(event)
 
+class SharedDocument(QObject):
+    """
+    The text of one file with its highlighting and background loading.
+    Several CodeEditor views can show the same SharedDocument; they share
+    one QTextDocument (and so one undo stack) and one highlighter.
+    """
+
+    load_started = pyqtSignal()
+    load_progress = pyqtSignal(int)
+    load_finished = pyqtSignal()
+    load_failed = pyqtSignal(str)
+    load_cancelled = pyqtSignal()
+    saved = pyqtSignal()
+
+    def __init__(self, file_path=None, large_file_lines=LARGE_FILE_LINES, parent=None):
+        super().__init__(parent)
+        self.file_path = file_path
+        self.large_file_lines = large_file_lines
+        self.encoding = "utf-8"
+        self.newline = "\n"
+        self.loader = None
+        self.views = []
+        self.last_used = time.monotonic()
+
+        self.text_document = QTextDocument(self)
+        self.text_document.setDocumentLayout(QPlainTextDocumentLayout(self.text_document))
+        self.highlighter = PythonSyntaxHighlighter(self.text_document)
+        self.viewport_highlighter = ViewportHighlighter(self.text_document, self.highlighter.tokenizer)
+
+    def add_view(self, view):
+        self.views.append(view)
+        self.touch()
+
+    def remove_view(self, view):
+        """Detach ``view``; the last view to go cancels a running load."""
+        if view in self.views:
+            self.views.remove(view)
+        if not self.views:
+            self.cancel_load()
+
+    def touch(self):
+        self.last_used = time.monotonic()
+
+    def is_visible(self):
+        return any(view.isVisible() for view in self.views)
+
+    def is_modified(self):
+        return self.text_document.isModified()
+
+    def memory_estimate(self):
+        """Rough size in bytes of the text and its per-block layout data."""
+        return self.text_document.characterCount() * 2 + self.text_document.blockCount() * BYTES_PER_BLOCK
+
+    def set_plain_text(self, text):
+        self.set_large_file_mode(text.count("\n") >= self.large_file_lines)
+        self.text_document.setPlainText(text)
+
+    def set_large_file_mode(self, enabled):
+        """
+        In large-file mode the document-wide highlighter is detached and only
+        the viewport is highlighted eagerly (see ViewportHighlighter).
+        """
+        if enabled == self.viewport_highlighter.enabled:
+            return
+        self.viewport_highlighter.set_enabled(enabled)
+        self.highlighter.setDocument(None if enabled else self.text_document)
+
+    @perf.timed("document.apply_edits")
+    def apply_edits(self, edits):
+        """
+        Apply ``[(start, end, new_text)]`` as one undo step.  The edit block
+        makes the document report a single change, so the highlighter, the
+        gutter and textChanged listeners each run once for the whole batch.
+        Returns the edits as applied: sorted, without overlaps.
+        """
+        edits = normalize_edits(edits)
+        if not edits:
+            return edits
+        document = self.text_document
+        first, last = edits[0][0], edits[-1][1]
+        span_lines = document.findBlock(last).blockNumber() - document.findBlock(first).blockNumber() + 1
+        dense = len(edits) >= SPLICE_MIN_EDITS and span_lines <= len(edits) * SPLICE_LINES_PER_EDIT
+        cursor = QTextCursor(document)
+        cursor.beginEditBlock()
+        if dense:
+            # One insert is far cheaper than thousands of small ones, but it
+            # collapses the views' cursors, so those are mapped over by hand
+            view_positions = []
+            for view in self.views:
+                view_positions += [view.textCursor().anchor(), view.textCursor().position()]
+            cursor.setPosition(first)
+            cursor.setPosition(last, QTextCursor.KeepAnchor)
+            cursor.insertText(splice(cursor.selectedText().replace("\u2029", "\n"), edits, first))
+        else:
+            for start, end, new_text in reversed(edits):
+                cursor.setPosition(start)
+                cursor.setPosition(end, QTextCursor.KeepAnchor)
+                cursor.insertText(new_text)
+        cursor.endEditBlock()
+        if dense:
+            shifted = shift_positions(view_positions, edits)
+            for i, view in enumerate(self.views):
+                view_cursor = view.textCursor()
+                view_cursor.setPosition(shifted[2 * i])
+                view_cursor.setPosition(shifted[2 * i + 1], QTextCursor.KeepAnchor)
+                view.setTextCursor(view_cursor)
+        return edits
+
+    def save(self):
+        """Write the text back with the encoding and line ending it was read with."""
+        text = self.text_document.toPlainText()
+        if self.newline != "\n":
+            text = text.replace("\n", self.newline)
+        with open(self.file_path, "w", encoding=self.encoding, newline="") as file:
+            file.write(text)
+        self.text_document.setModified(False)
+        self.saved.emit()
+
+    def apply_reload(self, edits, encoding, newline):
+        """
+        Bring the text in line with the file after it changed on disk:
+        ``edits`` (see ide.file_watch.line_edits) only touch the lines that
+        differ, as one undo step, so cursors move with the text around them
+        and every view keeps its scroll position.
+        """
+        scrolls = [view.verticalScrollBar().value() for view in self.views]
+        self.apply_edits(edits)
+        for view, scroll in zip(self.views, scrolls):
+            view.verticalScrollBar().setValue(scroll)
+        self.encoding = encoding
+        self.newline = newline
+        self.text_document.setModified(False)
+
+    def reload(self):
+        """Load the file again from scratch; the views get their cursor and scroll back once it is in."""
+        states = [view.view_state() for view in self.views]
+        self.load()
+        for view, state in zip(self.views, states):
+            view.restore_view_state(*state)  # Deferred until the load finishes
+
+    #
+    # BACKGROUND LOADING
+    #
+    def load(self):
+        """Stream ``file_path`` into the document from a FileLoaderThread."""
+        self.cancel_load()
+        try:
+            size = os.path.getsize(self.file_path)
+        except OSError:
+            size = 0
+        self.set_large_file_mode(size // AVERAGE_LINE_BYTES >= self.large_file_lines)
+        self.text_document.clear()
+        self.text_document.setUndoRedoEnabled(False)
+
+        self.loader = FileLoaderThread(self.file_path, self)
+        self.loader.chunk_loaded.connect(self.on_chunk_loaded)
+        self.loader.restarted.connect(self.on_load_restarted)
+        self.loader.progress.connect(self.on_load_progress)
+        self.loader.loaded.connect(self.on_file_loaded)
+        self.loader.failed.connect(self.on_load_failed)
+        self.loader.start()
+        self.load_started.emit()
+
+    def is_loading(self):
+        return self.loader is not None
+
+    def is_current_loader(self):
+        # Signals queued by a cancelled loader may still arrive; ignore them
+        return self.loader is not None and self.sender() is self.loader
+
+    def on_chunk_loaded(self, text):
+        if not self.is_current_loader():
+            return
+        cursor = QTextCursor(self.text_document)
+        cursor.movePosition(QTextCursor.End)
+        cursor.insertText(text)
+        self.loader.chunk_consumed()
+
+    def on_load_restarted(self):
+        if self.is_current_loader():
+            self.text_document.clear()
+
+    def on_load_progress(self, percent):
+        if self.is_current_loader():
+            self.load_progress.emit(percent)
+
+    def on_file_loaded(self, encoding, newline):
+        if not self.is_current_loader():
+            return
+        self.encoding = encoding
+        self.newline = newline
+        self.finish_load()
+        self.load_finished.emit()
+
+    def on_load_failed(self, message):
+        if not self.is_current_loader():
+            return
+        self.finish_load()
+        self.load_failed.emit(message)
+
+    def finish_load(self):
+        self.loader.wait()
+        self.loader = None
+        self.text_document.setUndoRedoEnabled(True)
+        self.text_document.setModified(False)
+
+    def cancel_load(self):
+        """Stop a load in progress, e.g. because the last view is being closed."""
+        if self.loader is None:
+            return
+        loader, self.loader = self.loader, None
+        loader.requestInterruption()
+        loader.wait()
+        self.text_document.setUndoRedoEnabled(True)
+        self.load_cancelled.emit()
+
+
 class CodeEditor(QPlainTextEdit):
-    def __init__(self):
+    """
+    A view of a SharedDocument.  Without one, the editor gets a private,
+    untitled document.
+    """
+
+    load_progress = pyqtSignal(int)
+    load_finished = pyqtSignal()
+    load_failed = pyqtSignal(str)
+
+    def __init__(self, shared_document=None, large_file_lines=LARGE_FILE_LINES):
         super().__init__()
-        self.setFont(QFont("Consolas", 12))
-        self.setTabStopDistance(4 * self.fontMetrics().horizontalAdvance(' '))
+        self.large_file_lines = large_file_lines
+        self.shared_document = None
+        self.pending_view = None  # Called once the background load finishes
+        self.extra_cursors = []  # QTextCursors edited together with textCursor()
+        self.selection_groups = {}  # Name -> [QTextEdit.ExtraSelection], see set_selection_group
+        self.search_matches = []  # (start, end, new_text) of find matches, highlighted where visible
+        self.search_starts = []
+        self.diagnostics = []  # [Diagnostic] shown as squiggles, see set_diagnostics
+        self.diagnostic_lines = {}  # Block number -> color of its gutter marker
 
         self.lineNumberArea = LineNumberArea(self)
+        self.line_number_digits = 1
+        self.line_number_cache = OrderedDict()
+
+        self.set_shared_document(shared_document or SharedDocument(large_file_lines=large_file_lines))
+
+        self.setFont(QFont("Consolas", 12))
+        self.setTabStopDistance(4 * self.fontMetrics().horizontalAdvance(' '))
         self.setViewportMargins(self.lineNumberAreaSize(), 0, 0, 0)  # Fixed usage
 
-        self.textChanged.connect(self.updateLineNumberArea)
-        self.highlighter = PythonSyntaxHighlighter(self.document())
+        # Only repaint the part of the gutter that changed; scrolling moves it
+        self.updateRequest.connect(self.updateLineNumberArea)
+        self.blockCountChanged.connect(self.updateLineNumberAreaWidth)
+        self.verticalScrollBar().valueChanged.connect(self.update_highlight_window)
+        self.verticalScrollBar().valueChanged.connect(self.show_visible_matches)
+
+    def set_shared_document(self, shared_document):
+        # Keep the old document alive until the view has switched away from it
+        old_document = self.shared_document
+        if old_document is not None:
+            self.release_document()
+        self.shared_document = shared_document
+        shared_document.add_view(self)
+        shared_document.load_started.connect(self.on_load_started)
+        shared_document.load_progress.connect(self.load_progress)
+        shared_document.load_finished.connect(self.on_load_finished)
+        shared_document.load_failed.connect(self.on_load_failed)
+        shared_document.load_cancelled.connect(self.on_load_cancelled)
+        self.setDocument(shared_document.text_document)
+        del old_document
+        self.setReadOnly(shared_document.is_loading())
+        self.updateLineNumberAreaWidth(self.blockCount(), force=True)
+
+    def release_document(self):
+        """Detach from the shared document, e.g. before the editor is deleted."""
+        shared_document = self.shared_document
+        for signal, slot in ((shared_document.load_started, self.on_load_started),
+                             (shared_document.load_progress, self.load_progress),
+                             (shared_document.load_finished, self.on_load_finished),
+                             (shared_document.load_failed, self.on_load_failed),
+                             (shared_document.load_cancelled, self.on_load_cancelled)):
+            signal.disconnect(slot)
+        shared_document.remove_view(self)
+
+    @property
+    def file_path(self):
+        return self.shared_document.file_path
+
+    @property
+    def encoding(self):
+        return self.shared_document.encoding
+
+    @property
+    def newline(self):
+        return self.shared_document.newline
+
+    @property
+    def highlighter(self):
+        return self.shared_document.highlighter
+
+    @property
+    def viewport_highlighter(self):
+        return self.shared_document.viewport_highlighter
+
+    def setPlainText(self, text):
+        self.shared_document.set_plain_text(text)
+        self.update_highlight_window()
+
+    def set_large_file_mode(self, enabled):
+        self.shared_document.set_large_file_mode(enabled)
+
+    #
+    # BACKGROUND LOADING
+    #
+    def load_file(self, file_path):
+        """Stream ``file_path`` into a new private document."""
+        self.set_shared_document(SharedDocument(file_path, self.large_file_lines))
+        self.shared_document.setParent(self)
+        self.shared_document.load()
+
+    def is_loading(self):
+        return self.shared_document.is_loading()
+
+    def cancel_load(self):
+        self.shared_document.cancel_load()
+
+    def on_load_started(self):
+        self.setReadOnly(True)
+
+    def on_load_finished(self):
+        self.setReadOnly(False)
+        self.moveCursor(QTextCursor.Start)
+        if self.pending_view is not None:
+            pending_view, self.pending_view = self.pending_view, None
+            pending_view()
+        self.load_finished.emit()
+
+    def on_load_failed(self, message):
+        self.on_load_cancelled()
+        self.load_failed.emit(message)
+
+    def on_load_cancelled(self):
+        self.setReadOnly(False)
+        self.pending_view = None
+
+    def showEvent(self, event):
+        super().showEvent(event)
+        self.shared_document.touch()
+        self.update_highlight_window()
+
+    def go_to_line(self, line, column=0):
+        """Move the cursor to 1-based ``line``, deferred until a running load finishes."""
+        if self.is_loading():
+            self.pending_view = lambda: self.go_to_line(line, column)
+            return
+        block = self.document().findBlockByNumber(max(0, line - 1))
+        if not block.isValid():
+            block = self.document().lastBlock()
+        cursor = QTextCursor(block)
+        cursor.movePosition(QTextCursor.Right, QTextCursor.MoveAnchor, min(column, block.length() - 1))
+        self.setTextCursor(cursor)
+        self.centerCursor()
+
+    def view_state(self):
+        """Cursor position and scroll offset, as saved in the session."""
+        return self.textCursor().position(), self.verticalScrollBar().value()
+
+    def restore_view_state(self, position, scroll):
+        """Undo of view_state(), deferred until a running load finishes."""
+        if self.is_loading():
+            self.pending_view = lambda: self.restore_view_state(position, scroll)
+            return
+        cursor = self.textCursor()
+        cursor.setPosition(min(position, self.document().characterCount() - 1))
+        self.setTextCursor(cursor)
+        self.verticalScrollBar().setValue(scroll)
+
+    def update_highlight_window(self):
+        first = self.firstVisibleBlock().blockNumber()
+        visible = self.viewport().height() // max(1, self.fontMetrics().height()) + 1
+        self.viewport_highlighter.set_window(
+            max(0, first - LAZY_MARGIN_BLOCKS), first + visible + LAZY_MARGIN_BLOCKS
+        )
+
+    def visible_range(self):
+        """Document positions from the first visible block to the end of the last one."""
+        first = self.firstVisibleBlock()
+        visible = self.viewport().height() // max(1, self.fontMetrics().height()) + 1
+        last = self.document().findBlockByNumber(first.blockNumber() + visible)
+        end = last.position() + last.length() if last.isValid() else self.document().characterCount()
+        return first.position(), end
 
     def resizeEvent(self, event):
         super().resizeEvent(event)
         rect = self.contentsRect()
         self.lineNumberArea.setGeometry(rect.left(), rect.top(), self.lineNumberAreaSize(), rect.height())
+        self.update_highlight_window()
+        self.show_visible_matches()
+
+    #
+    # EXTRA SELECTIONS
+    #
+    def set_selection_group(self, name, selections):
+        """Replace one named group of extra selections; the groups are shown together."""
+        if selections:
+            self.selection_groups[name] = selections
+        elif self.selection_groups.pop(name, None) is None:
+            return
+        self.setExtraSelections([selection for group in self.selection_groups.values() for selection in group])
+
+    def set_search_matches(self, matches):
+        """Highlight find ``matches``; only the visible ones become extra selections."""
+        self.search_matches = matches
+        self.search_starts = [match[0] for match in matches]
+        self.show_visible_matches()
+
+    def show_visible_matches(self):
+        if not self.search_matches:
+            self.set_selection_group("matches", [])
+            return
+        first, last = self.visible_range()
+        document = self.document()
+        selections = []
+        for start, end, _ in matches_between(self.search_matches, self.search_starts, first, last):
+            selection = QTextEdit.ExtraSelection()
+            selection.cursor = QTextCursor(document)
+            selection.cursor.setPosition(start)
+            selection.cursor.setPosition(end, QTextCursor.KeepAnchor)
+            selection.format.setBackground(MATCH_COLOR)
+            selections.append(selection)
+        self.set_selection_group("matches", selections)
+
+    def set_diagnostics(self, diagnostics):
+        """Underline ``diagnostics`` (see ide.lint) and mark their lines in the gutter."""
+        self.diagnostics = diagnostics
+        self.diagnostic_lines = {}
+        document = self.document()
+        selections = []
+        for diagnostic in diagnostics:
+            block = document.findBlockByNumber(diagnostic.line - 1)
+            if not block.isValid():
+                continue
+            color = DIAGNOSTIC_COLORS.get(diagnostic.severity, WARNING_COLOR)
+            if diagnostic.severity == ERROR or block.blockNumber() not in self.diagnostic_lines:
+                self.diagnostic_lines[block.blockNumber()] = color  # Errors win over warnings
+            length = block.length() - 1
+            selection = QTextEdit.ExtraSelection()
+            selection.cursor = QTextCursor(block)
+            selection.cursor.setPosition(block.position() + min(diagnostic.column, length))
+            if diagnostic.end_column is not None:
+                selection.cursor.setPosition(block.position() + min(diagnostic.end_column, length),
+                                             QTextCursor.KeepAnchor)
+            else:
+                selection.cursor.movePosition(QTextCursor.EndOfWord, QTextCursor.KeepAnchor)
+            if not selection.cursor.hasSelection():
+                # Nothing to underline at the end of a line: mark the character before it
+                selection.cursor.movePosition(QTextCursor.PreviousCharacter, QTextCursor.KeepAnchor)
+            selection.format.setUnderlineStyle(QTextCharFormat.WaveUnderline)
+            selection.format.setUnderlineColor(color)
+            selections.append(selection)
+        self.set_selection_group("diagnostics", selections)
+        self.lineNumberArea.update()
+
+    def diagnostic_messages(self, line):
+        return [diagnostic.message for diagnostic in self.diagnostics if diagnostic.line == line]
+
+    def viewportEvent(self, event):
+        if event.type() == QEvent.ToolTip and self.diagnostics:
+            line = self.cursorForPosition(event.pos()).blockNumber() + 1
+            messages = self.diagnostic_messages(line)
+            if messages:
+                QToolTip.showText(event.globalPos(), "\n".join(messages), self.viewport())
+            else:
+                QToolTip.hideText()
+            return True
+        return super().viewportEvent(event)
+
+    #
+    # MULTIPLE CURSORS
+    #
+    def all_cursors(self):
+        return [self.textCursor()] + self.extra_cursors
+
+    def set_cursors(self, cursors):
+        """Make ``cursors[0]`` the text cursor and the rest extra cursors, dropping duplicates."""
+        self.setTextCursor(cursors[0])
+        seen = {(cursors[0].anchor(), cursors[0].position())}
+        self.extra_cursors = []
+        for cursor in cursors[1:]:
+            key = (cursor.anchor(), cursor.position())
+            if key not in seen and len(self.extra_cursors) < MAX_CURSORS:
+                seen.add(key)
+                self.extra_cursors.append(cursor)
+        self.show_extra_cursors()
+
+    def set_cursor_ranges(self, ranges):
+        """One cursor per ``(start, end)`` selection, e.g. one per find match."""
+        cursors = []
+        for start, end in ranges[:MAX_CURSORS + 1]:
+            cursor = QTextCursor(self.document())
+            cursor.setPosition(start)
+            cursor.setPosition(end, QTextCursor.KeepAnchor)
+            cursors.append(cursor)
+        if cursors:
+            self.set_cursors(cursors)
+
+    def clear_extra_cursors(self):
+        if self.extra_cursors:
+            self.extra_cursors = []
+            self.show_extra_cursors()
+
+    def add_cursor_vertically(self, operation):
+        """Add a cursor one line up or down from the text cursor, for column edits."""
+        cursor = self.textCursor()
+        moved = QTextCursor(cursor)
+        if moved.movePosition(operation):
+            self.set_cursors([moved, cursor] + self.extra_cursors)
+
+    def show_extra_cursors(self):
+        selections = []
+        for cursor in self.extra_cursors:
+            if cursor.hasSelection():
+                selection = QTextEdit.ExtraSelection()
+                selection.cursor = cursor
+                selection.format.setBackground(self.palette().highlight())
+                selection.format.setForeground(self.palette().highlightedText())
+                selections.append(selection)
+        self.set_selection_group("cursors", selections)
+        self.viewport().update()
+
+    def edit_at_cursors(self, edits):
+        """
+        Apply one ``(start, end, new_text)`` per cursor (in all_cursors order)
+        as a single batch and leave each cursor after its new text.
+        """
+        applied = self.shared_document.apply_edits(edits)
+        ends = {edit[:2]: end for edit, (_, end) in zip(applied, edited_ranges(applied))}
+        # Edits dropped for overlapping another one leave their cursor where that one ends
+        shifted = shift_positions([end for _, end, _ in edits], applied)
+        cursors = []
+        for (start, end, _), position in zip(edits, shifted):
+            cursor = QTextCursor(self.document())
+            cursor.setPosition(ends.get((start, end), position))
+            cursors.append(cursor)
+        self.set_cursors(cursors)
+        self.ensureCursorVisible()
+
+    def multi_cursor_key(self, event):
+        """Handle ``event`` for every cursor; returns False for keys left to QPlainTextEdit."""
+        key = event.key()
+        modifiers = event.modifiers() & ~Qt.KeypadModifier
+        if key == Qt.Key_Escape:
+            self.clear_extra_cursors()
+            return True
+        if key in _CURSOR_MOVES and modifiers in (Qt.NoModifier, Qt.ShiftModifier):
+            mode = QTextCursor.KeepAnchor if modifiers == Qt.ShiftModifier else QTextCursor.MoveAnchor
+            cursors = self.all_cursors()
+            for cursor in cursors:
+                cursor.movePosition(_CURSOR_MOVES[key], mode)
+            self.set_cursors(cursors)
+            return True
+
+        deletion = {Qt.Key_Backspace: QTextCursor.PreviousCharacter, Qt.Key_Delete: QTextCursor.NextCharacter}
+        if key in deletion and modifiers == Qt.NoModifier:
+            text = ""
+        elif key in (Qt.Key_Return, Qt.Key_Enter) and modifiers == Qt.NoModifier:
+            text = "\n"
+        elif key == Qt.Key_Tab and modifiers == Qt.NoModifier:
+            text = "    "
+        elif event.text().isprintable() and event.text() and not modifiers & ~Qt.ShiftModifier:
+            text = event.text()
+        else:
+            return False
+        edits = []
+        for cursor in self.all_cursors():
+            if not cursor.hasSelection() and key in deletion:
+                cursor.movePosition(deletion[key], QTextCursor.KeepAnchor)
+            edits.append((cursor.selectionStart(), cursor.selectionEnd(), text))
+        self.edit_at_cursors(edits)
+        return True
+
+    def mousePressEvent(self, event):
+        if event.button() == Qt.LeftButton and event.modifiers() == Qt.AltModifier:
+            self.set_cursors([self.cursorForPosition(event.pos())] + self.all_cursors())
+            return
+        self.clear_extra_cursors()
+        super().mousePressEvent(event)
+
+    def paintEvent(self, event):
+        super().paintEvent(event)
+        if not self.extra_cursors:
+            return
+        painter = QPainter(self.viewport())
+        color = self.palette().text().color()
+        for cursor in self.extra_cursors:
+            rect = self.cursorRect(cursor)
+            if rect.intersects(event.rect()):
+                painter.fillRect(rect.x(), rect.y(), max(1, self.cursorWidth()), rect.height(), color)
 
     def keyPressEvent(self, event: QKeyEvent):
+        if event.modifiers() == Qt.ControlModifier | Qt.AltModifier and event.key() in (Qt.Key_Up, Qt.Key_Down):
+            self.add_cursor_vertically(QTextCursor.Up if event.key() == Qt.Key_Up else QTextCursor.Down)
+            return
+        if self.extra_cursors and event.key() not in (Qt.Key_Shift, Qt.Key_Control, Qt.Key_Alt, Qt.Key_Meta):
+            if self.multi_cursor_key(event):
+                return
+            self.clear_extra_cursors()
         if event.key() == Qt.Key_Tab:
             self.insertPlainText("    ")  # Convert tab to 4 spaces
             return
         super().keyPressEvent(event)
 
+    def changeEvent(self, event):
+        super().changeEvent(event)
+        if event.type() == QEvent.FontChange:
+            self.line_number_cache.clear()
+            self.updateLineNumberAreaWidth(self.blockCount(), force=True)
+
+    @perf.timed("editor.lineNumberAreaPaintEvent")
     def lineNumberAreaPaintEvent(self, event):
         painter = QPainter(self.lineNumberArea)
-        painter.fillRect(event.rect(), QColor(30, 30, 30))
+        rect = event.rect()
+        painter.fillRect(rect, QColor(30, 30, 30))
 
         block = self.firstVisibleBlock()
         blockNumber = block.blockNumber()
         top = self.blockBoundingGeometry(block).translated(self.contentOffset()).top()
         bottom = top + self.blockBoundingRect(block).height()
 
-        while block.isValid() and top < event.rect().bottom():
-            if block.isVisible():
-                number = str(blockNumber + 1)
-                painter.setPen(Qt.lightGray)
-                painter.drawText(0, int(top), self.lineNumberArea.width() - 5, int(bottom - top),
-                                 Qt.AlignRight, number)
+        # Blit cached numbers for the blocks that intersect the dirty rect only
+        while block.isValid() and top <= rect.bottom():
+            if block.isVisible() and bottom >= rect.top():
+                painter.drawPixmap(0, int(top), self.lineNumberPixmap(blockNumber + 1))
+                color = self.diagnostic_lines.get(blockNumber)
+                if color is not None:
+                    painter.fillRect(0, int(top), 3, int(bottom - top), color)
             block = block.next()
             top = bottom
             bottom = top + self.blockBoundingRect(block).height()
             blockNumber += 1
 
-    def updateLineNumberArea(self):
-        self.viewport().update()
-        self.lineNumberArea.update()
+    def lineNumberPixmap(self, number):
+        """Return the rendered label for ``number``, drawing it on a cache miss."""
+        cache = self.line_number_cache
+        pixmap = cache.get(number)
+        if pixmap is not None:
+            cache.move_to_end(number)
+            return pixmap
+
+        width = self.lineNumberArea.width() - 5
+        height = self.fontMetrics().height()
+        ratio = self.devicePixelRatioF()
+        pixmap = QPixmap(int(width * ratio), int(height * ratio))
+        pixmap.setDevicePixelRatio(ratio)
+        pixmap.fill(Qt.transparent)
+        painter = QPainter(pixmap)
+        painter.setFont(self.font())
+        painter.setPen(Qt.lightGray)
+        painter.drawText(0, 0, width, height, Qt.AlignRight, str(number))
+        painter.end()
+
+        cache[number] = pixmap
+        if len(cache) > LINE_NUMBER_CACHE_SIZE:
+            cache.popitem(last=False)
+        return pixmap
+
+    def updateLineNumberArea(self, rect, dy):
+        if dy:
+            self.lineNumberArea.scroll(0, dy)
+        else:
+            self.lineNumberArea.update(0, rect.y(), self.lineNumberArea.width(), rect.height())
+
+    def updateLineNumberAreaWidth(self, block_count, force=False):
+        """Resize the gutter only when the line count gains or loses a digit."""
+        digits = len(str(max(1, block_count)))
+        if digits == self.line_number_digits and not force:
+            return
+        self.line_number_digits = digits
+        self.line_number_cache.clear()
+        width = self.lineNumberAreaSize()
+        self.setViewportMargins(width, 0, 0, 0)
+        rect = self.contentsRect()
+        self.lineNumberArea.setGeometry(rect.left(), rect.top(), width, rect.height())
 
     def lineNumberAreaSize(self):
-        digits = len(str(max(1, self.blockCount())))
-        return self.fontMetrics().horizontalAdvance("9") * digits + 10  # Ensures an integer
+        return self.fontMetrics().horizontalAdvance("9") * self.line_number_digits + 10  # Ensures an integer
+
+# Block states carried from line to line by PythonSyntaxHighlighter.  The low
+# bits hold the kind of string still open at the end of the line; FSTRING marks
+# an f-string so its replacement fields keep being highlighted.
+PENDING = -1  # Qt's default block state: not highlighted yet
+NORMAL = 0
+SINGLE_QUOTE = 1
+DOUBLE_QUOTE = 2
+TRIPLE_SINGLE = 3
+TRIPLE_DOUBLE = 4
+STRING_KIND = 0x7
+FSTRING = 0x8
+
+_TOKEN_RE = re.compile(
+    r"(?P<comment>#.*)"
+    r"|(?P<string>(?:[rRbBuUfF]|[rR][bBfF]|[bBfF][rR])?(?:'''|\"\"\"|'|\"))"
+    r"|(?P<number>\b(?:0[xX][0-9a-fA-F_]+|0[bB][01_]+|0[oO][0-7_]+"
+    r"|\d[\d_]*\.?[\d_]*(?:[eE][+-]?\d[\d_]*)?[jJ]?)"
+    r"|(?<![\w.])\.\d[\d_]*(?:[eE][+-]?\d[\d_]*)?[jJ]?)"
+    r"|(?P<name>[^\W\d]\w*)"
+)
+_DECORATOR_RE = re.compile(r"\s*(@[^\W\d][\w.]*)")
+_FIELD_RE = re.compile(r"\{\{|\}\}|\{[^{}]*\}?")
+
+# Match a string body up to and including its closing quote.  A backslash
+# escapes the next character for termination purposes in raw strings too.
+_STRING_END_RE = {
+    SINGLE_QUOTE: re.compile(r"[^'\\]*(?:\\.[^'\\]*)*'"),
+    DOUBLE_QUOTE: re.compile(r'[^"\\]*(?:\\.[^"\\]*)*"'),
+    TRIPLE_SINGLE: re.compile(r"[^'\\]*(?:(?:\\.|'(?!''))[^'\\]*)*'''"),
+    TRIPLE_DOUBLE: re.compile(r'[^"\\]*(?:(?:\\.|"(?!""))[^"\\]*)*"""'),
+}
+_STRING_OPEN_KIND = {
+    "'": SINGLE_QUOTE,
+    '"': DOUBLE_QUOTE,
+    "'''": TRIPLE_SINGLE,
+    '"""': TRIPLE_DOUBLE,
+}
+
+KEYWORDS = frozenset(keyword.kwlist)
+BUILTINS = frozenset(
+    name for name in dir(builtins) if not name.startswith("_") and name not in KEYWORDS
+)
+
+
+def _char_format(color, bold=False, italic=False):
+    fmt = QTextCharFormat()
+    fmt.setForeground(QColor(color))
+    if bold:
+        fmt.setFontWeight(QFont.Bold)
+    if italic:
+        fmt.setFontItalic(True)
+    return fmt
+
+
+class PythonTokenizer:
+    """
+    Single-pass Python tokenizer.  Every line is scanned once by one regular
+    expression; the returned state records a string that is still open at the
+    end of the line so the next line can continue it.
+    """
+
+    def __init__(self):
+        self.formats = {
+            "keyword": _char_format("#ff7b72", bold=True),
+            "comment": _char_format("#7ec699"),
+            "string": _char_format("#a5d6ff"),
+            "number": _char_format("#79c0ff"),
+            "decorator": _char_format("#d2a8ff"),
+            "builtin": _char_format("#ffa657"),
+            "self": _char_format("#ffa657", italic=True),
+            "definition": _char_format("#d2a8ff", bold=True),
+            "field": _char_format("#c9d1d9"),
+        }
+
+    def tokenize(self, text, state):
+        """Return ``([(start, length, format), ...], state)`` for one line."""
+        formats = self.formats
+        ranges = []
+        pos = 0
+        if state > NORMAL:
+            # Continue a string left open by the previous line
+            pos, state = self.scan_string(text, 0, 0, state, ranges)
+        else:
+            state = NORMAL
+            decorator = _DECORATOR_RE.match(text)
+            if decorator:
+                ranges.append((decorator.start(1), len(decorator.group(1)), formats["decorator"]))
+                pos = decorator.end()
+
+        expect_definition = False
+        length = len(text)
+        while state == NORMAL and pos < length:
+            match = _TOKEN_RE.search(text, pos)
+            if match is None:
+                break
+            kind = match.lastgroup
+            start, pos = match.span()
+            if kind == "name":
+                word = match.group()
+                if expect_definition:
+                    ranges.append((start, pos - start, formats["definition"]))
+                    expect_definition = False
+                elif word in KEYWORDS:
+                    ranges.append((start, pos - start, formats["keyword"]))
+                    expect_definition = word == "def" or word == "class"
+                elif word in BUILTINS:
+                    ranges.append((start, pos - start, formats["builtin"]))
+                elif word == "self" or word == "cls":
+                    ranges.append((start, pos - start, formats["self"]))
+            elif kind == "string":
+                token = match.group()
+                quote = token.lstrip("rRbBuUfF")
+                state = _STRING_OPEN_KIND[quote]
+                if "f" in token[:len(token) - len(quote)].lower():
+                    state |= FSTRING
+                pos, state = self.scan_string(text, start, pos, state, ranges)
+            else:
+                ranges.append((start, pos - start, formats[kind]))
+
+        return ranges, state
+
+    def scan_string(self, text, start, body_start, state, ranges):
+        """
+        Format the string literal starting at ``start`` whose body starts at
+        ``body_start``.  Returns the position after the literal and the state
+        to continue with, which stays non-NORMAL if the string runs past the
+        end of the line.
+        """
+        kind = state & STRING_KIND
+        match = _STRING_END_RE[kind].match(text, body_start)
+        if match:
+            end = match.end()
+            body_end = end - (3 if kind >= TRIPLE_SINGLE else 1)
+            next_state = NORMAL
+        else:
+            end = body_end = len(text)
+            # Single-quoted strings only continue after a line-ending backslash
+            trailing = end - len(text.rstrip("\\"))
+            next_state = state if kind >= TRIPLE_SINGLE or trailing % 2 else NORMAL
+
+        if end > start:
+            ranges.append((start, end - start, self.formats["string"]))
+        if state & FSTRING:
+            field_format = self.formats["field"]
+            for field in _FIELD_RE.finditer(text, body_start, body_end):
+                if field.group() not in ("{{", "}}"):
+                    ranges.append((field.start(), field.end() - field.start(), field_format))
+        return end, next_state
+
 
 class PythonSyntaxHighlighter(QSyntaxHighlighter):
-    def __init__(self, document):
+    """
+    Highlights a whole document with PythonTokenizer.  Because open strings
+    are carried in the block state, after an edit Qt only rehighlights the
+    following blocks until their state stops changing.
+    """
+
+    def __init__(self, document, tokenizer=None):
         super().__init__(document)
+        self.tokenizer = tokenizer or PythonTokenizer()
 
-        self.highlight_rules = []
+    @perf.timed("editor.highlightBlock")
+    def highlightBlock(self, text):
+        ranges, state = self.tokenizer.tokenize(text, self.previousBlockState())
+        for start, length, fmt in ranges:
+            self.setFormat(start, length, fmt)
+        self.setCurrentBlockState(state)
 
-        keyword_format = QTextCharFormat()
-        keyword_format.setForeground(QColor("#ff7b72"))
-        keyword_format.setFontWeight(QFont.Bold)
 
-        keywords = [
-            "def", "class", "if", "elif", "else", "for", "while", "return",
-            "import", "from", "as", "with", "try", "except", "finally",
-            "raise", "yield", "lambda", "global", "nonlocal"
-        ]
+class ViewportHighlighter(QObject):
+    """
+    Large-file highlighting.  Only blocks inside ``window`` (the viewport plus
+    a margin) are highlighted straight away; the rest of the document is
+    filled in by an idle-time pass in chunks.  Formats are written directly
+    to the block layouts, so no work at all is done per block on load.
 
-        for word in keywords:
-            pattern = QRegExp(r"\b" + word + r"\b")
-            self.highlight_rules.append((pattern, keyword_format))
+    Blocks that have not been highlighted keep the PENDING state.  After an
+    edit, blocks outside the window whose incoming state changed are reset to
+    PENDING instead of cascading to the end of the file, and the idle pass is
+    rewound to revisit them.
+    """
 
-        comment_format = QTextCharFormat()
-        comment_format.setForeground(QColor("#7ec699"))
-        self.highlight_rules.append((QRegExp("#[^\n]*"), comment_format))
+    def __init__(self, document, tokenizer):
+        super().__init__(document)
+        self.document = document
+        self.tokenizer = tokenizer
+        self.enabled = False
+        self.window = (0, -1)
 
-    def highlightBlock(self, text):
-        for pattern, fmt in self.highlight_rules:
-            expression = pattern
-            index = expression.indexIn(text)
-            while index >= 0:
-                length = expression.matchedLength()
-                self.setFormat(index, length, fmt)
-                index = expression.indexIn(text, index + length)
+        # Blocks before idle_block are up to date; blocks up to dirty_until
+        # are rehighlighted by the idle pass even if they are not PENDING.
+        self.idle_block = 0
+        self.dirty_until = -1
+        self.idle_timer = QTimer(self)
+        self.idle_timer.setInterval(0)
+        self.idle_timer.timeout.connect(self.highlight_idle_chunk)
 
+        document.contentsChange.connect(self.on_contents_change)
+
+    def set_enabled(self, enabled):
+        self.enabled = enabled
+        self.idle_block = 0
+        self.dirty_until = -1
+        if enabled:
+            self.idle_timer.start()
+        else:
+            self.idle_timer.stop()
+
+    def set_window(self, first, last):
+        """Highlight whatever is still stale between block ``first`` and ``last``."""
+        self.window = (first, last)
+        if not self.enabled:
+            return
+        block = self.document.findBlockByNumber(first)
+        number = first
+        changed = False
+        while block.isValid() and number <= last:
+            if changed or self.is_stale(block, number):
+                changed = self.highlight_block(block)
+            block = block.next()
+            number += 1
+        if changed:
+            self.invalidate(block)
+
+    def is_stale(self, block, number):
+        return block.userState() == PENDING or self.idle_block <= number <= self.dirty_until
+
+    def highlight_block(self, block):
+        """Tokenize one block into its layout; returns True if its state changed."""
+        previous = block.previous()
+        state = previous.userState() if previous.isValid() else NORMAL
+        ranges, state = self.tokenizer.tokenize(block.text(), state)
+
+        formats = []
+        for start, length, fmt in ranges:
+            format_range = QTextLayout.FormatRange()
+            format_range.start = start
+            format_range.length = length
+            format_range.format = fmt
+            formats.append(format_range)
+        block.layout().setFormats(formats)
+
+        changed = block.userState() != state
+        block.setUserState(state)
+        self.document.markContentsDirty(block.position(), block.length())
+        return changed
+
+    def invalidate(self, block):
+        """Mark ``block`` for the idle pass after its incoming state changed."""
+        if block.isValid() and block.userState() != PENDING:
+            block.setUserState(PENDING)
+        self.rewind(block.blockNumber() if block.isValid() else self.idle_block)
+
+    def rewind(self, number):
+        self.idle_block = min(self.idle_block, max(0, number))
+        if not self.idle_timer.isActive():
+            self.idle_timer.start()
+
+    def highlight_idle_chunk(self):
+        """Bring the next IDLE_CHUNK_BLOCKS blocks up to date."""
+        number = self.idle_block
+        end = number + IDLE_CHUNK_BLOCKS
+        block = self.document.findBlockByNumber(number)
+        changed = False
+        while block.isValid() and number < end:
+            if changed or self.is_stale(block, number):
+                changed = self.highlight_block(block)
+            block = block.next()
+            number += 1
+        # A state change at the chunk edge carries over into the next chunk
+        if changed and block.isValid():
+            block.setUserState(PENDING)
+        self.idle_block = number
+        if not block.isValid():
+            self.dirty_until = -1
+            self.idle_timer.stop()
+
+    def on_contents_change(self, position, removed, added):
+        if not self.enabled:
+            return
+        first = self.document.findBlock(position)
+        last = self.document.findBlock(position + added)
+        first_number = max(0, first.blockNumber())
+        last_number = last.blockNumber() if last.isValid() else self.document.blockCount() - 1
+        self.dirty_until = max(self.dirty_until, last_number)
+        self.rewind(first_number)
+
+        # Only the part of the edit inside the window is highlighted now
+        window_first, window_last = self.window
+        number = max(first_number, window_first)
+        if number > min(last_number, window_last):
+            return
+        block = self.document.findBlockByNumber(number)
+        changed = False
+        while block.isValid() and (number <= last_number or changed):
+            if number > window_last:
+                self.invalidate(block)
+                return
+            changed = self.highlight_block(block)
+            block = block.next()
+            number += 1
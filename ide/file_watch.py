@@ -0,0 +1,209 @@
+import os
+from concurrent.futures import CancelledError
+
+from PyQt5.QtCore import QObject, QThread, QTimer, QFileSystemWatcher, pyqtSignal
+from ide.find_replace import line_edits
+from ide.loader import read_text
+from ide.workers import process_pool
+
+MAX_WATCHED_FILES = 256  # Open files watched directly, most recently used first; the rest are checked on focus
+FILE_CHANGE_DELAY_MS = 200  # Coalesce bursts of change notifications, e.g. a branch switch
+MAX_RELOADS_IN_FLIGHT = 4  # Files read and diffed at once; the rest wait
+MAX_RELOAD_IN_PLACE_BYTES = 16 << 20  # Bigger files are loaded again from scratch
+
+
+def file_stamp(path):
+    """What tells a changed file apart: modification time and size, or None if it is gone."""
+    try:
+        status = os.stat(path)
+    except OSError:
+        return None
+    return status.st_mtime_ns, status.st_size
+
+
+class ReloadThread(QThread):
+    """
+    Reads a changed file and diffs it against a snapshot of its document's
+    text.  The diff runs on the process pool, so it does not compete with
+    the GUI thread for the GIL.
+    """
+
+    reloaded = pyqtSignal(object, str, str)  # [(start, end, new_text)], encoding, line ending
+    failed = pyqtSignal(str)
+
+    def __init__(self, file_path, old_text, parent=None):
+        super().__init__(parent)
+        self.file_path = file_path
+        self.old_text = old_text
+
+    def run(self):
+        try:
+            text, encoding, newline = read_text(self.file_path)
+            edits = process_pool().submit(line_edits, self.old_text, text).result()
+        except (OSError, LookupError) as e:
+            self.failed.emit(str(e))
+            return
+        except (RuntimeError, CancelledError):  # The pool is shutting down
+            self.failed.emit("cancelled")
+            return
+        self.reloaded.emit(edits, encoding, newline)
+
+
+class FileWatcher(QObject):
+    """
+    Notices when the files of open SharedDocuments change on disk.  The
+    most recently used MAX_WATCHED_FILES files are watched with a
+    QFileSystemWatcher, which bounds the watch descriptors however many
+    files are open; the others are compared with their last known stamp by
+    check_all(), e.g. when the window is activated.  Notifications are
+    coalesced, so a burst of them is handled as one batch.
+
+    An unmodified document is reloaded in place (SharedDocument.apply_reload)
+    from a ReloadThread, a few at a time, visible documents first; a
+    document with unsaved changes is left alone and reported as
+    ``conflicted``.
+    """
+
+    reloaded = pyqtSignal(object)  # SharedDocument
+    conflicted = pyqtSignal(object)  # SharedDocument modified here and on disk
+    removed = pyqtSignal(object)  # SharedDocument whose file is gone
+    written = pyqtSignal(object)  # SharedDocument whose file was saved from here
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.stamps = {}  # SharedDocument -> file_stamp() when last read or saved
+        self.paths = {}  # Watched path -> SharedDocument
+        self.pending = set()  # SharedDocuments to check when the timer fires
+        self.waiting = []  # SharedDocuments to reload once a thread is free
+        self.reloads = {}  # SharedDocument -> (running ReloadThread, text revision it diffs against)
+
+        self.watcher = QFileSystemWatcher(self)
+        self.watcher.fileChanged.connect(self.on_file_changed)
+        self.check_timer = QTimer(self)
+        self.check_timer.setSingleShot(True)
+        self.check_timer.setInterval(FILE_CHANGE_DELAY_MS)
+        self.check_timer.timeout.connect(self.check_pending)
+
+    def watch(self, document):
+        if document in self.stamps:
+            return
+        self.stamps[document] = None
+        if not document.is_loading():
+            self.update_stamp(document)
+        document.load_finished.connect(lambda: self.update_stamp(document))
+        document.saved.connect(lambda: self.on_saved(document))
+        document.destroyed.connect(lambda *args: self.forget(document))
+        self.update_watches()
+
+    def forget(self, document):
+        if document not in self.stamps:
+            return
+        del self.stamps[document]
+        self.pending.discard(document)
+        if document in self.waiting:
+            self.waiting.remove(document)
+        reload = self.reloads.pop(document, None)
+        if reload is not None:
+            reload[0].wait()
+        self.update_watches()
+
+    def update_stamp(self, document):
+        if document in self.stamps:
+            self.stamps[document] = file_stamp(document.file_path)
+
+    def on_saved(self, document):
+        self.update_stamp(document)
+        self.written.emit(document)
+
+    def update_watches(self):
+        """Watch the most recently used files, up to MAX_WATCHED_FILES, and re-add dropped watches."""
+        recent = sorted(self.stamps, key=lambda document: document.last_used, reverse=True)
+        self.paths = {document.file_path: document for document in recent[:MAX_WATCHED_FILES]}
+        # A file replaced by a rename (as git and most editors save) loses its watch
+        watched = set(self.watcher.files())
+        wanted = {path for path in self.paths if os.path.exists(path)}
+        if watched - wanted:
+            self.watcher.removePaths(list(watched - wanted))
+        if wanted - watched:
+            self.watcher.addPaths(list(wanted - watched))
+
+    def on_file_changed(self, path):
+        document = self.paths.get(path)
+        if document is not None:
+            self.pending.add(document)
+            self.check_timer.start()
+
+    def check_all(self):
+        """Compare every open file with its stamp, watched or not."""
+        self.pending.update(self.stamps)
+        self.check_pending()
+
+    def check_pending(self):
+        self.check_timer.stop()
+        pending, self.pending = self.pending, set()
+        for document in pending:
+            self.check(document)
+        self.update_watches()
+        self.start_reloads()
+
+    def check(self, document):
+        if document not in self.stamps or document.is_loading() or document in self.reloads:
+            return
+        stamp = file_stamp(document.file_path)
+        if stamp == self.stamps[document]:
+            return
+        self.stamps[document] = stamp
+        if stamp is None:
+            self.removed.emit(document)
+        elif document.is_modified():
+            self.conflicted.emit(document)
+        elif document not in self.waiting:
+            self.waiting.append(document)
+
+    def start_reloads(self):
+        while self.waiting and len(self.reloads) < MAX_RELOADS_IN_FLIGHT:
+            document = next((document for document in self.waiting if document.is_visible()), self.waiting[0])
+            self.waiting.remove(document)
+            if document.is_modified():
+                self.conflicted.emit(document)
+                continue
+            if (self.stamps[document] or (0, 0))[1] > MAX_RELOAD_IN_PLACE_BYTES:
+                document.reload()
+                self.reloaded.emit(document)
+                continue
+            thread = ReloadThread(document.file_path, document.text_document.toPlainText(), self)
+            thread.reloaded.connect(lambda edits, encoding, newline, d=document: self.on_reloaded(
+                d, edits, encoding, newline))
+            thread.failed.connect(lambda message, d=document: self.on_reload_failed(d))
+            thread.finished.connect(thread.deleteLater)
+            self.reloads[document] = (thread, document.text_document.revision())
+            thread.start()
+
+    def on_reloaded(self, document, edits, encoding, newline):
+        reload = self.reloads.pop(document, None)
+        if reload is None:
+            return
+        thread, revision = reload
+        thread.wait()
+        if document.is_modified() or document.text_document.revision() != revision:
+            # Edited while the file was read; the edits no longer fit the text
+            self.conflicted.emit(document)
+        else:
+            document.apply_reload(edits, encoding, newline)
+            self.reloaded.emit(document)
+            self.check(document)  # Changes made while the file was read were not checked
+        self.start_reloads()
+
+    def on_reload_failed(self, document):
+        if self.reloads.pop(document, None) is not None:
+            self.stamps[document] = None  # Try again on the next change or check_all()
+        self.start_reloads()
+
+    def stop(self):
+        self.check_timer.stop()
+        self.waiting.clear()
+        for thread, _ in self.reloads.values():
+            thread.wait()
+        self.reloads.clear()
+        if self.watcher.files():
+            self.watcher.removePaths(self.watcher.files())
@@ -0,0 +1,187 @@
+"""
+Find and replace inside one document, and the line diff that reloads it
+from disk (line_edits).  Matches and edits are
+``(start, end, text)`` tuples in document positions, which count UTF-16
+code units like QTextDocument does, so a character outside the BMP takes
+two.  Nothing here imports Qt, so the scan can run on any thread and the
+diff in a worker process.
+"""
+import difflib
+import re
+from bisect import bisect_left, bisect_right
+
+MAX_MATCHES = 1000000  # A scan stops after this many matches
+STOP_CHECK_MATCHES = 4096  # Matches between cancellation checks
+MAX_DIFF_LINES = 20000  # Changed regions longer than this are replaced whole by line_edits
+
+_ASTRAL_RE = re.compile("[\U00010000-\U0010ffff]")
+
+
+def compile_pattern(query, regex=False, case_sensitive=False, whole_word=False):
+    """Compile ``query`` for find_matches.  Raises re.error for an invalid regex."""
+    source = query if regex else re.escape(query)
+    if whole_word:
+        source = rf"\b(?:{source})\b"
+    flags = re.MULTILINE if case_sensitive else re.MULTILINE | re.IGNORECASE
+    return re.compile(source, flags)
+
+
+def utf16_len(text):
+    if text.isascii():
+        return len(text)
+    return len(text.encode("utf-16-le")) // 2
+
+
+class Utf16Offsets:
+    """Converts between indices into a str and document positions in it."""
+
+    def __init__(self, text):
+        # Characters outside the BMP are the only ones that differ
+        self.astral = [match.start() for match in _ASTRAL_RE.finditer(text)] if not text.isascii() else []
+        self.astral_positions = [index + i for i, index in enumerate(self.astral)]
+
+    def position(self, index):
+        if not self.astral:
+            return index
+        return index + bisect_left(self.astral, index)
+
+    def index(self, position):
+        if not self.astral:
+            return position
+        return position - bisect_left(self.astral_positions, position)
+
+
+def find_matches(text, pattern, replacement=None, regex=False, stop=None, max_matches=MAX_MATCHES):
+    """
+    Return ``[(start, end, new_text)]`` for every non-empty match of
+    ``pattern`` in ``text``; new_text is None without a ``replacement``, and
+    expands group references when ``regex`` is set.  Returns None if
+    ``stop()`` became true.
+    """
+    offsets = Utf16Offsets(text)
+    matches = []
+    for match in pattern.finditer(text):
+        start, end = match.span()
+        if start == end:
+            continue
+        if replacement is None:
+            new_text = None
+        else:
+            new_text = match.expand(replacement) if regex else replacement
+        matches.append((offsets.position(start), offsets.position(end), new_text))
+        if len(matches) % STOP_CHECK_MATCHES == 0 and stop is not None and stop():
+            return None
+        if len(matches) >= max_matches:
+            break
+    return matches
+
+
+def splice(text, edits, offset=0):
+    """Return ``text`` with ``edits`` applied; ``offset`` is the document position of text[0]."""
+    offsets = Utf16Offsets(text)
+    pieces = []
+    index = 0
+    if offsets.astral:
+        for start, end, new_text in edits:
+            pieces.append(text[index:offsets.index(start - offset)])
+            pieces.append(new_text)
+            index = offsets.index(end - offset)
+    else:
+        for start, end, new_text in edits:
+            pieces.append(text[index:start - offset])
+            pieces.append(new_text)
+            index = end - offset
+    pieces.append(text[index:])
+    return "".join(pieces)
+
+
+def normalize_edits(edits):
+    """Sort ``edits`` by position and drop any that overlap or repeat an earlier one."""
+    result = []
+    last_start = last_end = -1
+    for edit in sorted(edits):
+        start, end = edit[0], edit[1]
+        if start < last_end or (start == last_start and end == last_end):
+            continue
+        result.append(edit)
+        last_start, last_end = start, end
+    return result
+
+
+def edited_ranges(edits):
+    """Where the new text of each of the sorted ``edits`` ends up once all are applied."""
+    ranges = []
+    delta = 0
+    for start, end, new_text in edits:
+        length = utf16_len(new_text)
+        ranges.append((start + delta, start + delta + length))
+        delta += length - (end - start)
+    return ranges
+
+
+def shift_positions(positions, edits):
+    """
+    Where each of ``positions`` ends up after the sorted ``edits``; a
+    position inside an edited range moves past its new text.
+    """
+    order = sorted(range(len(positions)), key=positions.__getitem__)
+    shifted = list(positions)
+    delta = 0
+    edit_iter = iter(edits)
+    edit = next(edit_iter, None)
+    for i in order:
+        position = positions[i]
+        while edit is not None and edit[0] < position:
+            start, end, new_text = edit
+            length = utf16_len(new_text)
+            if end > position:
+                shifted[i] = start + delta + length
+                break
+            delta += length - (end - start)
+            edit = next(edit_iter, None)
+        else:
+            shifted[i] = position + delta
+    return shifted
+
+
+def matches_between(matches, starts, first, last):
+    """The ``matches`` overlapping positions ``first``..``last``; ``starts`` are their start positions."""
+    return matches[max(0, bisect_left(starts, first) - 1):bisect_right(starts, last)]
+
+
+def _lines(text):
+    lines = text.split("\n")
+    return [line + "\n" for line in lines[:-1]] + [lines[-1]]
+
+
+def line_edits(old_text, new_text):
+    """
+    Return the edits that turn ``old_text`` into ``new_text``, replacing
+    whole lines, and only those that differ.
+    """
+    old_lines = _lines(old_text)
+    new_lines = _lines(new_text)
+    # The common ends are skipped first, so a small change in a big file is cheap to find
+    prefix = 0
+    while prefix < min(len(old_lines), len(new_lines)) and old_lines[prefix] == new_lines[prefix]:
+        prefix += 1
+    suffix = 0
+    while (suffix < min(len(old_lines), len(new_lines)) - prefix
+           and old_lines[-1 - suffix] == new_lines[-1 - suffix]):
+        suffix += 1
+    old_middle = old_lines[prefix:len(old_lines) - suffix]
+    new_middle = new_lines[prefix:len(new_lines) - suffix]
+    if not old_middle and not new_middle:
+        return []
+
+    starts = [sum(utf16_len(line) for line in old_lines[:prefix])]
+    for line in old_middle:
+        starts.append(starts[-1] + utf16_len(line))
+    if len(old_middle) + len(new_middle) > MAX_DIFF_LINES:
+        return [(starts[0], starts[-1], "".join(new_middle))]
+    matcher = difflib.SequenceMatcher(None, old_middle, new_middle)
+    return [
+        (starts[i1], starts[i2], "".join(new_middle[j1:j2]))
+        for tag, i1, i2, j1, j2 in matcher.get_opcodes()
+        if tag != "equal"
+    ]
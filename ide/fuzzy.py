@@ -0,0 +1,213 @@
+import bisect
+import re
+import time
+
+RESULT_LIMIT = 50
+VERIFY_LIMIT = 2000  # Up to this many candidates are checked one by one
+STEP_BUDGET = 0.015  # Seconds one FuzzySearch.step may spend
+SCAN_WINDOW = 128 * 1024  # Characters scanned between budget checks
+PREBUILT_CHARS = "abcdefghijklmnopqrstuvwxyz0123456789_-./"
+
+# Tiers, best first: the query is a substring of the file name, a fuzzy
+# (subsequence) match of the file name, or a fuzzy match of the whole path.
+NAME_SUBSTRING, NAME_FUZZY, PATH_FUZZY = range(3)
+
+
+def fuzzy_pattern(query):
+    """
+    Subsequence matcher for one line, used with ``match``.  Each character
+    is found with ``[^\\nC]*C``: taking the first occurrence of every
+    character is always a valid match, and backtracking into the class
+    fails at once, as none of the characters it gives back is a C.
+    """
+    parts = []
+    for char in query:
+        escaped = re.escape(char)
+        parts.append(f"[^\\n{escaped}]*{escaped}")
+    return "".join(parts)
+
+
+class FuzzyMatcher:
+    """
+    Ranks project paths for "Go to File".
+
+    Paths are stored once, pre-sorted by a static prior (short file names,
+    then short paths first), and also joined into two newline-separated
+    strings (file names and full paths) so matching runs inside the regex
+    engine rather than in a Python loop.  Per-character bitsets reject
+    impossible queries at once and find small candidate sets, which are
+    checked path by path.  Everything else is scanned by a FuzzySearch.
+    """
+
+    def __init__(self, paths):
+        self.paths = sorted(paths, key=lambda p: (len(p) - p.rfind("/"), len(p)))
+        self.lower = [p.lower() for p in self.paths]
+        self.names = [p[p.rfind("/") + 1:] for p in self.lower]
+        # Every line is preceded by "\n" so scans only start matches there
+        self.joined_names = "\n" + "\n".join(self.names)
+        self.joined_paths = "\n" + "\n".join(self.lower)
+        self.name_offsets = self.line_offsets(self.names)
+        self.path_offsets = self.line_offsets(self.lower)
+        self.char_bits = {}
+        for char in PREBUILT_CHARS:
+            self.bits_for(char)
+
+    def __len__(self):
+        return len(self.paths)
+
+    @staticmethod
+    def line_offsets(lines):
+        offsets = []
+        pos = 1
+        for line in lines:
+            offsets.append(pos)
+            pos += len(line) + 1
+        return offsets
+
+    def bits_for(self, char):
+        """Bitset of the paths containing ``char`` (bit i is path i)."""
+        bits = self.char_bits.get(char)
+        if bits is None:
+            flags = "".join(["1" if char in p else "0" for p in reversed(self.lower)])
+            bits = self.char_bits[char] = int(flags, 2) if flags else 0
+        return bits
+
+    def search(self, query, limit=RESULT_LIMIT, previous=None):
+        """
+        Start a search for ``query``.  If ``previous`` is a finished search
+        for a prefix of ``query`` that found every match, only its matches
+        are re-checked.
+        """
+        return FuzzySearch(self, query, limit, previous)
+
+    def match(self, query, limit=RESULT_LIMIT):
+        """Run a search to completion and return the matching paths."""
+        search = self.search(query, limit)
+        while not search.step(STEP_BUDGET):
+            pass
+        return search.results()
+
+
+class FuzzySearch:
+    """
+    One query's progress through the tiers.  ``step`` does a bounded slice
+    of work, so a caller can show the results found so far and resume later.
+    Tiers are scanned in prior order, so the first ``limit`` hits are the
+    best ones and the scan stops there.
+    """
+
+    def __init__(self, matcher, query, limit, previous=None):
+        self.matcher = matcher
+        self.query = query = query.lower().replace("\\", "/").strip()
+        self.limit = limit
+        self.found = []
+        self.seen = set()
+        self.done = False
+        self.tier = NAME_SUBSTRING
+        self.pos = 0
+        self.line_match = re.compile(fuzzy_pattern(query))
+        self.scan_match = re.compile("\n" + fuzzy_pattern(query))
+        self.candidates = None
+
+        if not query:
+            self.found = [((0, 0), i) for i in range(min(limit, len(matcher)))]
+            self.done = True
+            return
+        if (previous is not None and previous.complete() and previous.query
+                and query.startswith(previous.query)):
+            self.candidates = sorted(i for _, i in previous.found)
+            return
+
+        bits = -1
+        for char in set(query):
+            bits &= matcher.bits_for(char)
+            if not bits:
+                self.done = True
+                return
+        flags = bin(bits)[:1:-1]  # Least significant bit first
+        if flags.count("1") <= VERIFY_LIMIT:
+            self.candidates = []
+            i = flags.find("1")
+            while i >= 0:
+                self.candidates.append(i)
+                i = flags.find("1", i + 1)
+        elif "/" in query:
+            self.tier = PATH_FUZZY  # File names never contain "/"
+
+    def complete(self):
+        """True if the search finished without being cut off by ``limit``."""
+        return self.done and len(self.found) < self.limit
+
+    def results(self):
+        return [self.matcher.paths[i] for _, i in sorted(self.found)[:self.limit]]
+
+    def step(self, budget=STEP_BUDGET):
+        """Work for at most about ``budget`` seconds; returns True when done."""
+        if self.done:
+            return True
+        if self.candidates is not None:
+            self.verify()
+            self.done = True
+            return True
+
+        deadline = time.perf_counter() + budget
+        matcher = self.matcher
+        while self.tier <= PATH_FUZZY:
+            if self.tier == PATH_FUZZY:
+                text, offsets = matcher.joined_paths, matcher.path_offsets
+            else:
+                text, offsets = matcher.joined_names, matcher.name_offsets
+            if not self.scan(text, offsets, deadline):
+                return False
+            if len(self.found) >= self.limit:
+                break
+            self.tier += 1
+            self.pos = 0
+        self.done = True
+        return True
+
+    def verify(self):
+        """Classify each candidate index directly."""
+        matcher = self.matcher
+        query = self.query
+        for i in self.candidates:
+            name = matcher.names[i]
+            if query in name:
+                self.found.append(((NAME_SUBSTRING, name.find(query)), i))
+            elif self.line_match.match(name):
+                self.found.append(((NAME_FUZZY, 0), i))
+            elif self.line_match.match(matcher.lower[i]):
+                self.found.append(((PATH_FUZZY, 0), i))
+
+    def scan(self, text, offsets, deadline):
+        """
+        Scan ``text`` for the current tier from ``self.pos``.  Returns False
+        if the deadline passed first; ``self.pos`` always points at the "\n"
+        in front of a line, so the scan can resume there.
+        """
+        end = len(text)
+        found = self.found
+        while self.pos < end:
+            if time.perf_counter() > deadline:
+                return False
+            window_end = text.find("\n", min(end, self.pos + SCAN_WINDOW))
+            if window_end < 0:
+                window_end = end
+            pos = self.pos
+            while True:
+                if self.tier == NAME_SUBSTRING:
+                    start = text.find(self.query, pos, window_end)
+                else:
+                    match = self.scan_match.search(text, pos, window_end)
+                    start = match.start() + 1 if match else -1
+                if start < 0:
+                    break
+                index = bisect.bisect_right(offsets, start) - 1
+                if index not in self.seen:
+                    self.seen.add(index)
+                    found.append(((self.tier, start - offsets[index]), index))
+                    if len(found) >= self.limit:
+                        return True
+                pos = offsets[index + 1] - 1 if index + 1 < len(offsets) else end
+            self.pos = window_end
+        return True
@@ -0,0 +1,424 @@
+import gzip
+import hashlib
+import json
+import os
+import re
+
+from PyQt5.QtCore import QObject, QThread, QTimer, QFileSystemWatcher, pyqtSignal
+from ide.fuzzy import FuzzyMatcher
+from ide.paths import user_cache_dir
+
+INDEX_VERSION = 1
+# Never indexed, whatever .gitignore says; "venv" is what create_new_project makes
+SKIPPED_DIRS = {".git", ".hg", ".svn", "venv", ".venv", "__pycache__"}
+MAX_WATCHED_DIRS = 2048  # Directories watched for changes, shallowest first
+REFRESH_DELAY_MS = 300  # Coalesce bursts of directory change notifications
+
+
+def _glob_to_regex(pattern):
+    """Translate one gitignore glob (without leading "/" or trailing "/") to a regex."""
+    out = []
+    i = 0
+    while i < len(pattern):
+        char = pattern[i]
+        if pattern.startswith("**/", i):
+            out.append("(?:.*/)?")
+            i += 3
+            continue
+        if pattern.startswith("/**", i) and i + 3 == len(pattern):
+            out.append("/.*")
+            i += 3
+            continue
+        if char == "*":
+            out.append(".*" if pattern.startswith("**", i) else "[^/]*")
+            i += 2 if pattern.startswith("**", i) else 1
+            continue
+        if char == "?":
+            out.append("[^/]")
+        elif char == "[":
+            close = pattern.find("]", i + 1)
+            if close < 0:
+                out.append(re.escape(char))
+            else:
+                body = pattern[i + 1:close].replace("\\", "\\\\")
+                if body.startswith("!"):
+                    body = "^" + body[1:]
+                out.append(f"[{body}]")
+                i = close
+        elif char == "\\" and i + 1 < len(pattern):
+            i += 1
+            out.append(re.escape(pattern[i]))
+        else:
+            out.append(re.escape(char))
+        i += 1
+    return "".join(out)
+
+
+class GitIgnore:
+    """
+    The .gitignore rules of a project.  Rules are kept per directory and a
+    path is checked against the files of its ancestors, root first, so the
+    last matching rule wins as in git.
+    """
+
+    def __init__(self, root):
+        self.root = root
+        self.rules = {}  # rel_dir -> [(regex, negate, dir_only)]
+
+    def load(self, rel_dir):
+        path = os.path.join(self.root, *rel_dir.split("/"), ".gitignore") if rel_dir \
+            else os.path.join(self.root, ".gitignore")
+        rules = []
+        try:
+            with open(path, encoding="utf-8", errors="replace") as file:
+                lines = file.read().splitlines()
+        except OSError:
+            lines = []
+        for line in lines:
+            line = line.rstrip()
+            if not line or line.startswith("#"):
+                continue
+            negate = line.startswith("!")
+            if negate:
+                line = line[1:]
+            dir_only = line.endswith("/")
+            line = line.rstrip("/")
+            # A pattern with a slash (other than a trailing one) is anchored
+            if "/" in line:
+                regex = _glob_to_regex(line.lstrip("/"))
+            else:
+                regex = "(?:.*/)?" + _glob_to_regex(line)
+            rules.append((re.compile(regex + "$"), negate, dir_only))
+        if rules:
+            self.rules[rel_dir] = rules
+        else:
+            self.rules.pop(rel_dir, None)
+
+    def ignored(self, rel_path, is_dir):
+        if not self.rules:
+            return False
+        parts = rel_path.split("/")
+        result = False
+        for depth in range(len(parts)):
+            base = "/".join(parts[:depth])
+            rules = self.rules.get(base)
+            if not rules:
+                continue
+            relative = "/".join(parts[depth:])
+            for regex, negate, dir_only in rules:
+                if dir_only and not is_dir:
+                    continue
+                if regex.match(relative):
+                    result = not negate
+        return result
+
+
+class ProjectIndex:
+    """
+    Listing of every indexed file of a project, stored per directory as
+    ``rel_dir -> [dir_mtime, {file_name: file_mtime}, [subdir_names]]``.
+
+    Directory mtimes let ``walk`` reuse the listings of directories whose
+    contents did not change, so reopening a project costs one stat per file
+    and no directory reads.  A file rewritten in place does not touch its
+    directory's mtime, so the file mtimes of such directories are checked
+    again.  Entries are replaced, never mutated, so a copy of ``dirs`` can
+    be refreshed on a worker while the old one is still being read.
+    """
+
+    def __init__(self, root, dirs=None):
+        self.root = root
+        self.dirs = dirs if dirs is not None else {}
+        self.dirty = False
+
+    def copy(self):
+        return ProjectIndex(self.root, dict(self.dirs))
+
+    def abspath(self, rel_path):
+        return os.path.join(self.root, *rel_path.split("/")) if rel_path else self.root
+
+    def files(self):
+        """Yield the relative path of every indexed file."""
+        for rel_dir, (_, files, _) in self.dirs.items():
+            prefix = rel_dir + "/" if rel_dir else ""
+            for name in files:
+                yield prefix + name
+
+    def file_count(self):
+        return sum(len(entry[1]) for entry in self.dirs.values())
+
+    #
+    # SCANNING
+    #
+    def scan_dir(self, rel_dir, gitignore):
+        files = {}
+        subdirs = []
+        abs_dir = self.abspath(rel_dir)
+        prefix = rel_dir + "/" if rel_dir else ""
+        with os.scandir(abs_dir) as entries:
+            for entry in entries:
+                try:
+                    if entry.is_dir(follow_symlinks=False):
+                        if entry.name not in SKIPPED_DIRS and not gitignore.ignored(prefix + entry.name, True):
+                            subdirs.append(entry.name)
+                    elif entry.is_file() and not gitignore.ignored(prefix + entry.name, False):
+                        files[entry.name] = entry.stat().st_mtime
+                except OSError:
+                    continue
+        self.dirty = True
+        return [os.stat(abs_dir).st_mtime, files, subdirs]
+
+    def restat_files(self, rel_dir, entry):
+        """
+        ``entry`` with the current mtimes of its files, or None if one of
+        them is gone and the directory has to be rescanned.
+        """
+        abs_dir = self.abspath(rel_dir)
+        files = entry[1]
+        changed = {}
+        for name, mtime in files.items():
+            try:
+                current = os.stat(os.path.join(abs_dir, name)).st_mtime
+            except OSError:
+                return None
+            if current != mtime:
+                changed[name] = current
+        if not changed:
+            return entry
+        self.dirty = True
+        return [entry[0], {**files, **changed}, entry[2]]
+
+    def drop(self, rel_dir):
+        """Forget ``rel_dir`` and everything below it."""
+        prefix = rel_dir + "/"
+        for key in [k for k in self.dirs if k == rel_dir or k.startswith(prefix)]:
+            del self.dirs[key]
+        self.dirty = True
+
+    def load_ignores_above(self, rel_dir, gitignore):
+        """Load the .gitignore files of ``rel_dir``'s ancestors."""
+        parts = rel_dir.split("/") if rel_dir else []
+        for depth in range(len(parts)):
+            base = "/".join(parts[:depth])
+            entry = self.dirs.get(base)
+            if entry and ".gitignore" in entry[1]:
+                gitignore.load(base)
+
+    def walk(self, start, gitignore, force=False, stop=None):
+        """
+        Bring the subtree at ``start`` up to date.  Directories whose mtime
+        (and .gitignore) did not change keep their listing and only have
+        their file mtimes refreshed; a changed .gitignore forces its whole
+        subtree to be rescanned.  Returns False if ``stop()`` asked to abort.
+        """
+        stack = [(start, force)]
+        while stack:
+            if stop is not None and stop():
+                return False
+            rel_dir, force = stack.pop()
+            abs_dir = self.abspath(rel_dir)
+            try:
+                mtime = os.stat(abs_dir).st_mtime
+            except OSError:
+                self.drop(rel_dir)
+                continue
+
+            entry = self.dirs.get(rel_dir)
+            ignore_path = os.path.join(abs_dir, ".gitignore")
+            ignore_mtime = os.path.getmtime(ignore_path) if os.path.isfile(ignore_path) else None
+            if entry is not None and ignore_mtime != entry[1].get(".gitignore"):
+                force = True
+            if ignore_mtime is not None:
+                gitignore.load(rel_dir)
+
+            rescan = entry is None or force or entry[0] != mtime
+            if not rescan:
+                # A file rewritten in place leaves its directory's mtime alone
+                restated = self.restat_files(rel_dir, entry)
+                rescan = restated is None
+                if not rescan:
+                    self.dirs[rel_dir] = entry = restated
+            if rescan:
+                old_subdirs = set(entry[2]) if entry else set()
+                try:
+                    entry = self.scan_dir(rel_dir, gitignore)
+                except OSError:
+                    self.drop(rel_dir)
+                    continue
+                self.dirs[rel_dir] = entry
+                prefix = rel_dir + "/" if rel_dir else ""
+                for gone in old_subdirs - set(entry[2]):
+                    self.drop(prefix + gone)
+
+            prefix = rel_dir + "/" if rel_dir else ""
+            for name in entry[2]:
+                stack.append((prefix + name, force))
+        return True
+
+    def refresh_dir(self, rel_dir, gitignore):
+        """Rescan one changed directory; only new subdirectories are walked."""
+        self.load_ignores_above(rel_dir, gitignore)
+        old = self.dirs.get(rel_dir)
+        if old is None:
+            self.walk(rel_dir, gitignore, force=True)
+            return
+        old_subdirs = set(old[2])
+        try:
+            if os.path.isfile(os.path.join(self.abspath(rel_dir), ".gitignore")):
+                gitignore.load(rel_dir)
+            entry = self.scan_dir(rel_dir, gitignore)
+        except OSError:
+            self.drop(rel_dir)
+            return
+        self.dirs[rel_dir] = entry
+        prefix = rel_dir + "/" if rel_dir else ""
+        for gone in old_subdirs - set(entry[2]):
+            self.drop(prefix + gone)
+        for name in set(entry[2]) - old_subdirs:
+            self.walk(prefix + name, gitignore, force=True)
+
+    #
+    # PERSISTENCE
+    #
+    @staticmethod
+    def cache_path(root):
+        digest = hashlib.sha1(os.path.abspath(root).encode("utf-8")).hexdigest()
+        return os.path.join(user_cache_dir("index"), digest + ".json.gz")
+
+    @classmethod
+    def load(cls, root):
+        """Return the persisted index of ``root``, or an empty one."""
+        try:
+            with gzip.open(cls.cache_path(root), "rt", encoding="utf-8") as file:
+                data = json.load(file)
+            if data.get("version") == INDEX_VERSION and data.get("root") == root:
+                return cls(root, data["dirs"])
+        except (OSError, ValueError, KeyError):
+            pass
+        return cls(root)
+
+    def save(self):
+        """Write the index atomically to the per-user cache."""
+        path = self.cache_path(self.root)
+        temp_path = path + ".tmp"
+        data = {"version": INDEX_VERSION, "root": self.root, "dirs": self.dirs}
+        with gzip.open(temp_path, "wt", encoding="utf-8", compresslevel=1) as file:
+            json.dump(data, file, separators=(",", ":"))
+        os.replace(temp_path, path)
+        self.dirty = False
+
+
+class IndexerThread(QThread):
+    """
+    Rescans ``changed_dirs`` of a copy of a ProjectIndex off the GUI thread
+    and builds the fuzzy matcher for it.
+    """
+
+    indexed = pyqtSignal(object, object)  # ProjectIndex, FuzzyMatcher
+
+    def __init__(self, index, changed_dirs, parent=None):
+        super().__init__(parent)
+        self.index = index
+        self.changed_dirs = changed_dirs
+
+    def run(self):
+        index = self.index.copy()
+        gitignore = GitIgnore(index.root)
+        for rel_dir in sorted(self.changed_dirs):
+            if self.isInterruptionRequested():
+                return
+            index.refresh_dir(rel_dir, gitignore)
+
+        if index.dirty:
+            try:
+                index.save()
+            except OSError:
+                pass  # The cache is only an optimization
+        if not self.isInterruptionRequested():
+            self.indexed.emit(index, FuzzyMatcher(list(index.files())))
+
+
+class ProjectIndexer(QObject):
+    """
+    Keeps the file index of one project current.  The first index comes
+    from the project loader (see set_index); afterwards a bounded
+    QFileSystemWatcher reports changed directories, and on_file_written the
+    directories of files rewritten in place, which are rescanned in
+    coalesced batches.
+    """
+
+    updated = pyqtSignal()
+
+    def __init__(self, root, parent=None):
+        super().__init__(parent)
+        self.root = os.path.abspath(root)
+        self.index = None
+        self.matcher = None
+        self.thread = None
+        self.pending_dirs = set()
+
+        self.watcher = QFileSystemWatcher(self)
+        self.watcher.directoryChanged.connect(self.on_directory_changed)
+        self.refresh_timer = QTimer(self)
+        self.refresh_timer.setSingleShot(True)
+        self.refresh_timer.setInterval(REFRESH_DELAY_MS)
+        self.refresh_timer.timeout.connect(self.start_refresh)
+
+    def is_ready(self):
+        return self.matcher is not None
+
+    def run_indexer(self, changed_dirs):
+        self.thread = IndexerThread(self.index, changed_dirs, self)
+        self.thread.indexed.connect(self.set_index)
+        self.thread.finished.connect(self.on_thread_finished)
+        self.thread.start()
+
+    def set_index(self, index, matcher):
+        """Install an index built elsewhere, e.g. by the project loader."""
+        self.index = index
+        self.matcher = matcher
+        self.update_watches()
+        self.updated.emit()
+
+    def on_thread_finished(self):
+        self.thread.deleteLater()
+        self.thread = None
+        if self.pending_dirs:
+            self.refresh_timer.start()
+
+    def on_directory_changed(self, path):
+        rel_dir = os.path.relpath(path, self.root).replace(os.sep, "/")
+        self.pending_dirs.add("" if rel_dir == "." else rel_dir)
+        self.refresh_timer.start()
+
+    def on_file_written(self, path):
+        """Rescan the directory of ``path``, a file saved or reloaded in place, which no watch reports."""
+        rel_dir = os.path.relpath(os.path.dirname(os.path.abspath(path)), self.root).replace(os.sep, "/")
+        if rel_dir == ".." or rel_dir.startswith("../"):
+            return
+        self.pending_dirs.add("" if rel_dir == "." else rel_dir)
+        self.refresh_timer.start()
+
+    def start_refresh(self):
+        if self.thread is not None or self.index is None:
+            return  # Picked up again when the running scan finishes
+        changed, self.pending_dirs = self.pending_dirs, set()
+        self.run_indexer(changed)
+
+    def update_watches(self):
+        wanted = sorted(self.index.dirs, key=lambda d: (d.count("/"), d))[:MAX_WATCHED_DIRS]
+        wanted = {self.index.abspath(d) for d in wanted}
+        watched = set(self.watcher.directories())
+        if watched - wanted:
+            self.watcher.removePaths(list(watched - wanted))
+        if wanted - watched:
+            self.watcher.addPaths(list(wanted - watched))
+
+    def stop(self):
+        """Abort a running scan and release the watches."""
+        self.refresh_timer.stop()
+        if self.thread is not None:
+            self.thread.requestInterruption()
+            self.thread.wait()
+        if self.watcher.directories():
+            self.watcher.removePaths(self.watcher.directories())
@@ -0,0 +1,61 @@
+"""
+Static checks of Python source for the diagnostics service: syntax errors
+and compiler warnings from compile(), plus pyflakes' checks when pyflakes
+is installed.  Nothing here imports Qt, so the functions can run in worker
+processes started with "spawn".
+"""
+import ast
+import warnings
+from collections import namedtuple
+
+ERROR, WARNING = "error", "warning"
+MAX_DIAGNOSTICS = 500  # Diagnostics reported per file, first lines first
+
+# ``line`` is 1-based and ``column`` 0-based; ``end_column`` is None when
+# only the start is known (the word there is marked).
+Diagnostic = namedtuple("Diagnostic", "line column end_column severity message")
+
+
+def _pyflakes_checker():
+    try:
+        from pyflakes import checker
+    except ImportError:
+        return None
+    return checker
+
+
+def _syntax_error(error):
+    line = error.lineno or 1
+    column = max(0, (error.offset or 1) - 1)
+    end_column = None
+    if getattr(error, "end_lineno", None) == line and (error.end_offset or 0) - 1 > column:
+        end_column = error.end_offset - 1
+    return Diagnostic(line, column, end_column, ERROR, error.msg)
+
+
+def check_source(source, filename="<buffer>"):
+    """Return the [Diagnostic] of ``source``, sorted by position."""
+    with warnings.catch_warnings(record=True) as caught:
+        warnings.simplefilter("always")
+        try:
+            tree = ast.parse(source, filename)
+            # Some errors ("return" outside a function, ...) only show up in code generation
+            compile(tree, filename, "exec", dont_inherit=True)
+        except SyntaxError as e:
+            return [_syntax_error(e)]
+        except ValueError as e:  # Null bytes in the source
+            return [Diagnostic(1, 0, None, ERROR, str(e))]
+
+    diagnostics = [
+        Diagnostic(warning.lineno or 1, 0, None, WARNING, str(warning.message))
+        for warning in caught
+        if issubclass(warning.category, (SyntaxWarning, DeprecationWarning)) and warning.filename == filename
+    ]
+    checker = _pyflakes_checker()
+    if checker is not None:
+        for message in checker.Checker(tree, filename=filename).messages:
+            diagnostics.append(Diagnostic(
+                message.lineno, message.col or 0, None, WARNING, message.message % message.message_args
+            ))
+    diagnostics.sort(key=lambda diagnostic: (diagnostic.line, diagnostic.column))
+    return diagnostics[:MAX_DIAGNOSTICS]
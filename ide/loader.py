@@ -0,0 +1,167 @@
+import codecs
+import locale
+import mmap
+import os
+
+from PyQt5.QtCore import QThread, QSemaphore, pyqtSignal
+
+CHUNK_BYTES = 1 << 20  # Bytes decoded and handed to the editor per batch
+SNIFF_BYTES = 64 * 1024  # Bytes inspected to guess the encoding and line endings
+MAX_PENDING_CHUNKS = 4  # Decoded chunks allowed in flight before the reader waits
+
+_BOMS = (
+    (codecs.BOM_UTF32_LE, "utf-32"),
+    (codecs.BOM_UTF32_BE, "utf-32"),
+    (codecs.BOM_UTF8, "utf-8-sig"),
+    (codecs.BOM_UTF16_LE, "utf-16"),
+    (codecs.BOM_UTF16_BE, "utf-16"),
+)
+
+
+def detect_encoding(sample):
+    """Guess the encoding of a file from its first bytes."""
+    for bom, encoding in _BOMS:
+        if sample.startswith(bom):
+            return encoding
+    try:
+        codecs.getincrementaldecoder("utf-8")().decode(sample, final=False)
+        return "utf-8"
+    except UnicodeDecodeError:
+        return fallback_encoding()
+
+
+def fallback_encoding():
+    """The encoding of files that are not UTF-8: the locale's, or latin-1 where that is UTF-8."""
+    fallback = locale.getpreferredencoding(False)
+    if codecs.lookup(fallback).name == "utf-8":
+        fallback = "latin-1"
+    return fallback
+
+
+def candidate_encodings(sample):
+    """
+    Encodings to decode a file with, in order, each tried if the one
+    before fails past ``sample``: the guess, the fallback, then latin-1,
+    which decodes any bytes, so a file never loads with characters
+    replaced that saving would write back.
+    """
+    encodings = []
+    for encoding in (detect_encoding(sample), fallback_encoding(), "latin-1"):
+        if all(codecs.lookup(encoding).name != codecs.lookup(seen).name for seen in encodings):
+            encodings.append(encoding)
+    return encodings
+
+
+def detect_newline(sample):
+    """Return the line ending used in ``sample``: "\r\n", "\r" or "\n"."""
+    if b"\r\n" in sample:
+        return "\r\n"
+    if b"\r" in sample:
+        return "\r"
+    return "\n"
+
+
+def read_text(file_path):
+    """
+    Read a whole file at once, for callers that need all of it (a reload
+    diffs against it): ``(text, encoding, newline)``, line endings
+    normalized to "\n" as FileLoaderThread does.
+    """
+    with open(file_path, "rb") as file:
+        data = file.read()
+    sample = data[:SNIFF_BYTES]
+    for encoding in candidate_encodings(sample):
+        try:
+            text = data.decode(encoding)
+            break
+        except UnicodeDecodeError:
+            continue
+    if "\r" in text:
+        text = text.replace("\r\n", "\n").replace("\r", "\n")
+    return text, encoding, detect_newline(sample)
+
+
+class FileLoaderThread(QThread):
+    """
+    Reads a file through mmap off the GUI thread and streams decoded text in
+    batches.  Line endings are normalized to "\n"; the detected encoding and
+    line ending are reported once the whole file has been read.  The
+    encoding is guessed from the first bytes only: if decoding fails later
+    on, ``restarted`` asks the receiver to drop what it got, and the file
+    is streamed again with the next candidate_encodings().
+
+    At most MAX_PENDING_CHUNKS batches are in flight: the receiver calls
+    chunk_consumed() after inserting each one, so a fast disk never queues up
+    the whole file in memory.
+    """
+
+    chunk_loaded = pyqtSignal(str)
+    restarted = pyqtSignal()  # The text sent so far is void; it comes again in another encoding
+    progress = pyqtSignal(int)  # Percent of the file read
+    loaded = pyqtSignal(str, str)  # Encoding, line ending
+    failed = pyqtSignal(str)
+
+    def __init__(self, file_path, parent=None):
+        super().__init__(parent)
+        self.file_path = file_path
+        self.credits = QSemaphore(MAX_PENDING_CHUNKS)
+
+    def chunk_consumed(self):
+        self.credits.release()
+
+    def run(self):
+        try:
+            with open(self.file_path, "rb") as file:
+                size = os.fstat(file.fileno()).st_size
+                if size == 0:
+                    self.progress.emit(100)
+                    self.loaded.emit("utf-8", "\n")
+                    return
+                with mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as data:
+                    self.stream(data, size)
+        except (OSError, ValueError, LookupError) as e:
+            self.failed.emit(str(e))
+
+    def stream(self, data, size):
+        sample = data[:SNIFF_BYTES]
+        newline = detect_newline(sample)
+        for encoding in candidate_encodings(sample):
+            try:
+                if self.stream_decoded(data, size, encoding):
+                    self.loaded.emit(encoding, newline)
+                return
+            except UnicodeDecodeError:
+                self.restarted.emit()
+
+    def stream_decoded(self, data, size, encoding):
+        """Stream the whole file decoded with ``encoding``; False if cancelled."""
+        decoder = codecs.getincrementaldecoder(encoding)()
+        pending_cr = False
+        percent = -1
+        for offset in range(0, size, CHUNK_BYTES):
+            if not self.wait_for_credit():
+                return False
+            final = offset + CHUNK_BYTES >= size
+            text = decoder.decode(data[offset:offset + CHUNK_BYTES], final=final)
+            if pending_cr:
+                text = "\r" + text
+            # A "\r\n" may be split across two chunks; hold back a trailing "\r"
+            pending_cr = not final and text.endswith("\r")
+            if pending_cr:
+                text = text[:-1]
+            if "\r" in text:
+                text = text.replace("\r\n", "\n").replace("\r", "\n")
+            self.chunk_loaded.emit(text)
+
+            done = min(100, (offset + CHUNK_BYTES) * 100 // size)
+            if done != percent:
+                percent = done
+                self.progress.emit(percent)
+        return True
+
+    def wait_for_credit(self):
+        """Block until the receiver has room for another chunk, or until cancelled."""
+        while not self.credits.tryAcquire(1, 20):
+            if self.isInterruptionRequested():
+                return False
+        return not self.isInterruptionRequested()
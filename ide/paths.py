@@ -0,0 +1,22 @@
+import os
+
+from PyQt5.QtCore import QStandardPaths
+
+APP_DIR_NAME = "custom-ide"
+
+
+def _user_dir(location, parts):
+    base = QStandardPaths.writableLocation(location) or os.path.expanduser("~")
+    path = os.path.join(base, APP_DIR_NAME, *parts)
+    os.makedirs(path, exist_ok=True)
+    return path
+
+
+def user_cache_dir(*parts):
+    """Per-user directory for data that can be rebuilt, such as project indexes."""
+    return _user_dir(QStandardPaths.GenericCacheLocation, parts)
+
+
+def user_data_dir(*parts):
+    """Per-user directory for state that should be kept, such as sessions."""
+    return _user_dir(QStandardPaths.GenericDataLocation, parts)
@@ -0,0 +1,222 @@
+"""
+Built-in instrumentation: named timers and counters around hot paths, an
+event-loop stall detector, and export to the Chrome trace format (open the
+file in chrome://tracing or https://ui.perfetto.dev).
+
+Recording is off unless enabled (the Performance HUD, or IDE_PERF=1 in
+the environment); while off, an instrumented call costs one global lookup.
+With IDE_PERF_TRACE=<path>, the trace is also written there on exit.
+"""
+import functools
+import json
+import os
+import sys
+import threading
+import time
+import traceback
+from collections import deque
+
+from PyQt5.QtCore import QObject, QTimer
+
+TRACE_EVENTS = 200000  # Newest timed calls kept for the trace
+STALL_THRESHOLD_MS = 100  # The GUI thread not reaching the event loop for this long is a stall
+HEARTBEAT_MS = 20  # Interval of the GUI-thread timer the stall detector watches
+MAX_STALLS = 200  # Newest stalls kept
+
+enabled = os.environ.get("IDE_PERF") == "1"
+trace_path = os.environ.get("IDE_PERF_TRACE")  # Trace written when the IDE exits, if set
+
+_origin = time.perf_counter()
+_stats = {}  # name -> [calls, total seconds, max seconds]
+_counters = {}  # name -> count
+_events = deque(maxlen=TRACE_EVENTS)  # (name, start, duration, thread id)
+_stalls = deque(maxlen=MAX_STALLS)  # Stall records, see StallDetector
+_marks = []  # (name, perf_counter) of the startup stages, see mark
+_lock = threading.Lock()
+
+
+def set_enabled(value):
+    global enabled
+    enabled = bool(value)
+
+
+def record(name, start, duration):
+    """Add one timed call of ``name`` (perf_counter seconds)."""
+    with _lock:
+        stats = _stats.get(name)
+        if stats is None:
+            _stats[name] = [1, duration, duration]
+        else:
+            stats[0] += 1
+            stats[1] += duration
+            if duration > stats[2]:
+                stats[2] = duration
+        _events.append((name, start, duration, threading.get_ident()))
+
+
+def count(name, amount=1):
+    if enabled:
+        with _lock:
+            _counters[name] = _counters.get(name, 0) + amount
+
+
+class span:
+    """``with perf.span("name"):`` times the block while recording is enabled."""
+
+    __slots__ = ("name", "start")
+
+    def __init__(self, name):
+        self.name = name
+        self.start = None
+
+    def __enter__(self):
+        if enabled:
+            self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        if self.start is not None:
+            record(self.name, self.start, time.perf_counter() - self.start)
+
+
+def timed(name):
+    """Decorator timing every call of the function as ``name``."""
+    def decorate(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if not enabled:
+                return func(*args, **kwargs)
+            start = time.perf_counter()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                record(name, start, time.perf_counter() - start)
+        return wrapper
+    return decorate
+
+
+def mark(name):
+    """Note that startup stage ``name`` finished now; recorded even while disabled."""
+    _marks.append((name, time.perf_counter()))
+
+
+def marks():
+    return list(_marks)
+
+
+def stats():
+    """``[(name, calls, total seconds, max seconds)]``, slowest total first."""
+    with _lock:
+        rows = [(name, calls, total, longest) for name, (calls, total, longest) in _stats.items()]
+    return sorted(rows, key=lambda row: row[2], reverse=True)
+
+
+def counters():
+    with _lock:
+        return sorted(_counters.items())
+
+
+def stalls():
+    with _lock:
+        return list(_stalls)
+
+
+def reset():
+    with _lock:
+        _stats.clear()
+        _counters.clear()
+        _events.clear()
+        _stalls.clear()
+
+
+def export_chrome_trace(path):
+    """Write the recorded calls and stalls as Chrome trace JSON."""
+    pid = os.getpid()
+    with _lock:
+        events = list(_events)
+        stall_records = list(_stalls)
+    trace = [
+        {"name": name, "ph": "X", "ts": (start - _origin) * 1e6, "dur": duration * 1e6, "pid": pid, "tid": tid}
+        for name, start, duration, tid in events
+    ]
+    for stall in stall_records:
+        trace.append({
+            "name": "stall", "cat": "stall", "ph": "X", "pid": pid, "tid": stall["thread"],
+            "ts": (stall["start"] - _origin) * 1e6, "dur": stall["duration"] * 1e6,
+            "args": {"stack": "".join(stall["stack"])},
+        })
+    names = {threading.main_thread().ident: "GUI"}
+    names.update((thread.ident, thread.name) for thread in threading.enumerate() if thread.ident not in names)
+    for tid, name in names.items():
+        trace.append({"name": "thread_name", "ph": "M", "pid": pid, "tid": tid, "args": {"name": name}})
+    with open(path, "w", encoding="utf-8") as file:
+        json.dump({"traceEvents": trace, "displayTimeUnit": "ms"}, file)
+
+
+class StallDetector(QObject):
+    """
+    Notices when the GUI thread stops processing events.  A timer on the GUI
+    thread ticks every HEARTBEAT_MS, publishing ``(tick number, time)`` as
+    one tuple; a watchdog thread that sees no new tick for ``threshold_ms``
+    takes the GUI thread's Python stack, and fills in the stall's duration
+    when the ticks resume.  Only the watchdog touches the stall records.
+    """
+
+    def __init__(self, threshold_ms=STALL_THRESHOLD_MS, parent=None):
+        super().__init__(parent)
+        self.threshold = threshold_ms / 1000
+        self.gui_thread = threading.get_ident()
+        self.pulse = (0, time.perf_counter())  # (tick number, perf_counter) of the last tick; replaced, never changed
+        self.running = False
+        self.watchdog = None
+        self.heartbeat = QTimer(self)
+        self.heartbeat.setInterval(HEARTBEAT_MS)
+        self.heartbeat.timeout.connect(self.beat)
+
+    def start(self):
+        if self.running:
+            return
+        self.running = True
+        self.pulse = (self.pulse[0] + 1, time.perf_counter())
+        self.heartbeat.start()
+        self.watchdog = threading.Thread(target=self.watch, name="stall-detector", daemon=True)
+        self.watchdog.start()
+
+    def stop(self):
+        self.running = False
+        self.heartbeat.stop()
+        if self.watchdog is not None:
+            self.watchdog.join()
+            self.watchdog = None
+
+    def beat(self):
+        self.pulse = (self.pulse[0] + 1, time.perf_counter())
+
+    def watch(self):
+        stall = None  # Stall in progress
+        stalled_tick = None  # Tick it started after
+        while self.running:
+            time.sleep(self.threshold / 4)
+            tick, last_beat = self.pulse  # Read once, so the number and time belong together
+            now = time.perf_counter()
+            if stall is not None:
+                with _lock:
+                    if tick != stalled_tick:
+                        # Back; last_beat is at most one watchdog sleep after the first new tick
+                        stall["duration"] = last_beat - stall["start"]
+                        stall = None
+                    else:
+                        stall["duration"] = now - stall["start"]
+                continue
+            if not enabled or now - last_beat < self.threshold:
+                continue
+            frame = sys._current_frames().get(self.gui_thread)
+            stall = {
+                "start": last_beat,
+                "duration": now - last_beat,  # Grows until the GUI thread is back
+                "thread": self.gui_thread,
+                "stack": traceback.format_stack(frame) if frame is not None else [],
+            }
+            stalled_tick = tick
+            with _lock:
+                _stalls.append(stall)
@@ -1,22 +1,235 @@
+import hashlib
+import json
 import os
+import shutil
 import subprocess
-from PyQt5.QtWidgets import QFileDialog, QMessageBox, QInputDialog
+import sys
+import tempfile
+import time
 
-def create_new_project():
-    project_dir = QFileDialog.getExistingDirectory(None, "Select Project Directory")
-    if not project_dir:
-        return  # User canceled
+from PyQt5.QtCore import QThread, pyqtSignal
+from ide.paths import user_cache_dir
 
-    project_name, ok = QInputDialog.getText(None, "Enter Project Name", "Project Name:")  # Fixed dialog
-    if not ok or not project_name:
-        return
+VENV_DIR_NAMES = ("venv", ".venv", "env")  # "venv" is what create_new_project makes
+TEMPLATE_MARKER = "ide-template.json"  # Written last, so a template without it is incomplete
+POLL_INTERVAL = 0.1  # Seconds between cancellation checks while a subprocess runs
 
-    project_path = os.path.join(project_dir, project_name)
+
+def find_virtualenv(project_path):
+    """
+    Look for a virtual environment inside the project.  Returns a dict with
+    the environment ``path``, its ``python`` executable and ``version`` (from
+    pyvenv.cfg), or None.  Only reads files, so it is safe on a worker thread.
+    """
+    for name in VENV_DIR_NAMES:
+        venv_path = os.path.join(project_path, name)
+        config_path = os.path.join(venv_path, "pyvenv.cfg")
+        if not os.path.isfile(config_path):
+            continue
+        for python in (os.path.join(venv_path, "bin", "python"),
+                       os.path.join(venv_path, "Scripts", "python.exe")):
+            if os.path.exists(python):
+                break
+        else:
+            continue
+        version = ""
+        try:
+            with open(config_path, encoding="utf-8", errors="replace") as file:
+                for line in file:
+                    key, _, value = line.partition("=")
+                    if key.strip() in ("version", "version_info"):
+                        version = value.strip()
+        except OSError:
+            pass
+        return {"path": venv_path, "python": python, "version": version}
+    return None
+
+
+class ProjectCreationError(Exception):
+    pass
+
+
+class ProjectCreationCancelled(ProjectCreationError):
+    pass
+
+
+def _run(command, stop=None):
+    """Run ``command``; raise ProjectCreationError with its output if it fails."""
+    process = subprocess.Popen(command, stdout=subprocess.PIPE, stderr=subprocess.STDOUT)
+    while True:
+        try:
+            output, _ = process.communicate(timeout=POLL_INTERVAL)
+            break
+        except subprocess.TimeoutExpired:
+            if stop is not None and stop():
+                process.kill()
+                process.communicate()
+                raise ProjectCreationCancelled("Cancelled")
+    if process.returncode != 0:
+        tail = output.decode("utf-8", "replace").strip().splitlines()[-10:]
+        raise ProjectCreationError(f"{' '.join(command)} failed:\n" + "\n".join(tail))
+    return output.decode("utf-8", "replace")
+
+
+def _venv_python(venv_path):
+    if os.name == "nt":
+        return os.path.join(venv_path, "Scripts", "python.exe")
+    return os.path.join(venv_path, "bin", "python")
+
+
+def build_venv(venv_path, python, requirements=None, wheelhouse=None, stop=None, progress=None):
+    """
+    ``python -m venv`` into ``venv_path`` and, with ``requirements``, pip
+    install them (only from ``wheelhouse`` when one is given).
+    """
+    if progress:
+        progress("Creating virtual environment")
+    _run([python, "-m", "venv", venv_path], stop)
+    if requirements:
+        if progress:
+            progress("Installing requirements")
+        command = [_venv_python(venv_path), "-m", "pip", "install", "--disable-pip-version-check", "-r", requirements]
+        if wheelhouse:
+            command[5:5] = ["--no-index", "--find-links", wheelhouse]
+        _run(command, stop)
+
+
+def _base_interpreter(python):
+    """The real executable and version behind ``python`` (which may be a shim or a venv)."""
+    output = _run([python, "-c", "import sys; print(getattr(sys, '_base_executable', sys.executable)); print(sys.version)"])
+    executable, _, version = output.partition("\n")
+    return executable.strip(), version.strip()
+
+
+def template_key(python, requirements=None, wheelhouse=None):
+    """
+    Cache key of the venv template for an interpreter and requirements set:
+    changes when the interpreter is replaced or the requirements or wheels
+    change.
+    """
+    executable, version = _base_interpreter(python)
+    digest = hashlib.sha1()
+    digest.update(f"{executable}\0{version}\0{os.path.getmtime(executable)}".encode("utf-8"))
+    if requirements:
+        with open(requirements, "rb") as file:
+            digest.update(file.read())
+    if wheelhouse and os.path.isdir(wheelhouse):
+        digest.update("\0".join(sorted(os.listdir(wheelhouse))).encode("utf-8"))
+    return digest.hexdigest()[:16]
+
+
+def venv_template(python, requirements=None, wheelhouse=None, stop=None, progress=None):
+    """
+    Path of a pre-built venv template for these settings, built on first
+    use in the user cache.  Templates are built in a temporary directory and
+    renamed into place, so concurrent builds never see half a template.
+    """
+    key = template_key(python, requirements, wheelhouse)
+    templates = user_cache_dir("venv-templates")
+    template = os.path.join(templates, key)
+    if os.path.isfile(os.path.join(template, TEMPLATE_MARKER)):
+        return template
+    if progress:
+        progress("Building environment template (first time only)")
+    build_dir = tempfile.mkdtemp(prefix=key + ".", dir=templates)
+    try:
+        venv_path = os.path.join(build_dir, "venv")
+        build_venv(venv_path, python, requirements, wheelhouse, stop)
+        with open(os.path.join(venv_path, TEMPLATE_MARKER), "w", encoding="utf-8") as file:
+            # The venv keeps the path it was built at; clone_venv replaces it
+            json.dump({"path": venv_path, "python": python, "requirements": requirements,
+                       "created": time.time()}, file)
+        if not os.path.isfile(os.path.join(template, TEMPLATE_MARKER)):
+            shutil.rmtree(template, ignore_errors=True)  # Left over from an interrupted build
+        try:
+            os.rename(venv_path, template)
+        except OSError:
+            if not os.path.isfile(os.path.join(template, TEMPLATE_MARKER)):
+                raise  # Not just another build that finished first
+    finally:
+        shutil.rmtree(build_dir, ignore_errors=True)
+    return template
+
+
+def clone_venv(template, venv_path):
+    """
+    Copy a venv template to ``venv_path``.  Virtual environments embed
+    their own path in pyvenv.cfg, the activate scripts and the shebangs of
+    bin/ scripts; those are rewritten for the new location.
+    """
+    with open(os.path.join(template, TEMPLATE_MARKER), encoding="utf-8") as file:
+        built_at = json.load(file)["path"]
+    shutil.copytree(template, venv_path, symlinks=True, ignore=shutil.ignore_patterns(TEMPLATE_MARKER))
+    old, new = os.fsencode(built_at), os.fsencode(venv_path)
+    paths = [os.path.join(venv_path, "pyvenv.cfg")]
+    scripts = os.path.join(venv_path, "bin")
+    paths.extend(os.path.join(scripts, name) for name in os.listdir(scripts))
+    for path in paths:
+        if os.path.islink(path) or not os.path.isfile(path):
+            continue
+        with open(path, "rb") as file:
+            data = file.read()
+        if old not in data or b"\0" in data[:1024]:
+            continue
+        with open(path, "wb") as file:
+            file.write(data.replace(old, new))
+
+
+def create_new_project(project_path, requirements=None, wheelhouse=None, use_template=True, python=None,
+                       stop=None, progress=None):
+    """
+    Create ``project_path`` with a virtualenv in "venv" and return the path.
+    With ``use_template`` the venv is cloned from a cached template (POSIX
+    only: on Windows the console-script launchers embed their interpreter
+    path in the .exe, so the venv is always built there).  ``progress`` is
+    called with a description of each step; ``stop`` is polled and cancels
+    the creation when it returns True.  If it fails or is cancelled, a
+    directory it created is removed again.
+    """
+    python = python or shutil.which("python") or sys.executable
+    created = not os.path.exists(project_path)
     os.makedirs(project_path, exist_ok=True)
+    venv_path = os.path.join(project_path, "venv")
+    if os.path.exists(venv_path):
+        return project_path  # Keep the environment of an existing project
+    try:
+        if use_template and os.name != "nt":
+            template = venv_template(python, requirements, wheelhouse, stop, progress)
+            if progress:
+                progress("Copying environment")
+            clone_venv(template, venv_path)
+        else:
+            build_venv(venv_path, python, requirements, wheelhouse, stop, progress)
+    except BaseException:
+        # Leave no half-made project behind for the next attempt with the same name to find
+        shutil.rmtree(project_path if created else venv_path, ignore_errors=True)
+        raise
+    return project_path
+
 
-    # Create Virtual Environment
-    subprocess.run(["python", "-m", "venv", os.path.join(project_path, "venv")])
+class ProjectCreatorThread(QThread):
+    """Runs create_new_project off the GUI thread, reporting each step."""
 
-    QMessageBox.information(None, "Project Created", f"Project '{project_name}' created successfully!")
+    stage_started = pyqtSignal(str)
+    project_created = pyqtSignal(str)
+    creation_failed = pyqtSignal(str)
 
+    def __init__(self, project_path, requirements=None, wheelhouse=None, use_template=True, parent=None):
+        super().__init__(parent)
+        self.project_path = project_path
+        self.requirements = requirements
+        self.wheelhouse = wheelhouse
+        self.use_template = use_template
 
+    def run(self):
+        try:
+            path = create_new_project(
+                self.project_path, self.requirements, self.wheelhouse, self.use_template,
+                stop=self.isInterruptionRequested, progress=self.stage_started.emit,
+            )
+        except ProjectCreationCancelled:
+            return
+        except (ProjectCreationError, OSError, ValueError, KeyError) as e:
+            self.creation_failed.emit(str(e))
+        else:
+            self.project_created.emit(path)
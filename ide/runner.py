@@ -0,0 +1,256 @@
+import json
+import os
+import sys
+import time
+from collections import deque
+
+from PyQt5.QtCore import QObject, QProcess, QProcessEnvironment, QTimer, pyqtSignal
+
+MAX_CONCURRENT_RUNS = 2  # Runs executing at once; later ones wait in a queue
+WARM_POOL_SIZE = 1  # Idle warm interpreters kept per interpreter and working directory
+WARM_MODULES = ("numpy", "pandas", "matplotlib.pyplot")  # Imported ahead of time when installed
+WARM_START = os.path.join(os.path.dirname(os.path.abspath(__file__)), "warm_start.py")
+STOP_GRACE_MS = 2000  # Time a stopped run gets to exit before it is killed
+
+QUEUED, RUNNING, FINISHED, STOPPED, FAILED = "queued", "running", "finished", "stopped", "failed"
+
+
+def run_environment(python):
+    """
+    Environment for a child of ``python``: unbuffered output and, when the
+    interpreter belongs to a virtualenv, that environment activated.
+    """
+    environment = QProcessEnvironment.systemEnvironment()
+    environment.insert("PYTHONUNBUFFERED", "1")
+    bin_dir = os.path.dirname(python)
+    venv_path = os.path.dirname(bin_dir)
+    if os.path.isfile(os.path.join(venv_path, "pyvenv.cfg")):
+        environment.insert("VIRTUAL_ENV", venv_path)
+        environment.insert("PATH", bin_dir + os.pathsep + environment.value("PATH"))
+        environment.remove("PYTHONHOME")
+    return environment
+
+
+class Run(QObject):
+    """
+    One execution of a script.  stdout and stderr are merged so the output
+    keeps its order; ``exit_code`` and ``seconds`` are set when it ends.
+    """
+
+    output = pyqtSignal(bytes)
+    started = pyqtSignal()
+    finished = pyqtSignal()
+
+    def __init__(self, file_path, python, cwd, warm=False, parent=None):
+        super().__init__(parent)
+        self.file_path = file_path
+        self.python = python
+        self.cwd = cwd
+        self.warm = warm  # Asked for a warm interpreter; see ``used_warm`` for what it got
+        self.used_warm = False
+        self.process = None
+        self.state = QUEUED
+        self.exit_code = None  # None unless the process exited normally
+        self.error = ""
+        self.start_time = None
+        self.seconds = 0.0
+
+    def command(self):
+        return [self.python, "-u", self.file_path]
+
+    def start(self, warm_process=None):
+        """Start a new process, or hand the script to an idle warm interpreter."""
+        self.state = RUNNING
+        self.start_time = time.perf_counter()
+        if warm_process is not None:
+            self.used_warm = True
+            self.process = warm_process
+            self.process.setParent(self)
+            self.process.readAll()  # Anything the bootstrap printed while importing
+        else:
+            self.process = QProcess(self)
+            self.process.setProcessChannelMode(QProcess.MergedChannels)
+            self.process.setProcessEnvironment(run_environment(self.python))
+            self.process.setWorkingDirectory(self.cwd)
+        self.process.readyReadStandardOutput.connect(self.on_output)
+        self.process.finished.connect(self.on_finished)
+        self.process.errorOccurred.connect(self.on_error)
+        if warm_process is not None:
+            request = {"path": self.file_path, "cwd": self.cwd, "args": []}
+            self.process.write((json.dumps(request) + "\n").encode("utf-8"))
+        else:
+            program, *arguments = self.command()
+            self.process.start(program, arguments)
+        self.started.emit()
+
+    def is_active(self):
+        return self.state in (QUEUED, RUNNING)
+
+    def stop(self, wait=False):
+        """
+        Terminate the process, and kill it if it has not exited after
+        STOP_GRACE_MS.  With ``wait``, block until it is gone.
+        """
+        if self.state != RUNNING:
+            return
+        self.state = STOPPED
+        process = self.process
+        process.terminate()
+        if wait:
+            if not process.waitForFinished(STOP_GRACE_MS):
+                process.kill()
+                process.waitForFinished(STOP_GRACE_MS)
+        else:
+            QTimer.singleShot(STOP_GRACE_MS, lambda: process.state() != QProcess.NotRunning and process.kill())
+
+    def on_output(self):
+        data = self.process.readAll().data()
+        if data:
+            self.output.emit(data)
+
+    def on_finished(self, exit_code, exit_status):
+        self.on_output()
+        self.seconds = time.perf_counter() - self.start_time
+        if exit_status == QProcess.NormalExit:
+            self.exit_code = exit_code
+        if self.state == RUNNING:
+            self.state = FINISHED
+        self.finished.emit()
+
+    def on_error(self, error):
+        if error != QProcess.FailedToStart:
+            return  # Crashes are reported through ``finished``
+        self.error = self.process.errorString()
+        self.state = FAILED
+        self.seconds = time.perf_counter() - self.start_time
+        self.finished.emit()
+
+
+class WarmPool(QObject):
+    """
+    Interpreters started ahead of time that have already imported
+    ``modules`` (see ide/warm_start.py) and wait for a script to run.
+    Each one runs a single script, so runs never see each other's state;
+    taking one starts its replacement in the background.
+    """
+
+    def __init__(self, size=WARM_POOL_SIZE, modules=WARM_MODULES, parent=None):
+        super().__init__(parent)
+        self.size = size
+        self.modules = tuple(modules)
+        self.idle = {}  # (python, cwd) -> [QProcess]
+
+    def prepare(self, python, cwd):
+        """Start interpreters until ``size`` are waiting for (python, cwd)."""
+        processes = self.idle.setdefault((python, cwd), [])
+        while len(processes) < self.size:
+            process = QProcess(self)
+            process.setProcessChannelMode(QProcess.MergedChannels)
+            process.setProcessEnvironment(run_environment(python))
+            process.setWorkingDirectory(cwd)
+            process.finished.connect(lambda *args, p=process, k=(python, cwd): self.discard(k, p))
+            process.start(python, ["-u", WARM_START, *self.modules])
+            processes.append(process)
+
+    def take(self, python, cwd):
+        """An idle interpreter for (python, cwd), or None if none is ready."""
+        processes = self.idle.get((python, cwd), [])
+        while processes:
+            process = processes.pop(0)
+            if process.state() != QProcess.NotRunning:
+                process.finished.disconnect()
+                self.prepare(python, cwd)
+                return process
+            process.deleteLater()
+        self.prepare(python, cwd)
+        return None
+
+    def discard(self, key, process):
+        """An idle interpreter exited (bad interpreter, or it was shut down)."""
+        processes = self.idle.get(key, [])
+        if process in processes:
+            processes.remove(process)
+            process.deleteLater()
+
+    def clear(self):
+        """Shut down every idle interpreter; none of them has run anything yet."""
+        idle, self.idle = self.idle, {}
+        for processes in idle.values():
+            for process in processes:
+                process.finished.disconnect()
+                process.kill()
+                process.waitForFinished(STOP_GRACE_MS)
+                process.deleteLater()
+
+
+class RunManager(QObject):
+    """
+    Runs scripts in their project's interpreter, at most ``max_concurrent``
+    at a time; the rest wait in order.  With warm interpreters enabled,
+    a run is handed to an idle WarmPool interpreter when one is ready.
+    """
+
+    run_queued = pyqtSignal(object)  # Run
+    run_started = pyqtSignal(object)
+    run_finished = pyqtSignal(object)
+
+    def __init__(self, max_concurrent=MAX_CONCURRENT_RUNS, warm=False, warm_pool=None, parent=None):
+        super().__init__(parent)
+        self.max_concurrent = max_concurrent
+        self.warm = warm
+        self.warm_pool = warm_pool or WarmPool(parent=self)
+        self.queue = deque()
+        self.running = []
+
+    def submit(self, file_path, python=None, cwd=None):
+        """Queue a run of ``file_path``; it starts as soon as a slot is free."""
+        run = Run(file_path, python or sys.executable, cwd or os.path.dirname(file_path), self.warm, self)
+        self.queue.append(run)
+        self.run_queued.emit(run)
+        self.schedule()
+        return run
+
+    def rerun(self, run):
+        return self.submit(run.file_path, run.python, run.cwd)
+
+    def set_max_concurrent(self, count):
+        self.max_concurrent = max(1, count)
+        self.schedule()
+
+    def set_warm(self, enabled, python=None, cwd=None):
+        """Turn warm interpreters on or off; ``python`` and ``cwd`` are warmed up at once."""
+        self.warm = enabled
+        if not enabled:
+            self.warm_pool.clear()
+        elif python and cwd:
+            self.warm_pool.prepare(python, cwd)
+
+    def schedule(self):
+        while self.queue and len(self.running) < self.max_concurrent:
+            run = self.queue.popleft()
+            self.running.append(run)
+            run.finished.connect(lambda run=run: self.on_run_finished(run))
+            warm_process = self.warm_pool.take(run.python, run.cwd) if run.warm else None
+            run.start(warm_process)
+            self.run_started.emit(run)
+
+    def stop(self, run):
+        if run in self.queue:
+            self.queue.remove(run)
+            run.state = STOPPED
+            self.run_finished.emit(run)
+        else:
+            run.stop()
+
+    def on_run_finished(self, run):
+        if run in self.running:
+            self.running.remove(run)
+        self.run_finished.emit(run)
+        self.schedule()
+
+    def shutdown(self):
+        """Drop queued runs, stop running ones and the warm interpreters."""
+        self.queue.clear()
+        for run in list(self.running):
+            run.stop(wait=True)
+        self.warm_pool.clear()
@@ -0,0 +1,107 @@
+"""
+Full-text search over project files.  Nothing here imports Qt, so the
+functions can run in worker processes started with "spawn".
+"""
+import mmap
+import os
+import re
+
+BINARY_SNIFF_BYTES = 8192  # A NUL byte in this prefix marks a file as binary
+MMAP_THRESHOLD = 4 << 20  # Larger files are searched through mmap instead of read()
+MAX_LINE_CHARS = 300  # Longer matching lines are cut around the match
+MAX_MATCHES_PER_FILE = 1000
+COUNT_CHUNK_BYTES = 16 << 20  # mmap has no count(); newlines are counted on slices this big
+
+
+def compile_query(query, regex=False, case_sensitive=False):
+    """
+    Compile ``query`` to a bytes pattern.  Searching raw bytes avoids
+    decoding files that do not match at all; matching lines are decoded as
+    UTF-8 afterwards.  Raises re.error for an invalid regex.
+    """
+    source = query if regex else re.escape(query)
+    flags = re.MULTILINE if case_sensitive else re.MULTILINE | re.IGNORECASE
+    return re.compile(source.encode("utf-8"), flags)
+
+
+def is_binary(data):
+    return b"\0" in data[:BINARY_SNIFF_BYTES]
+
+
+def count_newlines(data, start, end):
+    if isinstance(data, bytes):
+        return data.count(b"\n", start, end)
+    count = 0
+    for offset in range(start, end, COUNT_CHUNK_BYTES):
+        count += data[offset:min(end, offset + COUNT_CHUNK_BYTES)].count(b"\n")
+    return count
+
+
+def search_data(data, pattern, max_matches=MAX_MATCHES_PER_FILE):
+    """
+    Return ``[(line_number, column, line_text)]`` for every line of ``data``
+    (bytes or mmap) containing a match, reporting the first match per line.
+    """
+    matches = []
+    line_number = 1
+    counted_to = 0
+    pos = 0
+    size = len(data)
+    while len(matches) < max_matches:
+        match = pattern.search(data, pos)
+        if match is None:
+            break
+        start = match.start()
+        line_number += count_newlines(data, counted_to, start)
+        line_start = data.rfind(b"\n", 0, start) + 1
+        line_end = data.find(b"\n", start)
+        if line_end < 0:
+            line_end = size
+        counted_to = line_start
+
+        prefix = data[line_start:start].decode("utf-8", "replace")
+        column = len(prefix)
+        if line_end - line_start > MAX_LINE_CHARS:
+            cut = max(line_start, start - MAX_LINE_CHARS // 3)
+            text = data[cut:min(line_end, cut + MAX_LINE_CHARS)].decode("utf-8", "replace")
+        else:
+            text = data[line_start:line_end].decode("utf-8", "replace")
+        matches.append((line_number, column, text.rstrip("\r")))
+
+        # Continue on the next line; an empty match must not stall the loop
+        pos = line_end + 1
+        if pos > size:
+            break
+    return matches
+
+
+def search_file(path, pattern, max_matches=MAX_MATCHES_PER_FILE):
+    """Search one file; binary and unreadable files give no matches."""
+    try:
+        with open(path, "rb") as file:
+            size = os.fstat(file.fileno()).st_size
+            if size == 0:
+                return []
+            if size < MMAP_THRESHOLD:
+                data = file.read()
+                return [] if is_binary(data) else search_data(data, pattern, max_matches)
+            with mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as data:
+                if is_binary(data):
+                    return []
+                return search_data(data, pattern, max_matches)
+    except (OSError, ValueError):
+        return []
+
+
+def search_batch(root, rel_paths, pattern):
+    """
+    Worker entry point: search ``rel_paths`` under ``root``.  Returns the
+    number of files searched and ``[(rel_path, matches)]`` for files that
+    matched.
+    """
+    results = []
+    for rel_path in rel_paths:
+        matches = search_file(os.path.join(root, rel_path), pattern)
+        if matches:
+            results.append((rel_path, matches))
+    return len(rel_paths), results
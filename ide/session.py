@@ -0,0 +1,88 @@
+import json
+import os
+import tempfile
+
+from ide.paths import user_data_dir
+
+SESSION_VERSION = 1
+SESSION_FILE_NAME = "session.json"
+
+# Layout of a session (version 1):
+#
+#   {"version": 1,
+#    "active_project": 0,
+#    "projects": [{"path": "/abs/project",
+#                  "active_file": "/abs/project/main.py",
+#                  "files": [{"path": "/abs/project/main.py", "cursor": 120, "scroll": 3}]}]}
+
+
+def session_path():
+    return os.path.join(user_data_dir(), SESSION_FILE_NAME)
+
+
+def empty_session():
+    return {"version": SESSION_VERSION, "active_project": 0, "projects": []}
+
+
+def load_session(path=None):
+    """
+    Read the saved session.  A missing, unreadable or newer-version file
+    gives an empty session rather than an error, and malformed entries
+    are dropped or reset to their defaults.
+    """
+    try:
+        with open(path or session_path(), encoding="utf-8") as file:
+            session = json.load(file)
+    except (OSError, ValueError):
+        return empty_session()
+    if not isinstance(session, dict) or session.get("version") != SESSION_VERSION:
+        return empty_session()
+
+    projects = []
+    for project in _list(session.get("projects")):
+        if not isinstance(project, dict) or not isinstance(project.get("path"), str):
+            continue
+        files = [
+            {"path": f["path"], "cursor": _int(f.get("cursor")), "scroll": _int(f.get("scroll"))}
+            for f in _list(project.get("files")) if isinstance(f, dict) and isinstance(f.get("path"), str)
+        ]
+        active_file = project.get("active_file")
+        projects.append({"path": project["path"],
+                         "active_file": active_file if isinstance(active_file, str) else None,
+                         "files": files})
+    return {
+        "version": SESSION_VERSION,
+        "active_project": _int(session.get("active_project")),
+        "projects": projects,
+    }
+
+
+def _list(value):
+    return value if isinstance(value, list) else []
+
+
+def _int(value, default=0):
+    """``value`` as an int, or ``default`` for a null, non-numeric or infinite entry of a hand-edited file."""
+    try:
+        return int(value)
+    except (TypeError, ValueError, OverflowError):
+        return default
+
+
+def save_session(session, path=None):
+    """Write ``session`` atomically: readers see the old file or the new one, never half of it."""
+    path = path or session_path()
+    directory = os.path.dirname(path)
+    fd, temp_path = tempfile.mkstemp(prefix=".session-", suffix=".tmp", dir=directory)
+    try:
+        with os.fdopen(fd, "w", encoding="utf-8") as file:
+            json.dump(dict(session, version=SESSION_VERSION), file, separators=(",", ":"))
+            file.flush()
+            os.fsync(file.fileno())
+        os.replace(temp_path, path)
+    except BaseException:
+        try:
+            os.unlink(temp_path)
+        except OSError:
+            pass
+        raise
@@ -0,0 +1,202 @@
+import gzip
+import hashlib
+import json
+import os
+
+from PyQt5.QtCore import QObject, QThread, pyqtSignal
+from ide.fuzzy import FuzzyMatcher
+from ide.paths import user_cache_dir
+from ide.symbols import CLASS, FUNCTION, extract_symbols, parse_files
+from ide.workers import BackgroundRefresh, BufferJobs, run_in_batches
+
+SYMBOLS_VERSION = 1
+PYTHON_SUFFIXES = (".py", ".pyw", ".pyi")
+OUTLINE_DELAY_MS = 400  # Quiet time after the last edit before a buffer is reparsed
+OUTLINE_CACHE_SIZE = 256  # Parsed outlines kept by content hash
+REFRESH_DELAY_MS = 500
+
+
+def is_python_file(path):
+    return bool(path) and path.endswith(PYTHON_SUFFIXES)
+
+
+def python_files(index):
+    """``[(rel_path, mtime)]`` of the Python files in ``index``, a ProjectIndex."""
+    return [
+        (prefix + name, mtime)
+        for rel_dir, (_, names, _) in index.dirs.items()
+        for prefix in [rel_dir + "/" if rel_dir else ""]
+        for name, mtime in names.items() if name.endswith(PYTHON_SUFFIXES)
+    ]
+
+
+class OutlineService(QObject):
+    """
+    Keeps an outline of every watched SharedDocument.  Edits restart a
+    debounce timer; when it fires, a buffer whose revision moved is hashed
+    and only parsed if that content has not been seen before.  Parses run
+    on the shared process pool (see ide.workers.BufferJobs), as ast.parse
+    holds the GIL for as long as it runs.  While the code does not parse,
+    the last good outline is kept.
+    """
+
+    outline_changed = pyqtSignal(object)  # SharedDocument
+    parse_done = pyqtSignal(object)  # Future; emitted from pool threads
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.outlines = {}  # SharedDocument -> [Symbol]
+        self.jobs = BufferJobs(self, OUTLINE_DELAY_MS, self.parse_job, self.set_outline, self.parse_done.emit,
+                               cache_size=OUTLINE_CACHE_SIZE)
+        self.parse_done.connect(self.jobs.finish)
+
+    def watch(self, document):
+        if self.jobs.watch(document):
+            document.destroyed.connect(lambda *args: self.forget(document))
+
+    def forget(self, document):
+        self.jobs.forget(document)
+        self.outlines.pop(document, None)
+
+    def outline(self, document):
+        return self.outlines.get(document)
+
+    def parse_job(self, document, text):
+        return extract_symbols, text
+
+    def set_outline(self, document, symbols):
+        self.outlines[document] = symbols
+        self.outline_changed.emit(document)
+
+    def stop(self):
+        self.jobs.stop()
+
+
+class ProjectSymbolsThread(QThread):
+    """
+    Brings the symbol table of a project up to date.  Files whose mtime
+    matches the table are reused as is; the rest are re-read, and only
+    parsed (on the shared process pool when there are many) if their
+    content hash changed.
+    """
+
+    symbols_ready = pyqtSignal(object, object, object)  # Table, FuzzyMatcher, locations
+
+    def __init__(self, root, files, table=None, parent=None):
+        super().__init__(parent)
+        self.root = root
+        self.files = files  # [(rel_path, mtime)]
+        self.table = table
+
+    def run(self):
+        table = self.table if self.table is not None else load_symbol_table(self.root)
+        new_table = {}
+        changed = []
+        for rel_path, mtime in self.files:
+            entry = table.get(rel_path)
+            if entry is not None and entry[0] == mtime:
+                new_table[rel_path] = entry
+            else:
+                changed.append((rel_path, entry[1] if entry else None))
+
+        if changed:
+            results = run_in_batches(parse_files, self.root, changed, self.isInterruptionRequested)
+            if results is None:
+                return
+            for rel_path, mtime, digest, symbols in results:
+                if symbols is None:
+                    symbols = table[rel_path][2]
+                new_table[rel_path] = [mtime, digest, symbols]
+        if changed or len(new_table) != len(table):
+            try:
+                save_symbol_table(self.root, new_table)
+            except OSError:
+                pass  # The cache is only an optimization
+
+        entries, locations = symbol_entries(new_table)
+        if not self.isInterruptionRequested():
+            self.symbols_ready.emit(new_table, FuzzyMatcher(entries), locations)
+
+
+def symbol_entries(table):
+    """
+    Entries for a FuzzyMatcher: "rel/path.py/Class.method", so the symbol
+    is the "file name" tier and the path is matched after it.  Returns the
+    entries and a dict mapping each to ``(rel_path, line, column)``.
+    """
+    locations = {}
+    for rel_path, (_, _, symbols) in table.items():
+        for kind, name, line, column, _ in symbols:
+            if kind in (CLASS, FUNCTION):
+                locations.setdefault(f"{rel_path}/{name}", (rel_path, line, column))
+    return list(locations), locations
+
+
+def _table_path(root):
+    digest = hashlib.sha1(os.path.abspath(root).encode("utf-8")).hexdigest()
+    return os.path.join(user_cache_dir("symbols"), digest + ".json.gz")
+
+
+def load_symbol_table(root):
+    """``rel_path -> [mtime, content_hash, [symbol tuples]]`` from the cache, or {}."""
+    try:
+        with gzip.open(_table_path(root), "rt", encoding="utf-8") as file:
+            data = json.load(file)
+        if data.get("version") == SYMBOLS_VERSION and data.get("root") == root:
+            return data["files"]
+    except (OSError, ValueError, KeyError):
+        pass
+    return {}
+
+
+def save_symbol_table(root, table):
+    path = _table_path(root)
+    temp_path = path + ".tmp"
+    with gzip.open(temp_path, "wt", encoding="utf-8", compresslevel=1) as file:
+        json.dump({"version": SYMBOLS_VERSION, "root": root, "files": table}, file, separators=(",", ":"))
+    os.replace(temp_path, path)
+
+
+class ProjectSymbols(QObject):
+    """
+    Project-wide symbol table for "Go to Symbol", refreshed from the
+    project's file index whenever it changes.
+    """
+
+    updated = pyqtSignal()
+
+    def __init__(self, root, parent=None):
+        super().__init__(parent)
+        self.root = root
+        self.table = None
+        self.matcher = None
+        self.locations = {}
+        self.refresher = BackgroundRefresh(self, REFRESH_DELAY_MS, self.start_thread)
+
+    def is_ready(self):
+        return self.matcher is not None
+
+    def refresh(self, index):
+        """Schedule a refresh against ``index`` (a ProjectIndex)."""
+        self.refresher.refresh(index)
+
+    def start_thread(self, index):
+        thread = ProjectSymbolsThread(self.root, python_files(index), self.table, self)
+        thread.symbols_ready.connect(self.on_symbols_ready)
+        return thread
+
+    def on_symbols_ready(self, table, matcher, locations):
+        self.table = table
+        self.matcher = matcher
+        self.locations = locations
+        self.updated.emit()
+
+    def stop(self):
+        self.refresher.stop()
+
+
+def describe_symbol_entry(entry):
+    """Text shown in Go to Symbol for a symbol_entries() entry."""
+    rel_path, _, name = entry.rpartition("/")
+    return f"{name}    {rel_path}"
+
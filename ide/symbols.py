@@ -0,0 +1,83 @@
+"""
+Symbol extraction with ``ast``.  Nothing here imports Qt, so the functions
+can run in worker processes started with "spawn".
+"""
+import ast
+import hashlib
+import os
+from collections import namedtuple
+
+CLASS, FUNCTION, IMPORT = "class", "function", "import"
+
+# ``name`` is qualified with the enclosing classes and functions ("Editor.load");
+# ``depth`` is the nesting level used to indent the outline.
+Symbol = namedtuple("Symbol", "kind name line column depth")
+
+# Statements whose bodies still belong to the enclosing scope's outline,
+# e.g. imports under "if TYPE_CHECKING:" or "try: ... except ImportError:"
+_COMPOUND = (ast.If, ast.Try, ast.With, ast.AsyncWith, ast.For, ast.AsyncFor, ast.While)
+
+
+def content_hash(data):
+    """Short digest of ``data`` (bytes or str) used as a cache key."""
+    if isinstance(data, str):
+        data = data.encode("utf-8", "surrogatepass")
+    return hashlib.blake2b(data, digest_size=16).hexdigest()
+
+
+def extract_symbols(source):
+    """
+    Return the classes, functions and module-level imports of ``source``
+    in file order, or None if it does not parse.
+    """
+    try:
+        tree = ast.parse(source)
+    except (SyntaxError, ValueError):
+        return None
+    symbols = []
+    _visit(tree.body, 0, "", symbols)
+    return symbols
+
+
+def _visit(body, depth, prefix, symbols):
+    for node in body:
+        if isinstance(node, ast.ClassDef):
+            symbols.append(Symbol(CLASS, prefix + node.name, node.lineno, node.col_offset, depth))
+            _visit(node.body, depth + 1, f"{prefix}{node.name}.", symbols)
+        elif isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef)):
+            symbols.append(Symbol(FUNCTION, prefix + node.name, node.lineno, node.col_offset, depth))
+            _visit(node.body, depth + 1, f"{prefix}{node.name}.", symbols)
+        elif isinstance(node, (ast.Import, ast.ImportFrom)):
+            if depth == 0:
+                for alias in node.names:
+                    name = alias.asname or alias.name
+                    symbols.append(Symbol(IMPORT, name, node.lineno, node.col_offset, depth))
+        elif isinstance(node, _COMPOUND):
+            for field in ("body", "orelse", "finalbody"):
+                _visit(getattr(node, field, []), depth, prefix, symbols)
+            for handler in getattr(node, "handlers", []):
+                _visit(handler.body, depth, prefix, symbols)
+
+
+def parse_files(root, items):
+    """
+    Worker entry point.  ``items`` are ``(rel_path, known_hash)`` pairs; a
+    file whose content still hashes to ``known_hash`` is not parsed again.
+    Returns ``[(rel_path, mtime, hash, symbols)]`` where symbols is None for
+    an unchanged file and [] for one that does not parse.
+    """
+    results = []
+    for rel_path, known_hash in items:
+        path = os.path.join(root, rel_path)
+        try:
+            mtime = os.path.getmtime(path)
+            with open(path, "rb") as file:
+                data = file.read()
+        except OSError:
+            continue
+        digest = content_hash(data)
+        if digest == known_hash:
+            results.append((rel_path, mtime, digest, None))
+        else:
+            results.append((rel_path, mtime, digest, [tuple(s) for s in extract_symbols(data) or []]))
+    return results
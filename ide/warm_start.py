@@ -0,0 +1,33 @@
+"""
+Bootstrap of a warm interpreter (see ide.runner.WarmPool).  Run by the
+project's Python, so it only uses the standard library: it imports the
+modules named on the command line, then waits for one JSON line on stdin
+naming the script to run, and runs that script as __main__ in this process.
+"""
+import importlib
+import json
+import os
+import runpy
+import sys
+
+
+def main():
+    del sys.path[0]  # This file's directory, which is not the script's
+    for name in sys.argv[1:]:
+        try:
+            importlib.import_module(name)
+        except Exception:
+            pass  # Not installed in this environment, or broken; the script will say so
+    line = sys.stdin.readline()
+    if not line:
+        return  # The pool was shut down before this interpreter was used
+    request = json.loads(line)
+    path = request["path"]
+    sys.argv = [path] + request.get("args", [])
+    sys.path.insert(0, os.path.dirname(path))
+    os.chdir(request.get("cwd") or os.path.dirname(path))
+    runpy.run_path(path, run_name="__main__")
+
+
+if __name__ == "__main__":
+    main()
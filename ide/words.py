@@ -0,0 +1,348 @@
+"""
+Word counting, the prefix index and module members for autocompletion.
+Nothing here imports Qt, so the functions can run in worker processes
+started with "spawn".
+"""
+import ast
+import builtins
+import heapq
+import importlib
+import importlib.machinery
+import importlib.util
+import keyword
+import math
+import os
+import re
+import sys
+import sysconfig
+from bisect import bisect_left
+from collections import Counter
+from glob import glob
+
+MIN_WORD_LENGTH = 3  # Shorter identifiers are quicker to type than to pick
+MAX_WORD_FILE_BYTES = 2 << 20  # Bigger project files are generated code; their words are not counted
+TOP_SIZE = 32  # Most frequent words precomputed per prefix
+TOP_RANGE_MIN = 512  # Prefixes matching more words than this get a precomputed top
+STAR_IMPORT_DEPTH = 2  # "from .x import *" followed this deep when listing module members
+STATIC_WORD_COUNT = 1  # Keywords and builtins count as if seen once in the project
+BUFFER_WEIGHT = 2.0  # Words of the edited buffer rank above the rest of the project...
+NEARBY_WEIGHT = 4.0  # ...and words near the cursor above both
+CASE_MATCH_BONUS = 1.0  # For a word that starts with the prefix as typed
+
+_WORD_RE = re.compile(r"\b[^\W\d]\w{%d,}" % (MIN_WORD_LENGTH - 1))
+_IMPORT_RE = re.compile(r"^[ \t]*import[ \t]+([\w., \t]+)", re.MULTILINE)
+_FROM_IMPORT_RE = re.compile(r"^[ \t]*from[ \t]+([\w.]+)[ \t]+import[ \t]+\(?([\w, \t]+)", re.MULTILINE)
+_ALIAS_RE = re.compile(r"([\w.]+)(?:[ \t]+as[ \t]+(\w+))?")
+_MAX_CHAR = chr(sys.maxunicode)
+_COMPOUND = (ast.If, ast.Try, ast.With, ast.For, ast.While)
+_MODULE_ALIASES = {"os.path": os.path.__name__}  # Modules that are another module under a second name
+
+STATIC_WORDS = sorted(
+    {word for word in keyword.kwlist if len(word) >= MIN_WORD_LENGTH}
+    | {name for name in dir(builtins) if not name.startswith("_") and len(name) >= MIN_WORD_LENGTH}
+)
+
+
+def count_words(text):
+    """``{identifier: occurrences}`` of the identifiers in ``text`` at least MIN_WORD_LENGTH long."""
+    return Counter(_WORD_RE.findall(text))
+
+
+def count_files(root, rel_paths):
+    """
+    Worker entry point.  Returns ``[(rel_path, mtime, counts)]`` for the
+    readable files among ``rel_paths``, with empty counts for files over
+    MAX_WORD_FILE_BYTES.
+    """
+    results = []
+    for rel_path in rel_paths:
+        path = os.path.join(root, rel_path)
+        try:
+            mtime = os.path.getmtime(path)
+            if os.path.getsize(path) > MAX_WORD_FILE_BYTES:
+                results.append((rel_path, mtime, {}))
+                continue
+            with open(path, encoding="utf-8", errors="replace") as file:
+                text = file.read()
+        except OSError:
+            continue
+        results.append((rel_path, mtime, dict(count_words(text))))
+    return results
+
+
+class PrefixIndex:
+    """
+    Words with their counts, sorted by their lowercase form, so the words
+    with a given prefix are one range found by bisection.  The most
+    frequent words of every prefix that matches more than TOP_RANGE_MIN
+    words are precomputed, so a lookup never ranks more than that many,
+    however big the index.  Immutable; built off the GUI thread.
+    """
+
+    def __init__(self, counts):
+        items = sorted(counts.items(), key=lambda item: (item[0].lower(), item[0]))
+        self.words = [word for word, _ in items]
+        self.keys = [word.lower() for word in self.words]
+        self.counts = [count for _, count in items]
+        self.top = {}  # Lowercase prefix -> indexes of its TOP_SIZE most frequent words
+        self._precompute("", 0, len(self.keys))
+
+    def __len__(self):
+        return len(self.words)
+
+    def _precompute(self, prefix, lo, hi):
+        # Each range takes its top from its sub-ranges' tops, so every word is ranked only once
+        counts = self.counts
+        if hi - lo <= TOP_RANGE_MIN:
+            return heapq.nlargest(TOP_SIZE, range(lo, hi), key=counts.__getitem__)
+        keys = self.keys
+        depth = len(prefix)
+        candidates = []
+        start = lo
+        while start < hi and len(keys[start]) == depth:
+            candidates.append(start)  # The prefix itself, in any case
+            start += 1
+        while start < hi:
+            sub_prefix = keys[start][:depth + 1]
+            end = bisect_left(keys, sub_prefix + _MAX_CHAR, start, hi)
+            candidates.extend(self._precompute(sub_prefix, start, end))
+            start = end
+        top = heapq.nlargest(TOP_SIZE, candidates, key=counts.__getitem__)
+        self.top[prefix] = top
+        return top
+
+    def lookup(self, prefix, limit=TOP_SIZE):
+        """The ``limit`` (at most TOP_SIZE) most frequent ``(word, count)`` starting with ``prefix``, any case."""
+        key = prefix.lower()
+        top = self.top.get(key)
+        if top is None:
+            lo = bisect_left(self.keys, key)
+            hi = bisect_left(self.keys, key + _MAX_CHAR, lo)
+            top = heapq.nlargest(limit, range(lo, hi), key=self.counts.__getitem__)
+        return [(self.words[i], self.counts[i]) for i in top[:limit]]
+
+    def count(self, word):
+        key = word.lower()
+        i = bisect_left(self.keys, key)
+        while i < len(self.keys) and self.keys[i] == key:
+            if self.words[i] == word:
+                return self.counts[i]
+            i += 1
+        return 0
+
+
+STATIC_INDEX = PrefixIndex(dict.fromkeys(STATIC_WORDS, STATIC_WORD_COUNT))
+
+
+def index_buffer(text):
+    """Worker entry point: the PrefixIndex of a buffer and its imports (see find_imports)."""
+    return PrefixIndex(count_words(text)), find_imports(text)
+
+
+def find_imports(text):
+    """
+    ``{name: module}`` for the names the import statements of ``text``
+    bind: "import os.path" binds "os", "import numpy as np" binds "np",
+    "from os import path" binds "path" to "os.path".  Found with regular
+    expressions, so it works while the code does not parse.
+    """
+    imports = {}
+    for match in _IMPORT_RE.finditer(text):
+        for part in match.group(1).split(","):
+            alias = _ALIAS_RE.match(part.strip())
+            if alias is None:
+                continue
+            module, name = alias.groups()
+            if name:
+                imports[name] = module
+            else:
+                imports[module.partition(".")[0]] = module.partition(".")[0]
+    for match in _FROM_IMPORT_RE.finditer(text):
+        package = match.group(1)
+        if package.startswith("."):
+            continue  # Relative imports are resolved against the file; not worth it here
+        for part in match.group(2).split(","):
+            alias = _ALIAS_RE.match(part.strip())
+            if alias is not None:
+                module, name = alias.groups()
+                imports[name or module] = f"{package}.{module}"
+    return imports
+
+
+def module_search_paths(project_path=None, venv_path=None):
+    """
+    Where modules are looked up: the project, then the site-packages and
+    standard library of its virtualenv, or of the running interpreter
+    without one.  Only reads files.
+    """
+    paths = [project_path] if project_path else []
+    stdlib = []
+    if venv_path:
+        paths += glob(os.path.join(venv_path, "lib", "python*", "site-packages"))
+        paths.append(os.path.join(venv_path, "Lib", "site-packages"))
+        home, version = None, ""
+        try:
+            with open(os.path.join(venv_path, "pyvenv.cfg"), encoding="utf-8", errors="replace") as file:
+                for line in file:
+                    key, _, value = line.partition("=")
+                    if key.strip() == "home":
+                        home = value.strip()
+                    elif key.strip() in ("version", "version_info"):
+                        version = ".".join(value.strip().split(".")[:2])
+        except OSError:
+            pass
+        if home and version:
+            stdlib = [os.path.join(os.path.dirname(home), "lib", f"python{version}"), os.path.join(home, "Lib")]
+    else:
+        paths.append(sysconfig.get_paths()["purelib"])
+    stdlib = [path for path in stdlib if os.path.isdir(path)] or [sysconfig.get_paths()["stdlib"]]
+    return [path for path in paths + stdlib if os.path.isdir(path)]
+
+
+def module_members(module, search_paths):
+    """
+    Worker entry point.  The names ``module`` defines, found by parsing its
+    source (or stub) in ``search_paths`` without importing it, so no
+    project code runs; modules compiled into the interpreter are listed
+    with dir().  A package also lists its submodules.  Returns a sorted
+    list, empty if the module is not found.
+    """
+    return sorted(_members(_MODULE_ALIASES.get(module, module), search_paths, STAR_IMPORT_DEPTH))
+
+
+def _members(module, search_paths, depth):
+    parts = module.split(".")
+    for base in search_paths:
+        path = os.path.join(base, *parts)
+        if os.path.isdir(path):
+            names = _submodules(path)
+            init = _module_file(path)
+            if init is not None:
+                names |= _source_names(init, search_paths, depth)
+            return names
+        path = _module_file(path)
+        if path is not None:
+            return _source_names(path, search_paths, depth)
+    if module in sys.builtin_module_names or _is_stdlib_extension(module):
+        return set(dir(importlib.import_module(module)))
+    return set()
+
+
+def _is_stdlib_extension(module):
+    """Whether ``module`` is a compiled module of the standard library, e.g. "math" on most Unix builds."""
+    if "." in module:
+        return False  # find_spec would import the parent package
+    try:
+        spec = importlib.util.find_spec(module)
+    except (ImportError, ValueError):
+        return False
+    directory = os.path.join(sysconfig.get_paths()["platstdlib"], "lib-dynload")
+    return (spec is not None and spec.origin is not None
+            and os.path.dirname(spec.origin) == directory
+            and spec.origin.endswith(tuple(importlib.machinery.EXTENSION_SUFFIXES)))
+
+
+def _module_file(path):
+    """The stub or source of module ``path`` (without suffix) or of package directory ``path``."""
+    for candidate in (path + ".pyi", path + ".py",
+                      os.path.join(path, "__init__.pyi"), os.path.join(path, "__init__.py")):
+        if os.path.isfile(candidate):
+            return candidate
+    return None
+
+
+def _submodules(path):
+    names = set()
+    try:
+        entries = os.listdir(path)
+    except OSError:
+        return names
+    for entry in entries:
+        name, suffix = os.path.splitext(entry)
+        if suffix in (".py", ".pyi") and name.isidentifier() and not name.startswith("__"):
+            names.add(name)
+        elif not suffix and entry.isidentifier() and not entry.startswith("__") and os.path.isdir(os.path.join(path, entry)):
+            names.add(entry)
+    return names
+
+
+def _source_names(path, search_paths, depth):
+    try:
+        with open(path, encoding="utf-8", errors="replace") as file:
+            tree = ast.parse(file.read())
+    except (OSError, SyntaxError, ValueError):
+        return set()
+    names = set()
+    _collect_names(tree.body, os.path.dirname(path), search_paths, depth, names)
+    return names
+
+
+def _public(names):
+    return {name for name in names if not name.startswith("_")}
+
+
+def _collect_names(body, directory, search_paths, depth, names):
+    for node in body:
+        if isinstance(node, (ast.ClassDef, ast.FunctionDef, ast.AsyncFunctionDef)):
+            names.add(node.name)
+        elif isinstance(node, (ast.Assign, ast.AnnAssign)):
+            for target in node.targets if isinstance(node, ast.Assign) else [node.target]:
+                for element in target.elts if isinstance(target, ast.Tuple) else [target]:
+                    if isinstance(element, ast.Name):
+                        names.add(element.id)
+        elif isinstance(node, ast.Import):
+            names.update(alias.asname or alias.name.partition(".")[0] for alias in node.names)
+        elif isinstance(node, ast.ImportFrom):
+            for alias in node.names:
+                if alias.name != "*":
+                    names.add(alias.asname or alias.name)
+                elif depth > 0 and not node.level:
+                    # "from posix import *", as os does
+                    names |= _public(_members(node.module, search_paths, depth - 1))
+                elif depth > 0:
+                    # "from .core import *", as packages re-export their submodules
+                    base = directory
+                    for _ in range(node.level - 1):
+                        base = os.path.dirname(base)
+                    path = _module_file(os.path.join(base, *(node.module or "").split(".")))
+                    if path is not None:
+                        names |= _public(_source_names(path, search_paths, depth - 1))
+        elif isinstance(node, _COMPOUND):
+            for field in ("body", "orelse", "finalbody"):
+                _collect_names(getattr(node, field, []), directory, search_paths, depth, names)
+            for handler in getattr(node, "handlers", []):
+                _collect_names(handler.body, directory, search_paths, depth, names)
+
+
+def complete_words(prefix, indexes, nearby_text="", limit=TOP_SIZE):
+    """
+    Rank the words that start with ``prefix`` (in any case) from
+    ``indexes``, ``[(PrefixIndex, weight)]``, and from ``nearby_text``, the
+    lines around the cursor.  A word scores the weighted log of its count
+    in each, so a few uses close by outweigh many elsewhere in the project.
+    The prefix itself is left out.
+    """
+    key = prefix.lower()
+    nearby = {word: count for word, count in count_words(nearby_text).items() if word.lower().startswith(key)}
+    candidates = set(nearby)
+    for index, _ in indexes:
+        candidates.update(word for word, _ in index.lookup(prefix, limit))
+    candidates.discard(prefix)
+
+    def score(word):
+        value = NEARBY_WEIGHT * math.log1p(nearby.get(word, 0))
+        for index, weight in indexes:
+            value += weight * math.log1p(index.count(word))
+        if word.startswith(prefix):
+            value += CASE_MATCH_BONUS
+        return value
+
+    return sorted(candidates, key=lambda word: (-score(word), word))[:limit]
+
+
+def complete_members(prefix, names, limit=TOP_SIZE):
+    """Members of a module that start with ``prefix``: public names first, then alphabetically."""
+    key = prefix.lower()
+    matches = [name for name in names if name.lower().startswith(key) and name != prefix]
+    matches.sort(key=lambda name: (name.startswith("_"), not name.startswith(prefix), name.lower()))
+    return matches[:limit]
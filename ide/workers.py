@@ -0,0 +1,273 @@
+import os
+import threading
+from collections import OrderedDict
+
+from ide.symbols import content_hash
+
+WORKER_NICENESS = 10  # Workers yield the CPU to the GUI process when both want it
+BATCH_FILES = 32  # Files per task handed to a worker process by run_in_batches
+PARALLEL_MIN_FILES = 64  # Fewer files are handled on the calling thread
+MAX_BUFFER_JOBS = 2  # Jobs one BufferJobs hands to the process pool at once; the rest wait
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def process_pool():
+    """
+    The process pool shared by CPU-heavy background work (project search,
+    symbol parsing, diagnostics).  Workers are started with "spawn", so they
+    never inherit the GUI's state, and at a lower priority, so typing stays
+    responsive while they are busy; the pool, and the multiprocessing
+    machinery it imports, are created on first use.
+    """
+    import multiprocessing
+    from concurrent.futures import ProcessPoolExecutor
+
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = ProcessPoolExecutor(mp_context=multiprocessing.get_context("spawn"),
+                                        initializer=_lower_priority)
+        return _pool
+
+
+def _lower_priority():
+    if hasattr(os, "nice"):  # Not on Windows
+        try:
+            os.nice(WORKER_NICENESS)
+        except OSError:
+            pass
+
+
+def shutdown_process_pool():
+    """Drop queued work and let the worker processes exit."""
+    global _pool
+    with _pool_lock:
+        pool, _pool = _pool, None
+    if pool is not None:
+        pool.shutdown(wait=False, cancel_futures=True)
+
+
+def result_or_none(future):
+    """The result of a done ``future``, or None if it was cancelled or raised."""
+    if future.cancelled() or future.exception() is not None:
+        return None
+    return future.result()
+
+
+def run_in_batches(function, root, items, stop):
+    """
+    ``function(root, batch)`` for batches of BATCH_FILES of ``items``, one
+    per file, on the process pool when there are PARALLEL_MIN_FILES or
+    more, with the results concatenated; None if ``stop()`` became true
+    first.  It blocks, so it is meant for the run() of a QThread.
+    """
+    from concurrent.futures import FIRST_COMPLETED, wait
+
+    batches = [items[i:i + BATCH_FILES] for i in range(0, len(items), BATCH_FILES)]
+    results = []
+    if len(items) < PARALLEL_MIN_FILES:
+        for batch in batches:
+            if stop():
+                return None
+            results.extend(function(root, batch))
+        return results
+
+    pending = {process_pool().submit(function, root, batch) for batch in batches}
+    try:
+        while pending:
+            done, pending = wait(pending, timeout=0.05, return_when=FIRST_COMPLETED)
+            if stop():
+                return None
+            for future in done:
+                results.extend(future.result())
+    finally:
+        for future in pending:
+            future.cancel()
+    return results
+
+
+class BufferJobs:
+    """
+    Debounced work on the text of watched SharedDocuments, run on the
+    process pool for the services that keep a result per open buffer
+    (outline, diagnostics, completion words).
+
+    An edit restarts the document's debounce timer.  When it fires, a
+    document whose text revision moved is copied; with ``cache_size``, the
+    copy is hashed too, and content seen before is answered from the cache
+    without a job.  ``job(document, text)`` returns the ``(function,
+    *args)`` to run on the pool, or None if the service handled the text
+    itself.  Jobs of older snapshots that have not started are cancelled,
+    only the newest snapshot of a document waits for a worker, and at most
+    ``max_running`` jobs run at once, visible documents first.
+    ``done(document, result)`` gets the result of the newest snapshot on
+    the GUI thread; a None result is neither cached nor passed on.
+
+    Worker processes import this module, so it leaves Qt alone until it
+    is used.  The owner hands the futures over to the GUI thread: it
+    passes the emit of a signal of its own as ``report`` and connects that
+    signal to finish().
+    """
+
+    def __init__(self, parent, delay_ms, job, done, report, max_running=MAX_BUFFER_JOBS, cache_size=0):
+        self.parent = parent
+        self.delay_ms = delay_ms
+        self.job = job
+        self.done = done
+        self.report = report
+        self.max_running = max_running
+        self.cache_size = cache_size
+        self.timers = {}  # SharedDocument -> debounce QTimer
+        self.revisions = {}  # SharedDocument -> text revision of the newest snapshot
+        self.keys = {}  # SharedDocument -> content hash of that snapshot, or its revision without a cache
+        self.waiting = OrderedDict()  # SharedDocument -> (key, job) not handed out yet
+        self.running = {}  # Future -> (SharedDocument, key)
+        self.cache = OrderedDict()  # Content hash -> result
+        self.stopped = False
+
+    def watch(self, document):
+        """Start watching ``document``; returns False if it was watched already."""
+        from PyQt5.QtCore import QTimer
+
+        if document in self.timers:
+            return False
+        timer = QTimer(self.parent)
+        timer.setSingleShot(True)
+        timer.setInterval(self.delay_ms)
+        timer.timeout.connect(lambda: self.request(document))
+        self.timers[document] = timer
+        document.text_document.contentsChanged.connect(timer.start)
+        document.load_finished.connect(timer.start)
+        if not document.is_loading():
+            self.request(document)
+        return True
+
+    def forget(self, document):
+        timer = self.timers.pop(document, None)
+        if timer is not None:
+            timer.stop()
+            timer.deleteLater()
+        self.revisions.pop(document, None)
+        self.keys.pop(document, None)
+        self.waiting.pop(document, None)
+
+    def request(self, document):
+        if document not in self.timers or document.is_loading() or self.stopped:
+            return
+        revision = document.text_document.revision()
+        if revision == self.revisions.get(document):
+            return  # Not edited since the last snapshot; skip copying it
+        self.revisions[document] = revision
+        text = document.text_document.toPlainText()
+        key = revision
+        if self.cache_size:
+            key = content_hash(text)
+            if key == self.keys.get(document):
+                return
+        self.keys[document] = key
+        self.waiting.pop(document, None)
+        # A cancelled future reports back at once, which changes self.running
+        for future, (job_document, _) in list(self.running.items()):
+            if job_document is document:
+                future.cancel()
+        if key in self.cache:
+            self.cache.move_to_end(key)
+            self.done(document, self.cache[key])
+            return
+        job = self.job(document, text)
+        if job is not None:
+            self.waiting[document] = (key, job)
+            self.submit_waiting()
+
+    def submit_waiting(self):
+        while self.waiting and len(self.running) < self.max_running:
+            document = next((document for document in self.waiting if document.is_visible()),
+                            next(iter(self.waiting)))
+            key, (function, *args) = self.waiting.pop(document)
+            try:
+                future = process_pool().submit(function, *args)
+            except RuntimeError:  # The pool is shutting down
+                return
+            self.running[future] = (document, key)
+            future.add_done_callback(self.on_future_done)
+
+    def on_future_done(self, future):
+        # On a pool thread: hand the future over to the GUI thread
+        if not self.stopped:
+            self.report(future)
+
+    def finish(self, future):
+        """Deliver the result of a job that reported back; False if ``future`` is not one of them."""
+        if future not in self.running:
+            return False
+        document, key = self.running.pop(future)
+        current = document in self.timers and self.keys.get(document) == key
+        if future.cancelled() or future.exception() is not None:
+            if current:
+                # The same text has to be handed out again on the next request
+                del self.keys[document]
+                self.revisions.pop(document, None)
+        else:
+            result = future.result()
+            if result is not None:
+                if self.cache_size:
+                    self.cache[key] = result
+                    if len(self.cache) > self.cache_size:
+                        self.cache.popitem(last=False)
+                if current:
+                    self.done(document, result)
+        self.submit_waiting()
+        return True
+
+    def stop(self):
+        self.stopped = True
+        self.waiting.clear()
+        for future in list(self.running):
+            future.cancel()
+
+
+class BackgroundRefresh:
+    """
+    Runs one QThread at a time for the newest value passed to refresh(),
+    a moment after the last call, as the project-wide symbol and word
+    tables do for a changed file index.  ``start(value)`` returns the
+    thread, not started yet; a refresh asked for while one runs starts
+    once it finishes.
+    """
+
+    def __init__(self, parent, delay_ms, start):
+        from PyQt5.QtCore import QTimer
+
+        self.start = start
+        self.thread = None
+        self.pending = None
+        self.timer = QTimer(parent)
+        self.timer.setSingleShot(True)
+        self.timer.setInterval(delay_ms)
+        self.timer.timeout.connect(self.start_pending)
+
+    def refresh(self, value):
+        self.pending = value
+        self.timer.start()
+
+    def start_pending(self):
+        if self.thread is not None or self.pending is None:
+            return  # Picked up again when the running thread finishes
+        value, self.pending = self.pending, None
+        self.thread = self.start(value)
+        self.thread.finished.connect(self.on_thread_finished)
+        self.thread.start()
+
+    def on_thread_finished(self):
+        self.thread.deleteLater()
+        self.thread = None
+        if self.pending is not None:
+            self.timer.start()
+
+    def stop(self):
+        self.timer.stop()
+        if self.thread is not None:
+            self.thread.requestInterruption()
+            self.thread.wait()
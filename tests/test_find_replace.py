@@ -0,0 +1,59 @@
+import re
+
+import pytest
+
+from ide.find_replace import find_matches, normalize_edits, shift_positions, splice
+
+
+def test_splice_applies_sorted_edits():
+    assert splice("hello world", [(0, 5, "HELLO"), (6, 11, "there")]) == "HELLO there"
+
+
+def test_splice_with_offset():
+    assert splice("world", [(10, 11, "W")], offset=10) == "World"
+
+
+def test_splice_counts_astral_characters_as_two_positions():
+    text = "a😀b😀c"
+    # Positions: a=0, 😀=1-2, b=3, 😀=4-5, c=6
+    assert splice(text, [(3, 4, "B"), (6, 7, "C")]) == "a😀B😀C"
+
+
+def test_splice_of_find_matches_is_a_replace_all():
+    text = "x😀 foo\nfoo bar foo"
+    matches = find_matches(text, re.compile("foo"), "spam")
+    assert splice(text, matches) == text.replace("foo", "spam")
+
+
+def test_normalize_edits_sorts_and_drops_overlaps_and_repeats():
+    edits = [(5, 8, "c"), (0, 2, "a"), (1, 3, "overlap"), (5, 8, "repeat"), (8, 8, "d")]
+    assert normalize_edits(edits) == [(0, 2, "a"), (5, 8, "c"), (8, 8, "d")]
+
+
+def test_normalize_edits_keeps_insertions_at_one_position_once():
+    assert normalize_edits([(4, 4, "x"), (4, 4, "x")]) == [(4, 4, "x")]
+
+
+@pytest.mark.parametrize("positions, expected", [
+    ([0], [0]),  # Before every edit
+    ([12], [13]),  # After both: +3 then -2
+    ([2], [2]),  # At the start of an edit: stays in front of its new text
+    ([3], [7]),  # Inside an edit: past its new text
+    ([12, 3, 9], [13, 7, 11]),  # Any order
+])
+def test_shift_positions(positions, expected):
+    edits = [(2, 4, "12345"), (8, 10, "")]
+    assert shift_positions(positions, edits) == expected
+
+
+def test_shift_positions_counts_utf16():
+    assert shift_positions([5], [(0, 1, "😀")]) == [6]
+
+
+def test_shift_positions_matches_splice():
+    text = "abcdefghij" * 3
+    edits = [(1, 3, "XY"), (5, 5, "ins"), (12, 20, ""), (25, 26, "long text")]
+    new_text = splice(text, edits)
+    marker_positions = [0, 4, 10, 22, 27]
+    for old, new in zip(marker_positions, shift_positions(marker_positions, edits)):
+        assert new_text[new] == text[old]
@@ -0,0 +1,120 @@
+import os
+
+import pytest
+
+from ide.fuzzy import FuzzyMatcher
+from ide.indexer import GitIgnore, ProjectIndex
+
+
+def write(path, text=""):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "w") as file:
+        file.write(text)
+
+
+@pytest.fixture
+def gitignore(tmp_path):
+    def make(rules, sub_rules=None):
+        write(str(tmp_path / ".gitignore"), rules)
+        ignore = GitIgnore(str(tmp_path))
+        ignore.load("")
+        if sub_rules is not None:
+            write(str(tmp_path / "sub" / ".gitignore"), sub_rules)
+            ignore.load("sub")
+        return ignore
+    return make
+
+
+def test_gitignore_patterns(gitignore):
+    ignore = gitignore("*.log\n/build\ndocs/*.tmp\ncache/\n**/gen/**\n# comment\n")
+    assert ignore.ignored("a.log", False)
+    assert ignore.ignored("deep/dir/a.log", False)
+    assert ignore.ignored("build", True)
+    assert not ignore.ignored("src/build", True)  # Anchored to the root
+    assert ignore.ignored("docs/x.tmp", False)
+    assert not ignore.ignored("docs/sub/x.tmp", False)
+    assert ignore.ignored("cache", True)
+    assert not ignore.ignored("cache", False)  # Directories only
+    assert ignore.ignored("a/gen/b.py", False)
+    assert not ignore.ignored("main.py", False)
+
+
+def test_gitignore_last_rule_wins_and_nested_files_apply_below(gitignore):
+    ignore = gitignore("*.log\n!keep.log\n", "!*.log\nsecret.txt\n")
+    assert not ignore.ignored("keep.log", False)
+    assert ignore.ignored("other.log", False)
+    assert not ignore.ignored("sub/other.log", False)
+    assert ignore.ignored("sub/secret.txt", False)
+    assert not ignore.ignored("secret.txt", False)
+
+
+def test_walk_skips_ignored_and_vcs_directories(tmp_path):
+    root = str(tmp_path)
+    for rel_path in ["main.py", "pkg/mod.py", ".git/HEAD", "venv/bin/python", "out/a.o", "pkg/b.log"]:
+        write(os.path.join(root, rel_path))
+    write(os.path.join(root, ".gitignore"), "out/\n*.log\n")
+    index = ProjectIndex(root)
+    assert index.walk("", GitIgnore(root))
+    assert sorted(index.files()) == [".gitignore", "main.py", "pkg/mod.py"]
+
+
+def test_walk_picks_up_files_rewritten_in_place(tmp_path):
+    root = str(tmp_path)
+    path = os.path.join(root, "pkg", "mod.py")
+    write(path, "old")
+    index = ProjectIndex(root)
+    index.walk("", GitIgnore(root))
+    dir_mtime = os.stat(os.path.dirname(path)).st_mtime
+    os.utime(path, (1, 1))  # A save in place changes the file's mtime, not the directory's
+    assert os.stat(os.path.dirname(path)).st_mtime == dir_mtime
+
+    reopened = index.copy()
+    reopened.walk("", GitIgnore(root))
+    assert reopened.dirs["pkg"][1]["mod.py"] == 1
+    assert index.dirs["pkg"][1]["mod.py"] != 1  # Entries are replaced, not mutated
+
+
+PATHS = ["src/main.py", "src/maintenance/tool.py", "docs/manual.md", "tests/test_main.py",
+         "src/app/models.py", "README.md"]
+
+
+def test_fuzzy_tiers():
+    matcher = FuzzyMatcher(PATHS)
+    # File names containing the query, earliest match first, then fuzzy file names, then fuzzy paths
+    assert matcher.match("main") == ["src/main.py", "tests/test_main.py", "src/maintenance/tool.py"]
+    assert matcher.match("mnl") == ["docs/manual.md", "src/maintenance/tool.py"]
+    # Only "test_main.py" matches as a file name; the rest match across their paths
+    assert matcher.match("smpy") == ["tests/test_main.py", "src/main.py", "src/maintenance/tool.py",
+                                     "src/app/models.py"]
+    assert matcher.match("xyz") == []
+    assert matcher.match("") == matcher.paths[:len(PATHS)]
+
+
+def test_fuzzy_path_query():
+    assert FuzzyMatcher(PATHS).match("maint/tool") == ["src/maintenance/tool.py"]
+
+
+def test_fuzzy_narrowing_reuses_the_previous_search():
+    matcher = FuzzyMatcher(PATHS + [f"gen/file{i}.txt" for i in range(5000)])
+    previous = matcher.search("mo")
+    while not previous.step():
+        pass
+    narrowed = matcher.search("mod", previous=previous)
+    assert narrowed.candidates is not None
+    while not narrowed.step():
+        pass
+    assert narrowed.results() == matcher.match("mod")
+
+
+def test_fuzzy_scan_matches_verify():
+    # Enough paths per character that the scan, not the candidate check, runs
+    paths = [f"dir{i % 7}/name_{i}.py" for i in range(5000)]
+    matcher = FuzzyMatcher(paths)
+    for query in ["n1", "d3/n", "name_42", "y"]:
+        expected = [p for p in matcher.paths if _subsequence(query, p.lower())]
+        assert set(matcher.match(query, limit=len(paths))) == set(expected)
+
+
+def _subsequence(query, text):
+    chars = iter(text)
+    return all(char in chars for char in query)
@@ -0,0 +1,120 @@
+import pytest
+
+from ui.output_pipeline import ANSI_COLORS, OutputPipeline
+
+
+def text_of(runs):
+    return "".join(text for text, _ in runs)
+
+
+def feed_all(pipeline, chunks):
+    runs = []
+    for i, chunk in enumerate(chunks):
+        runs.extend(pipeline.feed(chunk, final=i == len(chunks) - 1))
+    return runs
+
+
+def foreground(fmt):
+    return fmt.foreground().color().name() if fmt.foreground().style() else None
+
+
+def background(fmt):
+    return fmt.background().color().name() if fmt.background().style() else None
+
+
+@pytest.mark.parametrize("cut", range(1, 4))
+def test_utf8_split_across_chunks(cut):
+    data = "é€😀".encode("utf-8")
+    pipeline = OutputPipeline()
+    first = pipeline.feed(data[:cut])
+    rest = pipeline.feed(data[cut:], final=True)
+    assert "�" not in text_of(first + rest)
+    assert text_of(first + rest) == "é€😀"
+
+
+def test_invalid_utf8_is_replaced():
+    assert text_of(OutputPipeline().feed(b"a\xffb", final=True)) == "a�b"
+
+
+@pytest.mark.parametrize("cut", range(1, len("\x1b[31m")))
+def test_escape_split_across_chunks(cut):
+    data = b"plain\x1b[31mred"
+    cut += len("plain")
+    pipeline = OutputPipeline()
+    runs = feed_all(pipeline, [data[:cut], data[cut:]])
+    assert text_of(runs) == "plainred"
+    assert [(text, foreground(fmt)) for text, fmt in runs] == [("plain", None), ("red", ANSI_COLORS[1])]
+
+
+def test_unterminated_escape_is_held_back_then_flushed_as_text():
+    pipeline = OutputPipeline()
+    assert text_of(pipeline.feed(b"a\x1b[3")) == "a"
+    assert text_of(pipeline.feed(b"", final=True)) == "\x1b[3"
+
+
+def test_non_sgr_sequences_are_dropped():
+    runs = OutputPipeline().feed(b"\x1b]0;title\x07a\x1b[2Kb\x1b(Bc", final=True)
+    assert text_of(runs) == "abc"
+
+
+def test_256_colors():
+    pipeline = OutputPipeline()
+    runs = pipeline.feed(b"\x1b[38;5;196ma\x1b[48;5;244mb\x1b[38;5;3mc", final=True)
+    assert [(text, foreground(fmt), background(fmt)) for text, fmt in runs] == [
+        ("a", "#ff0000", None),
+        ("b", "#ff0000", "#808080"),
+        ("c", ANSI_COLORS[3], "#808080"),
+    ]
+
+
+def test_truecolor():
+    runs = OutputPipeline().feed(b"\x1b[1;38;2;18;52;86;48;2;300;0;0mx\x1b[0my", final=True)
+    (x, x_fmt), (y, y_fmt) = runs
+    assert (x, foreground(x_fmt), background(x_fmt)) == ("x", "#123456", "#ff0000")
+    assert x_fmt.fontWeight() > y_fmt.fontWeight()
+    assert (y, foreground(y_fmt), background(y_fmt)) == ("y", None, None)
+
+
+def test_adjacent_text_with_one_format_is_one_run():
+    runs = OutputPipeline().feed(b"a\x1b[31m\x1b[39mb\x1b[1m", final=True)
+    assert [text for text, _ in runs] == ["ab"]
+
+
+def test_cr_held_back_until_next_chunk():
+    pipeline = OutputPipeline()
+    assert text_of(pipeline.feed(b"line\r")) == "line"
+    assert text_of(pipeline.feed(b"\nnext", final=True)) == "\nnext"
+
+
+def test_lone_cr_comes_out_with_the_next_chunk():
+    pipeline = OutputPipeline()
+    pipeline.feed(b"progress\r")
+    assert text_of(pipeline.feed(b"done", final=True)) == "\rdone"
+
+
+def test_cr_flushed_when_final():
+    assert text_of(OutputPipeline().feed(b"x\r", final=True)) == "x\r"
+
+
+def test_reset_forgets_partial_input_and_style():
+    pipeline = OutputPipeline()
+    pipeline.feed(b"\x1b[31mred\xc3")
+    pipeline.reset()
+    runs = pipeline.feed(b"plain", final=True)
+    assert [(text, foreground(fmt)) for text, fmt in runs] == [("plain", None)]
+
+
+def test_scrollback_keeps_newest_lines(qapp):
+    from ui.output_view import OutputView
+
+    view = OutputView(scrollback_blocks=5)
+    view.queue_output("".join(f"line {i}\n" for i in range(20)).encode())
+    view.flush_output(final=True)
+    lines = view.toPlainText().split("\n")
+    assert len(lines) == 5
+    assert lines[:4] == ["line 16", "line 17", "line 18", "line 19"]
+
+    view.queue_output(b"line 20\n")
+    view.flush_output(final=True)
+    assert view.toPlainText().split("\n")[:4] == ["line 17", "line 18", "line 19", "line 20"]
+    view.deleteLater()
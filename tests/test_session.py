@@ -0,0 +1,71 @@
+import json
+
+import pytest
+
+from ide.session import SESSION_VERSION, empty_session, load_session, save_session
+
+
+def load_from(tmp_path, data):
+    path = tmp_path / "session.json"
+    path.write_text(data if isinstance(data, str) else json.dumps(data), encoding="utf-8")
+    return load_session(str(path))
+
+
+def test_round_trip(tmp_path):
+    session = {"version": SESSION_VERSION, "active_project": 1, "projects": [
+        {"path": "/p", "active_file": "/p/a.py", "files": [{"path": "/p/a.py", "cursor": 5, "scroll": 2}]},
+        {"path": "/q", "active_file": None, "files": []},
+    ]}
+    path = str(tmp_path / "session.json")
+    save_session(session, path)
+    assert load_session(path) == session
+    assert [p.name for p in tmp_path.iterdir()] == ["session.json"]  # No temporary file left over
+
+
+@pytest.mark.parametrize("data", ["", "{not json", "[]", '"text"', json.dumps({"version": SESSION_VERSION + 1})])
+def test_unreadable_or_newer_files_give_an_empty_session(tmp_path, data):
+    assert load_from(tmp_path, data) == empty_session()
+
+
+def test_missing_file_gives_an_empty_session(tmp_path):
+    assert load_session(str(tmp_path / "missing.json")) == empty_session()
+
+
+@pytest.mark.parametrize("value", [None, "x", "12abc", [], {}, 1e400])
+def test_bad_numbers_fall_back_to_zero(tmp_path, value):
+    session = load_from(tmp_path, {"version": SESSION_VERSION, "active_project": value, "projects": [
+        {"path": "/p", "files": [{"path": "/p/a.py", "cursor": value, "scroll": value}]}]})
+    assert session["active_project"] == 0
+    assert session["projects"][0]["files"] == [{"path": "/p/a.py", "cursor": 0, "scroll": 0}]
+
+
+def test_infinity_and_nan_in_the_file(tmp_path):
+    session = load_from(tmp_path, '{"version": %d, "active_project": Infinity, "projects": '
+                                  '[{"path": "/p", "files": [{"path": "/p/a.py", "cursor": NaN}]}]}' % SESSION_VERSION)
+    assert session["active_project"] == 0
+    assert session["projects"][0]["files"][0]["cursor"] == 0
+
+
+def test_numeric_strings_and_floats_are_coerced(tmp_path):
+    session = load_from(tmp_path, {"version": SESSION_VERSION, "active_project": "2", "projects": [
+        {"path": "/p", "files": [{"path": "/p/a.py", "cursor": 7.9, "scroll": "3"}]}]})
+    assert session["active_project"] == 2
+    assert session["projects"][0]["files"][0]["cursor"] == 7
+    assert session["projects"][0]["files"][0]["scroll"] == 3
+
+
+def test_malformed_entries_are_dropped(tmp_path):
+    session = load_from(tmp_path, {"version": SESSION_VERSION, "projects": [
+        "not a project",
+        {"path": 3},
+        {"path": "/p", "active_file": 42, "files": {"path": "/p/a.py"}},
+        {"path": "/q", "active_file": ["x"], "files": [None, {"path": None}, {"path": "/q/b.py"}]},
+    ]})
+    assert session["projects"] == [
+        {"path": "/p", "active_file": None, "files": []},
+        {"path": "/q", "active_file": None, "files": [{"path": "/q/b.py", "cursor": 0, "scroll": 0}]},
+    ]
+
+
+def test_projects_that_are_not_a_list(tmp_path):
+    assert load_from(tmp_path, {"version": SESSION_VERSION, "projects": {"path": "/p"}})["projects"] == []
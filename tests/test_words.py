@@ -0,0 +1,69 @@
+import random
+
+import pytest
+
+import ide.words as words
+from ide.words import PrefixIndex, complete_members, complete_words, count_words, find_imports
+
+
+def brute_force(counts, prefix, limit):
+    matching = [(word, count) for word, count in counts.items() if word.lower().startswith(prefix.lower())]
+    return sorted(count for _, count in matching)[::-1][:limit]
+
+
+def test_count_words_skips_short_words_and_numbers():
+    assert count_words("ab abc abc 123 _x1 x_y_z") == {"abc": 2, "_x1": 1, "x_y_z": 1}
+
+
+def test_lookup_is_case_insensitive_and_ranked_by_count():
+    index = PrefixIndex({"getValue": 5, "get_value": 9, "GetAll": 1, "other": 100})
+    assert index.lookup("GET") == [("get_value", 9), ("getValue", 5), ("GetAll", 1)]
+    assert index.lookup("get", limit=1) == [("get_value", 9)]
+    assert index.lookup("zzz") == []
+
+
+def test_count_distinguishes_case():
+    index = PrefixIndex({"Value": 3, "value": 4})
+    assert (index.count("Value"), index.count("value"), index.count("VALUE")) == (3, 4, 0)
+    assert len(index) == 2
+
+
+def test_precomputed_tops_match_brute_force(monkeypatch):
+    monkeypatch.setattr(words, "TOP_RANGE_MIN", 8)
+    rng = random.Random(0)
+    counts = {}
+    while len(counts) < 2000:
+        counts["".join(rng.choice("abcAB_") for _ in range(rng.randint(1, 6)))] = rng.randint(1, 1000)
+    index = PrefixIndex(counts)
+    assert index.top  # Ranges big enough to be precomputed exist
+    for prefix in ["", "a", "A", "ab", "b_", "_", "abca", "zz"] + list(counts)[:200]:
+        found = index.lookup(prefix, 10)
+        assert all(word.lower().startswith(prefix.lower()) for word, _ in found)
+        assert [count for _, count in found] == brute_force(counts, prefix, 10)
+
+
+def test_complete_words_ranks_nearby_words_first():
+    index = PrefixIndex({"parse_file": 50, "parse_line": 10})
+    nearby = "parse_line(a)\nparse_line(b)"
+    assert complete_words("par", [(index, 1.0)], nearby) == ["parse_line", "parse_file"]
+    assert complete_words("par", [(index, 1.0)]) == ["parse_file", "parse_line"]
+
+
+def test_complete_words_leaves_out_the_prefix_itself():
+    assert complete_words("value", [(PrefixIndex({"value": 5, "values": 1}), 1.0)]) == ["values"]
+
+
+def test_complete_members_puts_private_names_last():
+    names = ["_private", "path", "Popen", "pipe", "__doc__"]
+    assert complete_members("p", names) == ["path", "pipe", "Popen"]
+    assert complete_members("", names) == ["path", "pipe", "Popen", "__doc__", "_private"]
+
+
+@pytest.mark.parametrize("source, expected", [
+    ("import os.path", {"os": "os"}),
+    ("import numpy as np, sys", {"np": "numpy", "sys": "sys"}),
+    ("from os import path as p, sep", {"p": "os.path", "sep": "os.sep"}),
+    ("from . import sibling", {}),
+])
+def test_find_imports(source, expected):
+    assert find_imports(source) == expected
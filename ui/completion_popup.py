@@ -0,0 +1,149 @@
+import re
+
+from PyQt5.QtWidgets import QListWidget
+from PyQt5.QtGui import QTextCursor
+from PyQt5.QtCore import Qt, QEvent
+from ide.editor import CodeEditor
+
+MIN_PREFIX_CHARS = 2  # Typed characters before completions pop up by themselves
+NEARBY_LINES = 40  # Lines above and below the cursor whose words rank first
+VISIBLE_ROWS = 10
+
+_CONTEXT_RE = re.compile(r"(?:(?<![\w.])([^\W\d][\w.]*?)\.)?(\w*)$")
+_NAVIGATION_KEYS = (Qt.Key_Up, Qt.Key_Down, Qt.Key_PageUp, Qt.Key_PageDown)
+_ACCEPT_KEYS = (Qt.Key_Return, Qt.Key_Enter, Qt.Key_Tab)
+
+
+class CompletionPopup(QListWidget):
+    """
+    Completion list shown under the cursor of a CodeEditor.  It never
+    takes the focus: it filters the key events of the editors it is
+    attached to, lets the editor insert typed characters, then asks
+    ``complete(editor, prefix, qualifier, nearby_text)`` for the words to
+    offer.  Up/Down move through the list, Enter or Tab insert the word,
+    Escape closes it; Ctrl+Space asks for completions explicitly.
+    """
+
+    def __init__(self, complete, parent=None):
+        super().__init__(parent)
+        self.setWindowFlags(Qt.ToolTip)
+        self.setFocusPolicy(Qt.NoFocus)
+        self.setUniformItemSizes(True)
+        self.complete = complete
+        self.editor = None  # Editor the list was last shown for
+        self.prefix = ""
+        self.explicit = False  # Whether the list on screen was asked for with Ctrl+Space
+        self.waiting = None  # (editor, cursor position, explicit) that got no completions yet
+        self.itemClicked.connect(self.insert_item)
+
+    def attach(self, editor):
+        editor.installEventFilter(self)
+        editor.viewport().installEventFilter(self)
+        editor.destroyed.connect(lambda *args: self.forget(editor))
+
+    def forget(self, editor):
+        if self.editor is editor:
+            self.editor = None
+            self.hide()
+        if self.waiting is not None and self.waiting[0] is editor:
+            self.waiting = None
+
+    def eventFilter(self, obj, event):
+        if event.type() == QEvent.KeyPress and isinstance(obj, CodeEditor):
+            return self.on_key(obj, event)
+        if event.type() in (QEvent.FocusOut, QEvent.MouseButtonPress, QEvent.Wheel) and self.isVisible():
+            self.hide()
+        return super().eventFilter(obj, event)
+
+    def on_key(self, editor, event):
+        key = event.key()
+        if self.isVisible() and editor is self.editor:
+            if key in _NAVIGATION_KEYS:
+                step = {Qt.Key_Up: -1, Qt.Key_Down: 1, Qt.Key_PageUp: -VISIBLE_ROWS, Qt.Key_PageDown: VISIBLE_ROWS}[key]
+                self.setCurrentRow(max(0, min(self.count() - 1, self.currentRow() + step)))
+                return True
+            if key in _ACCEPT_KEYS and event.modifiers() == Qt.NoModifier:
+                self.insert_item(self.currentItem())
+                return True
+            if key == Qt.Key_Escape:
+                self.hide()
+                return True
+        if key == Qt.Key_Space and event.modifiers() == Qt.ControlModifier:
+            self.update_for(editor, explicit=True)
+            return True
+        text = event.text()
+        if (text and (text[0].isalnum() or text[0] in "_.")) or (key == Qt.Key_Backspace and self.isVisible()):
+            # Let the editor insert the character first; calling event() skips this filter
+            editor.event(event)
+            self.update_for(editor)
+            return True
+        if self.isVisible():
+            self.hide()
+        return False
+
+    def update_for(self, editor, explicit=False):
+        """Show the completions for the word before ``editor``'s cursor, or hide the list if there are none."""
+        self.waiting = None
+        cursor = editor.textCursor()
+        if editor.isReadOnly() or editor.extra_cursors or cursor.hasSelection():
+            self.hide()
+            return
+        block = cursor.block()
+        qualifier, prefix = _CONTEXT_RE.search(block.text()[:cursor.positionInBlock()]).groups()
+        if prefix[:1].isdigit() or (not explicit and not qualifier and len(prefix) < MIN_PREFIX_CHARS):
+            self.hide()
+            return
+        words = self.complete(editor, prefix, qualifier, self.nearby_text(block))
+        if not words:
+            self.hide()
+            self.waiting = (editor, cursor.position(), explicit)  # Module members may still arrive
+            return
+        self.editor = editor
+        self.prefix = prefix
+        self.explicit = explicit
+        self.setUpdatesEnabled(False)
+        self.clear()
+        self.addItems(words)
+        self.setCurrentRow(0)
+        self.setUpdatesEnabled(True)
+        self.place(editor)
+
+    def nearby_text(self, block):
+        lines = [block.text()]
+        before, after = block.previous(), block.next()
+        for _ in range(NEARBY_LINES):
+            if before.isValid():
+                lines.append(before.text())
+                before = before.previous()
+            if after.isValid():
+                lines.append(after.text())
+                after = after.next()
+        return "\n".join(lines)
+
+    def place(self, editor):
+        rows = min(self.count(), VISIBLE_ROWS)
+        frame = 2 * self.frameWidth()
+        width = max(200, self.sizeHintForColumn(0) + self.verticalScrollBar().sizeHint().width() + frame)
+        rect = editor.cursorRect()
+        position = editor.viewport().mapToGlobal(rect.bottomLeft())
+        self.setGeometry(position.x(), position.y(), width, rows * self.sizeHintForRow(0) + frame)
+        self.show()
+
+    def refresh(self):
+        """Redo the lookup, e.g. when module members arrive (see CompletionService.completions_changed)."""
+        if self.isVisible() and self.editor is not None:
+            self.update_for(self.editor, self.explicit)
+        elif self.waiting is not None:
+            editor, position, explicit = self.waiting
+            if editor.hasFocus() and editor.textCursor().position() == position:
+                self.update_for(editor, explicit)
+
+    def insert_item(self, item):
+        editor = self.editor
+        self.hide()
+        if item is None or editor is None:
+            return
+        cursor = editor.textCursor()
+        cursor.movePosition(QTextCursor.Left, QTextCursor.KeepAnchor, len(self.prefix))
+        cursor.insertText(item.text())
+        editor.setTextCursor(cursor)
@@ -1,24 +1,43 @@
 import os
-from PyQt5.QtCore import Qt, QEvent
+import time
+from collections import deque
+from PyQt5.QtCore import Qt, QTimer
 from PyQt5.QtWidgets import (
-    QWidget, QPlainTextEdit, QLineEdit
+    QWidget, QLineEdit, QStackedWidget, QVBoxLayout
 )
 from PyQt5.QtGui import QFont, QTextCursor
 from PyQt5.QtCore import QProcess
+from ide import perf
+from ui.output_view import OutputView, SCROLLBACK_BLOCKS
 
-class Console(QWidget):
+HIDDEN_BUFFER_BYTES = 4 << 20  # Newest output a hidden session keeps as raw bytes; older output is dropped
+SESSION_IDLE_SECONDS = 15 * 60  # Hidden sessions with no output or input for this long are closed...
+REAP_INTERVAL_MS = 60 * 1000  # ...checked this often
+
+class ShellSession(QWidget):
     """
     A 'read-only' console that displays PowerShell/Bash output in QPlainTextEdit,
     and overlays a QLineEdit exactly at the end of the last line (the shell prompt).
+
+    Process output goes through an OutputView, which batches appends and
+    keeps at most ``scrollback_blocks`` lines.  The shell starts in
+    ``working_dir`` the first time the session is shown; while the session
+    is hidden, its output is only collected as raw bytes.
     """
 
-    def __init__(self, parent=None):
+    def __init__(self, working_dir=None, parent=None, scrollback_blocks=SCROLLBACK_BLOCKS):
         super().__init__(parent)
+        self.working_dir = working_dir or os.path.expanduser("~")
+        self.last_active = time.monotonic()
+        self.hidden_output = deque()
+        self.hidden_bytes = 0
+        self.skipped_bytes = 0  # Dropped from hidden_output since the session was last shown
+        self.closing = False
 
         # Create the read-only text area
-        self.output_area = QPlainTextEdit(self)
-        self.output_area.setReadOnly(True)
-        self.output_area.setFont(QFont("Consolas", 12))
+        self.output_area = OutputView(self, scrollback_blocks)
+        # Keep the input box at the prompt after every append
+        self.output_area.appended.connect(self.position_input_line)
 
         # Create the input line that we overlay
         self.input_box = QLineEdit(self)
@@ -28,16 +47,13 @@ class Console(QWidget):
         # Make sure the input box is on top of the output_area
         self.input_box.raise_()
 
-        # Start the shell process
+        # The shell process, started on first show (see start_shell)
         self.process = QProcess(self)
         self.process.setProcessChannelMode(QProcess.MergedChannels)
-        if os.name == "nt":
-            self.process.start("powershell", ["-NoExit"])
-        else:
-            self.process.start("bash", ["--login"])
-
+        self.process.setWorkingDirectory(self.working_dir)
         self.process.readyReadStandardOutput.connect(self.on_process_output)
         self.process.readyReadStandardError.connect(self.on_process_output)
+        self.process.finished.connect(self.on_process_finished)
 
         # Keep track of commands for history
         self.command_history = []
@@ -57,8 +73,41 @@ class Console(QWidget):
         self.current_theme = "dark"
         self.apply_theme("dark")
 
+    def start_shell(self):
+        if self.process.state() != QProcess.NotRunning:
+            return
+        if os.name == "nt":
+            self.process.start("powershell", ["-NoExit"])
+        else:
+            self.process.start("bash", ["--login"])
         # Show an initial info message
-        self.append_text("[INFO] Shell started.\n")
+        self.append_text(f"[INFO] Shell started in {self.working_dir}.\n")
+
+    def showEvent(self, event):
+        super().showEvent(event)
+        self.start_shell()
+        self.touch()
+        # Render what arrived while hidden, in one append
+        data = b"".join(self.hidden_output)
+        self.hidden_output.clear()
+        self.hidden_bytes = 0
+        cut = -1
+        if self.output_area.maximumBlockCount() > 0:
+            cut = len(data)
+            for _ in range(self.output_area.maximumBlockCount()):
+                cut = data.rfind(b"\n", 0, cut)
+                if cut < 0:
+                    break
+        if cut >= 0:
+            # Lines the scrollback would drop right away are not rendered at all
+            self.skipped_bytes += cut + 1
+            data = data[cut + 1:]
+        if self.skipped_bytes:
+            self.append_text(f"\n[INFO] {self.skipped_bytes:,} bytes of output skipped while hidden.\n")
+            self.skipped_bytes = 0
+        if data:
+            self.output_area.queue_output(data)
+            self.output_area.flush_output()
 
     #
     # LAYOUT / RESIZING
@@ -95,24 +144,55 @@ class Console(QWidget):
     # PROCESS OUTPUT
     #
     def on_process_output(self):
-        data = self.process.readAll().data().decode("utf-8", errors="replace")
-        if data:
-            self.append_text(data)
+        self.queue_output(self.process.readAll().data())
+
+    def on_process_finished(self, exit_code, exit_status):
+        if self.closing:
+            return
+        self.on_process_output()
+        self.append_text(f"\n[INFO] Shell exited with code {exit_code}; press Enter to start a new one.\n")
+
+    def queue_output(self, data: bytes):
+        self.touch()
+        if self.isVisible():
+            self.output_area.queue_output(data)
+            return
+        # Hidden: no decoding or layout, just keep the newest bytes
+        self.hidden_output.append(data)
+        self.hidden_bytes += len(data)
+        while self.hidden_bytes > HIDDEN_BUFFER_BYTES and len(self.hidden_output) > 1:
+            dropped = len(self.hidden_output.popleft())
+            self.hidden_bytes -= dropped
+            self.skipped_bytes += dropped
+
+    def touch(self):
+        self.last_active = time.monotonic()
+
+    def is_idle(self):
+        """
+        True if the session is hidden, quiet for SESSION_IDLE_SECONDS and
+        its shell is not running a command.
+        """
+        if self.isVisible() or time.monotonic() - self.last_active < SESSION_IDLE_SECONDS:
+            return False
+        return self.process.state() == QProcess.NotRunning or has_child_processes(self.process.processId()) is False
 
+    def flush_output(self):
+        self.output_area.flush_output()
+
+    @perf.timed("console.append_text")
     def append_text(self, text: str):
-        self.output_area.moveCursor(QTextCursor.End)
-        self.output_area.insertPlainText(text)
-        # Force scroll to bottom so we see the prompt
-        self.output_area.verticalScrollBar().setValue(
-            self.output_area.verticalScrollBar().maximum()
-        )
-        # Update input box position
-        self.position_input_line()
+        self.output_area.append_text(text)
 
     #
     # USER TYPED A COMMAND
     #
     def on_enter_pressed(self):
+        self.touch()
+        if self.process.state() == QProcess.NotRunning:
+            self.input_box.clear()
+            self.start_shell()
+            return
         command = self.input_box.text().rstrip()
         if command:
             # Add to history
@@ -174,15 +254,102 @@ class Console(QWidget):
             self.output_area.setStyleSheet("QPlainTextEdit { background: white; color: black; }")
             self.input_box.setStyleSheet("QLineEdit { background: white; color: black; border: 1px solid gray; }")
 
-    #
-    # EXTERNAL API: cd to new path if needed
-    #
-    def update_path(self, new_path):
-        if self.process and self.process.state() == QProcess.Running:
-            self.process.write(f'cd "{new_path}"\n'.encode())
+    def close_shell(self):
+        """Terminate the shell, killing it if it does not exit promptly."""
+        self.closing = True
+        if self.process.state() != QProcess.NotRunning:
+            self.process.terminate()
+            if not self.process.waitForFinished(1000):
+                self.process.kill()
+                self.process.waitForFinished(1000)
 
     def closeEvent(self, event):
         """Clean up the process on close."""
-        if self.process and self.process.state() == QProcess.Running:
-            self.process.terminate()
+        self.close_shell()
         super().closeEvent(event)
+
+
+def has_child_processes(pid):
+    """
+    Whether process ``pid`` has children (the shell is running a command).
+    None where this cannot be told, which is treated as busy.
+    """
+    try:
+        with open(f"/proc/{pid}/task/{pid}/children") as file:
+            return bool(file.read().strip())
+    except OSError:
+        return None
+
+
+class Console(QWidget):
+    """
+    One ShellSession per project, each with its own shell, working
+    directory, scrollback and history.  A session is created the first time
+    its project is shown; switching projects only swaps the visible session,
+    nothing is written to the shells.  Sessions that stay idle are closed
+    and start afresh the next time their project is shown.
+    """
+
+    def __init__(self, project_path=None, parent=None, scrollback_blocks=SCROLLBACK_BLOCKS):
+        super().__init__(parent)
+        self.scrollback_blocks = scrollback_blocks
+        self.sessions = {}  # Project path (None outside any project) -> ShellSession
+        self.current_theme = "dark"
+
+        self.stack = QStackedWidget(self)
+        layout = QVBoxLayout(self)
+        layout.setContentsMargins(0, 0, 0, 0)
+        layout.addWidget(self.stack)
+
+        self.reap_timer = QTimer(self)
+        self.reap_timer.setInterval(REAP_INTERVAL_MS)
+        self.reap_timer.timeout.connect(self.reap_idle_sessions)
+        self.reap_timer.start()
+
+        self.show_project(project_path)
+
+    def session(self, project_path):
+        session = self.sessions.get(project_path)
+        if session is None:
+            session = ShellSession(project_path, scrollback_blocks=self.scrollback_blocks)
+            session.apply_theme(self.current_theme)
+            self.sessions[project_path] = session
+            self.stack.addWidget(session)
+        return session
+
+    def current_session(self):
+        return self.stack.currentWidget()
+
+    def show_project(self, project_path):
+        """Show the session of ``project_path``, creating it on first use."""
+        self.stack.setCurrentWidget(self.session(project_path))
+
+    def close_project(self, project_path):
+        session = self.sessions.pop(project_path, None)
+        if session is None:
+            return
+        showing = session is self.current_session()
+        self.stack.removeWidget(session)
+        session.close_shell()
+        session.deleteLater()
+        if showing:
+            self.show_project(None)
+
+    def reap_idle_sessions(self):
+        for project_path, session in list(self.sessions.items()):
+            if session.is_idle():
+                self.close_project(project_path)
+
+    #
+    # THEME TOGGLING
+    #
+    def toggle_theme(self):
+        self.current_theme = "light" if self.current_theme == "dark" else "dark"
+        for session in self.sessions.values():
+            session.apply_theme(self.current_theme)
+
+    def shutdown(self):
+        self.reap_timer.stop()
+        sessions, self.sessions = self.sessions, {}
+        for session in sessions.values():
+            session.close_shell()
@@ -0,0 +1,271 @@
+import re
+from bisect import bisect_left
+
+from PyQt5.QtWidgets import QWidget, QGridLayout, QLineEdit, QCheckBox, QPushButton, QLabel
+from PyQt5.QtGui import QTextCursor
+from PyQt5.QtCore import Qt, QThread, QTimer, pyqtSignal
+from ide.find_replace import compile_pattern, find_matches
+
+RESCAN_DELAY_MS = 150  # Quiet time after typing or an edit before the document is scanned again
+
+
+class FindThread(QThread):
+    """Scans a snapshot of one document's text for every match of a pattern."""
+
+    matches_found = pyqtSignal(object)  # [(start, end, new_text)], see find_matches
+    scan_failed = pyqtSignal(str)
+
+    def __init__(self, text, pattern, replacement, regex, parent=None):
+        super().__init__(parent)
+        self.text = text
+        self.pattern = pattern
+        self.replacement = replacement
+        self.regex = regex
+
+    def run(self):
+        try:
+            matches = find_matches(self.text, self.pattern, self.replacement, self.regex,
+                                   stop=self.isInterruptionRequested)
+        except (re.error, IndexError) as e:  # A bad group reference in the replacement
+            self.scan_failed.emit(str(e))
+            return
+        if matches is not None:
+            self.matches_found.emit(matches)
+
+
+class FindBar(QWidget):
+    """
+    Find and replace in one editor.  Every match is collected by a
+    FindThread from a snapshot of the text, rescanned shortly after each
+    edit; Replace All and Select All then act on the whole list in one
+    batch (SharedDocument.apply_edits, CodeEditor.set_cursor_ranges).
+    Actions asked for while a scan is outdated run when it comes back.
+    """
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.editor = None
+        self.thread = None
+        self.matches = []
+        self.matches_current = False  # False while the matches predate the query or an edit
+        self.pending_action = None  # Run with the next scan results
+
+        self.query_input = QLineEdit()
+        self.query_input.setPlaceholderText("Find")
+        self.query_input.textChanged.connect(self.schedule_scan)
+        self.query_input.returnPressed.connect(self.find_next)
+        self.replace_input = QLineEdit()
+        self.replace_input.setPlaceholderText("Replace")
+        self.replace_input.textChanged.connect(self.schedule_scan)
+        self.replace_input.returnPressed.connect(self.replace_current)
+        self.regex_check = QCheckBox("Regex")
+        self.case_check = QCheckBox("Match case")
+        self.word_check = QCheckBox("Words")
+        for check in (self.regex_check, self.case_check, self.word_check):
+            check.toggled.connect(self.schedule_scan)
+        self.status_label = QLabel()
+
+        buttons = []
+        for text, slot in (("Previous", self.find_previous), ("Next", self.find_next),
+                           ("Select All", lambda: self.run_with_matches(self.select_all)),
+                           ("Replace", self.replace_current),
+                           ("Replace All", lambda: self.run_with_matches(self.replace_all)),
+                           ("Close", self.close_bar)):
+            button = QPushButton(text)
+            button.setAutoDefault(False)
+            button.clicked.connect(slot)
+            buttons.append(button)
+        previous_button, next_button, select_button, replace_button, replace_all_button, close_button = buttons
+
+        layout = QGridLayout(self)
+        layout.setContentsMargins(4, 2, 4, 2)
+        layout.addWidget(self.query_input, 0, 0)
+        layout.addWidget(previous_button, 0, 1)
+        layout.addWidget(next_button, 0, 2)
+        layout.addWidget(select_button, 0, 3)
+        layout.addWidget(self.regex_check, 0, 4)
+        layout.addWidget(self.case_check, 0, 5)
+        layout.addWidget(self.word_check, 0, 6)
+        layout.addWidget(close_button, 0, 7)
+        layout.addWidget(self.replace_input, 1, 0)
+        layout.addWidget(replace_button, 1, 1)
+        layout.addWidget(replace_all_button, 1, 2, 1, 2)
+        layout.addWidget(self.status_label, 1, 4, 1, 4)
+        layout.setColumnStretch(0, 1)
+
+        self.rescan_timer = QTimer(self)
+        self.rescan_timer.setSingleShot(True)
+        self.rescan_timer.setInterval(RESCAN_DELAY_MS)
+        self.rescan_timer.timeout.connect(self.start_scan)
+
+    def set_editor(self, editor):
+        """Search ``editor`` (None for none) from now on."""
+        if editor is self.editor:
+            return
+        if self.editor is not None:
+            self.editor.document().contentsChanged.disconnect(self.schedule_scan)
+            self.editor.set_search_matches([])
+        self.editor = editor
+        self.cancel_scan()
+        self.matches = []
+        self.matches_current = False
+        self.pending_action = None
+        if editor is not None:
+            editor.document().contentsChanged.connect(self.schedule_scan)
+            if self.isVisible():
+                self.start_scan()
+
+    def show_bar(self, text="", replace=False):
+        self.show()
+        if text:
+            self.query_input.setText(text)
+        field = self.replace_input if replace else self.query_input
+        field.setFocus()
+        field.selectAll()
+        self.start_scan()
+
+    def close_bar(self):
+        self.hide()
+        self.cancel_scan()
+        self.pending_action = None
+        if self.editor is not None:
+            self.editor.set_search_matches([])
+            self.editor.setFocus()
+
+    def keyPressEvent(self, event):
+        if event.key() == Qt.Key_Escape:
+            self.close_bar()
+            return
+        super().keyPressEvent(event)
+
+    #
+    # SCANNING
+    #
+    def schedule_scan(self):
+        self.matches_current = False
+        if self.isVisible():
+            self.rescan_timer.start()
+
+    def start_scan(self):
+        self.rescan_timer.stop()
+        self.cancel_scan()
+        self.matches_current = False
+        query = self.query_input.text()
+        if self.editor is None or not query:
+            self.show_matches([])
+            return
+        regex = self.regex_check.isChecked()
+        try:
+            pattern = compile_pattern(query, regex, self.case_check.isChecked(), self.word_check.isChecked())
+        except re.error as e:
+            self.status_label.setText(f"Invalid regex: {e}")
+            self.pending_action = None
+            return
+        self.thread = FindThread(self.editor.document().toPlainText(), pattern, self.replace_input.text(), regex,
+                                 self)
+        self.thread.matches_found.connect(self.on_matches_found)
+        self.thread.scan_failed.connect(self.on_scan_failed)
+        self.thread.start()
+
+    def cancel_scan(self):
+        if self.thread is None:
+            return
+        thread, self.thread = self.thread, None
+        thread.requestInterruption()
+        thread.wait()
+        thread.deleteLater()
+
+    def is_current_thread(self):
+        # Signals queued by a cancelled scan may still arrive; ignore them
+        return self.thread is not None and self.sender() is self.thread
+
+    def on_matches_found(self, matches):
+        if not self.is_current_thread():
+            return
+        self.cancel_scan()
+        self.show_matches(matches)
+        action, self.pending_action = self.pending_action, None
+        if action is not None:
+            action()
+
+    def on_scan_failed(self, message):
+        if self.is_current_thread():
+            self.cancel_scan()
+            self.pending_action = None
+            self.status_label.setText(f"Invalid replacement: {message}")
+
+    def show_matches(self, matches):
+        self.matches = matches
+        self.matches_current = True
+        if self.editor is not None:
+            self.editor.set_search_matches(matches)
+        self.status_label.setText(f"{len(matches)} matches" if self.query_input.text() else "")
+
+    def run_with_matches(self, action):
+        """Run ``action`` now if the matches are up to date, else once they are."""
+        if self.matches_current and self.thread is None:
+            action()
+        else:
+            self.pending_action = action
+            if self.thread is None:
+                self.start_scan()
+
+    #
+    # ACTIONS
+    #
+    def find_next(self):
+        self.run_with_matches(lambda: self.select_match(forward=True))
+
+    def find_previous(self):
+        self.run_with_matches(lambda: self.select_match(forward=False))
+
+    def select_match(self, forward):
+        if self.editor is None or not self.matches:
+            return
+        starts = self.editor.search_starts
+        cursor = self.editor.textCursor()
+        # Both directions wrap around at the ends
+        if forward:
+            index = bisect_left(starts, cursor.selectionEnd()) % len(self.matches)
+        else:
+            index = (bisect_left(starts, cursor.selectionStart()) - 1) % len(self.matches)
+        start, end, _ = self.matches[index]
+        cursor.setPosition(start)
+        cursor.setPosition(end, QTextCursor.KeepAnchor)
+        self.editor.setTextCursor(cursor)
+        self.editor.centerCursor()
+        self.status_label.setText(f"{index + 1} of {len(self.matches)}")
+
+    def replace_current(self):
+        """Replace the selected match, then move on to the next one."""
+        def replace():
+            if self.editor is None or self.editor.isReadOnly():
+                return
+            cursor = self.editor.textCursor()
+            index = bisect_left(self.editor.search_starts, cursor.selectionStart())
+            if index < len(self.matches) and self.matches[index][:2] == (cursor.selectionStart(),
+                                                                        cursor.selectionEnd()):
+                self.editor.shared_document.apply_edits([self.matches[index]])
+                # The edit made the matches outdated; select the next one from the rescan
+                self.pending_action = lambda: self.select_match(forward=True)
+                self.start_scan()
+            else:
+                self.select_match(forward=True)
+        self.run_with_matches(replace)
+
+    def replace_all(self):
+        if self.editor is None or not self.matches or self.editor.isReadOnly():
+            return
+        count = len(self.editor.shared_document.apply_edits(self.matches))
+        self.pending_action = lambda: self.status_label.setText(f"Replaced {count}")
+        self.start_scan()
+
+    def select_all(self):
+        """Put a cursor on every match, for editing them together."""
+        if self.editor is None or not self.matches:
+            return
+        self.editor.set_cursor_ranges([(start, end) for start, end, _ in self.matches])
+        self.editor.setFocus()
+
+    def shutdown(self):
+        self.cancel_scan()
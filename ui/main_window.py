@@ -1,34 +1,117 @@
-import pickle
 import os
+import sys
 from PyQt5.QtWidgets import (
     QMainWindow, QTabWidget, QFileDialog, QVBoxLayout,
-    QWidget, QAction, QSplitter, QTreeView, QFileSystemModel, QSizePolicy
+    QWidget, QAction, QSplitter, QTreeView, QFileSystemModel, QSizePolicy, QMessageBox, QDockWidget,
+    QProgressDialog
 )
-from PyQt5.QtCore import Qt, QThread, pyqtSignal
+from PyQt5.QtCore import Qt, QEvent, QThread, QTimer, pyqtSignal
 from ide.editor import CodeEditor
-from ui.console import Console
-from ide.project import create_new_project
-
-SESSION_FILE = "session.pkl"
+from ide.documents import DocumentRegistry
+from ide.indexer import ProjectIndexer, ProjectIndex, GitIgnore
+from ide.fuzzy import FuzzyMatcher
+from ide.loader import SNIFF_BYTES
+from ide import perf, session
+from ide.workers import shutdown_process_pool
+from ide.completion import CompletionService, ProjectWords
+from ide.diagnostics import DiagnosticsService
+from ide.file_watch import FileWatcher
+from ide.symbol_index import OutlineService, ProjectSymbols, describe_symbol_entry, is_python_file
+from ui.completion_popup import CompletionPopup
+from ui.outline_panel import OutlinePanel
+from ui.quick_open import QuickOpenDialog
+
+# Panels that are not needed for the first frame (the console, search, run,
+# the performance HUD, project creation) are imported where they are first
+# created, which keeps their imports out of the cold start.
+
+MAX_PROJECT_LOADERS = 2  # Projects prepared at the same time; the rest wait their turn
+STARTUP_FALLBACK_MS = 1000  # Deferred startup begins this late if the window never paints
+MAX_TREE_WATCHED_DIRS = 512  # Directories the file model may have listed (and so watch) before it is rebuilt
 
 class ProjectLoaderThread(QThread):
+    """
+    Prepares a project off the GUI thread in stages, cheapest first, and
+    reports each one as soon as it is done so the UI can fill in gradually:
+    virtualenv discovery, the files to reopen, then the file index.
+    """
+
     project_loaded = pyqtSignal(str)
+    stage_started = pyqtSignal(str)  # Description of the running stage
+    venv_found = pyqtSignal(object)  # See find_virtualenv; None if there is none
+    files_ready = pyqtSignal(list)  # Session entries of the files to reopen that still exist
+    index_ready = pyqtSignal(object, object)  # ProjectIndex, FuzzyMatcher
 
-    def __init__(self, project_path):
-        super().__init__()
+    def __init__(self, project_path, open_files=(), active_file=None, parent=None):
+        super().__init__(parent)
         self.project_path = project_path
+        self.open_files = list(open_files)
+        self.active_file = active_file
 
     def run(self):
         """Load project in a separate thread to prevent UI freezing."""
+        from ide.project import find_virtualenv
+
+        self.stage_started.emit("Looking for a virtualenv")
+        self.venv_found.emit(find_virtualenv(self.project_path))
+
+        if self.open_files:
+            self.stage_started.emit("Restoring files")
+            existing = [entry for entry in self.open_files if os.path.isfile(entry["path"])]
+            if self.active_file:
+                try:
+                    # Only the active file is opened right away; warm the OS cache for it
+                    with open(self.active_file, "rb") as file:
+                        file.read(SNIFF_BYTES)
+                except OSError:
+                    pass
+            self.files_ready.emit(existing)
+
+        if self.isInterruptionRequested():
+            return
+        self.stage_started.emit("Indexing files")
+        index = ProjectIndex.load(self.project_path)
+        if not index.walk("", GitIgnore(self.project_path), stop=self.isInterruptionRequested):
+            return
+        if index.dirty:
+            try:
+                index.save()
+            except OSError:
+                pass
+        self.index_ready.emit(index, FuzzyMatcher(list(index.files())))
         self.project_loaded.emit(self.project_path)
 
+
+class EditorPlaceholder(QWidget):
+    """
+    Stands in for a restored editor tab until the tab is first shown, so a
+    session with many open files costs one real editor at startup.
+    """
+
+    def __init__(self, file_path, cursor=0, scroll=0):
+        super().__init__()
+        self.file_path = file_path
+        self.cursor = cursor
+        self.scroll = scroll
+
+    def view_state(self):
+        return self.cursor, self.scroll
+
+
 class MainWindow(QMainWindow):
+    """
+    Startup is staged: the constructor builds only the frame, and the console,
+    the file model and the session are set up one per event-loop turn after
+    the window first paints (see start_deferred_startup).
+    """
+
+    startup_finished = pyqtSignal()
+
     def __init__(self):
         super().__init__()
 
         self.setWindowTitle("My Custom IDE")
         self.setGeometry(50, 50, 1600, 900)
-        self.showMaximized()
 
         layout = QVBoxLayout()
 
@@ -36,35 +119,94 @@ class MainWindow(QMainWindow):
         self.project_tree = QTreeView()
         self.project_tree.setMinimumWidth(200)
         self.project_tree.doubleClicked.connect(self.open_selected_file)
+        self.project_tree.expanded.connect(self.on_tree_expanded)
 
-        self.file_model = QFileSystemModel()
-        self.file_model.setReadOnly(False)
-        self.project_tree.setModel(self.file_model)
+        self.file_model = None  # Created after the first frame
+        self.listed_dirs = set()  # Directories the file model has listed, see rebuild_file_model
 
         self.project_tabs = QTabWidget()
         self.project_tabs.setTabsClosable(True)
         self.project_tabs.tabCloseRequested.connect(self.close_project_tab)
         self.project_tabs.currentChanged.connect(self.update_project_view)
 
-        self.splitter.addWidget(self.project_tree)
+        self.outline_panel = OutlinePanel()
+        self.outline_panel.symbol_activated.connect(self.go_to_outline_symbol)
+        self.side_splitter = QSplitter(Qt.Vertical)
+        self.side_splitter.addWidget(self.project_tree)
+        self.side_splitter.addWidget(self.outline_panel)
+
+        self.splitter.addWidget(self.side_splitter)
         self.splitter.addWidget(self.project_tabs)
         self.splitter.setStretchFactor(1, 4)
 
         layout.addWidget(self.splitter)
 
-        self.console = Console()
-        self.console.setMinimumHeight(100)
-        self.console.setSizePolicy(QSizePolicy.Expanding, QSizePolicy.Preferred)
-        layout.addWidget(self.console)
+        self.console = None  # Created after the first frame, inside console_area
+        self.console_area = QWidget()
+        self.console_area.setMinimumHeight(100)
+        self.console_area.setSizePolicy(QSizePolicy.Expanding, QSizePolicy.Preferred)
+        console_layout = QVBoxLayout(self.console_area)
+        console_layout.setContentsMargins(0, 0, 0, 0)
+        layout.addWidget(self.console_area)
 
         central_widget = QWidget()
         central_widget.setLayout(layout)
         self.setCentralWidget(central_widget)
 
+        self.indexers = {}  # Project path -> ProjectIndexer
+        self.project_envs = {}  # Project path -> find_virtualenv() result
+        self.project_loaders = {}  # Project path -> running ProjectLoaderThread
+        self.swapping_tabs = False  # Set while tabs are rearranged, see materialize_tab
+        self.documents = DocumentRegistry(parent=self)
+        self.documents.unload_requested.connect(self.unload_document)
+        self.queued_projects = []  # (path, open_files, active_file) waiting for a loader
+        self.project_symbols = {}  # Project path -> ProjectSymbols
+        self.project_words = {}  # Project path -> ProjectWords
+        self.outline_service = OutlineService(self)
+        self.project_creators = []  # Running ProjectCreatorThreads
+        self.outline_service.outline_changed.connect(self.on_outline_changed)
+        self.diagnostics_service = DiagnosticsService(self)
+        self.diagnostics_service.diagnostics_changed.connect(self.on_diagnostics_changed)
+        self.completion_service = CompletionService(self)
+        self.completion_popup = CompletionPopup(self.complete_word, self)
+        self.completion_service.completions_changed.connect(self.completion_popup.refresh)
+        self.file_watcher = FileWatcher(self)
+        self.file_watcher.reloaded.connect(
+            lambda document: self.show_file_status(document, "reloaded, it changed on disk"))
+        self.file_watcher.conflicted.connect(
+            lambda document: self.show_file_status(document, "changed on disk, but has unsaved changes here"))
+        self.file_watcher.removed.connect(
+            lambda document: self.show_file_status(document, "was deleted on disk"))
+        # The project indexers only watch directories, which a file rewritten in place leaves alone
+        for signal in (self.file_watcher.written, self.file_watcher.reloaded, self.file_watcher.conflicted):
+            signal.connect(self.on_file_written)
+
+        # Docks and the find bar are created the first time they are shown
+        self.find_bar = None
+        self.search_panel = None
+        self.search_dock = None
+        self.runner = None
+        self.run_panel = None
+        self.run_dock = None
+        self.perf_dock = None
+
+        self.stall_detector = perf.StallDetector(parent=self)
+        if perf.enabled:
+            self.stall_detector.start()
+
         self.menu_bar = self.menuBar()
         self.setup_menus()
 
-        self.load_session()
+        # (mark, stage) run in order once the window has painted; the session comes before the
+        # console so the console starts its shell in the restored project, not twice
+        self.startup_stages = [
+            ("file model", self.create_file_model),
+            ("session restored", self.load_session),
+            ("console", self.create_console),
+        ]
+        self.startup_scheduled = False
+        # Normally started by the first paint; this covers a window that is never shown
+        QTimer.singleShot(STARTUP_FALLBACK_MS, self.start_deferred_startup)
 
     def setup_menus(self):
         file_menu = self.menu_bar.addMenu("File")
@@ -88,13 +230,146 @@ class MainWindow(QMainWindow):
         close_file_action = QAction("Close File", self)
         close_file_action.triggered.connect(lambda: self.close_file())
         file_menu.addAction(close_file_action)
+
+        go_to_file_action = QAction("Go to File...", self)
+        go_to_file_action.setShortcut("Ctrl+P")
+        go_to_file_action.triggered.connect(self.go_to_file)
+        file_menu.addAction(go_to_file_action)
+
+        go_to_symbol_action = QAction("Go to Symbol...", self)
+        go_to_symbol_action.setShortcut("Ctrl+T")
+        go_to_symbol_action.triggered.connect(self.go_to_symbol)
+        file_menu.addAction(go_to_symbol_action)
+
+        find_action = QAction("Find...", self)
+        find_action.setShortcut("Ctrl+F")
+        find_action.triggered.connect(lambda: self.show_find_bar())
+        file_menu.addAction(find_action)
+
+        replace_action = QAction("Replace...", self)
+        replace_action.setShortcut("Ctrl+H")
+        replace_action.triggered.connect(lambda: self.show_find_bar(replace=True))
+        file_menu.addAction(replace_action)
+
+        find_in_project_action = QAction("Find in Project...", self)
+        find_in_project_action.setShortcut("Ctrl+Shift+F")
+        find_in_project_action.triggered.connect(self.find_in_project)
+        file_menu.addAction(find_in_project_action)
         
+        run_menu = self.menu_bar.addMenu("Run")
+
+        run_file_action = QAction("Run Current File", self)
+        run_file_action.setShortcut("F5")
+        run_file_action.triggered.connect(self.run_current_file)
+        run_menu.addAction(run_file_action)
+
+        warm_action = QAction("Use Warm Interpreters", self)
+        warm_action.setCheckable(True)
+        warm_action.toggled.connect(self.set_warm_interpreters)
+        run_menu.addAction(warm_action)
+
         view_menu = self.menu_bar.addMenu("View")
 
         toggle_theme_action = QAction("Toggle Theme", self)
-        toggle_theme_action.triggered.connect(self.console.toggle_theme)
+        toggle_theme_action.triggered.connect(self.toggle_theme)
         view_menu.addAction(toggle_theme_action)
 
+        perf_hud_action = QAction("Performance HUD", self)
+        perf_hud_action.setShortcut("Ctrl+Shift+H")
+        perf_hud_action.triggered.connect(self.toggle_perf_hud)
+        view_menu.addAction(perf_hud_action)
+
+    #
+    # STARTUP
+    #
+    def paintEvent(self, event):
+        super().paintEvent(event)
+        if not self.startup_scheduled:
+            perf.mark("first frame")
+            self.start_deferred_startup()
+
+    def start_deferred_startup(self):
+        if not self.startup_scheduled:
+            self.startup_scheduled = True
+            QTimer.singleShot(0, self.run_next_startup_stage)
+
+    def run_next_startup_stage(self):
+        """Run one startup stage per event-loop turn, so input and painting get in between."""
+        if not self.startup_stages:
+            self.startup_finished.emit()
+            return
+        name, stage = self.startup_stages.pop(0)
+        stage()
+        perf.mark(name)
+        QTimer.singleShot(0, self.run_next_startup_stage)
+
+    def create_file_model(self):
+        self.file_model = QFileSystemModel()
+        self.file_model.setReadOnly(False)
+        self.project_tree.setModel(self.file_model)
+        self.listed_dirs = set()
+
+    def on_tree_expanded(self, index):
+        self.listed_dirs.add(self.file_model.filePath(index))
+        if len(self.listed_dirs) > MAX_TREE_WATCHED_DIRS:
+            self.rebuild_file_model()
+
+    def expanded_dirs(self):
+        """Paths of the directories expanded in the project tree."""
+        model = self.file_model
+        paths = []
+        parents = [self.project_tree.rootIndex()]
+        while parents:
+            parent = parents.pop()
+            for row in range(model.rowCount(parent)):
+                index = model.index(row, 0, parent)
+                if self.project_tree.isExpanded(index):
+                    paths.append(model.filePath(index))
+                    parents.append(index)
+        return paths
+
+    def rebuild_file_model(self):
+        """
+        QFileSystemModel watches, and refreshes on every change, each
+        directory it has ever listed, collapsed or not.  Replacing it with a
+        fresh model that lists only the directories expanded now bounds that
+        to the visible part of the tree.
+        """
+        expanded = self.expanded_dirs()
+        if len(expanded) > MAX_TREE_WATCHED_DIRS // 2:
+            return  # Most of them are still open; a new model would watch as many
+        root = self.file_model.rootPath()
+        current = self.file_model.filePath(self.project_tree.currentIndex())
+        old_model = self.file_model
+        self.create_file_model()
+        self.show_project_tree(root)
+        for path in expanded:
+            self.project_tree.expand(self.file_model.index(path))
+        if current:
+            self.project_tree.setCurrentIndex(self.file_model.index(current))
+        old_model.deleteLater()
+
+    def create_console(self):
+        from ui.console import Console
+
+        self.console = Console(self.current_project_path())
+        self.console_area.layout().addWidget(self.console)
+
+    def toggle_theme(self):
+        if self.console is not None:
+            self.console.toggle_theme()
+
+    def toggle_perf_hud(self):
+        if self.perf_dock is None:
+            from ui.perf_hud import PerfHud
+
+            self.perf_dock = QDockWidget("Performance", self)
+            self.perf_dock.setObjectName("perf_dock")
+            self.perf_dock.setWidget(PerfHud(self.stall_detector))
+            self.addDockWidget(Qt.BottomDockWidgetArea, self.perf_dock)
+        else:
+            self.perf_dock.setVisible(not self.perf_dock.isVisible())
+
     def new_file(self):
         """Create a new file inside the currently active project."""
         current_index = self.project_tabs.currentIndex()
@@ -123,22 +398,40 @@ class MainWindow(QMainWindow):
                 file.write("# New Python file\n")
 
             # Open the new file in the editor
-            editor = CodeEditor()
-            with open(file_name, "r") as file:
-                editor.setPlainText(file.read())
-
-            current_project.addTab(editor, os.path.basename(file_name))
-            current_project.setCurrentWidget(editor)
+            self.add_editor_tab(current_project, file_name)
 
             # Refresh the project file tree
-            self.file_model.setRootPath(project_path)
-            self.project_tree.setRootIndex(self.file_model.index(project_path))
+            self.show_project_tree(project_path)
 
     def new_project(self):
-        """Create a new project and open it automatically."""
-        project_path = create_new_project()
-        if project_path:
-            self.load_project(project_path)
+        """Create a new project in the background and open it when it is ready."""
+        from ide.project import ProjectCreatorThread
+        from ui.new_project_dialog import NewProjectDialog
+
+        dialog = NewProjectDialog(self)
+        if not dialog.exec_():
+            return
+        creator = ProjectCreatorThread(**dialog.options(), parent=self)
+        name = os.path.basename(creator.project_path)
+        progress = QProgressDialog(f"Creating {name}...", "Cancel", 0, 0, self)
+        progress.setWindowTitle("New Project")
+        progress.setMinimumDuration(0)
+        progress.setModal(False)
+        progress.canceled.connect(creator.requestInterruption)
+        creator.stage_started.connect(lambda stage: progress.setLabelText(f"{name}: {stage}..."))
+        creator.project_created.connect(self.load_project)
+        creator.creation_failed.connect(
+            lambda message: QMessageBox.warning(self, "New Project", f"Could not create {name}:\n{message}"))
+        creator.finished.connect(lambda: self.on_project_creator_finished(creator, progress))
+        self.project_creators.append(creator)
+        creator.start()
+        progress.show()
+
+    def on_project_creator_finished(self, creator, progress):
+        self.project_creators.remove(creator)
+        progress.reset()
+        progress.deleteLater()
+        creator.deleteLater()
 
     def open_project(self):
         project_path = QFileDialog.getExistingDirectory(self, "Select Project Directory")
@@ -152,12 +445,19 @@ class MainWindow(QMainWindow):
         if file_name:
             self.open_file_in_editor(file_name)
 
+    def show_project_tree(self, project_path):
+        if self.file_model is not None:
+            self.listed_dirs.add(project_path)
+            self.file_model.setRootPath(project_path)
+            self.project_tree.setRootIndex(self.file_model.index(project_path))
+
     def open_selected_file(self, index):
         file_path = self.file_model.filePath(index)
         if os.path.isfile(file_path):
             self.open_file_in_editor(file_path)
 
-    def open_file_in_editor(self, file_path):
+    @perf.timed("window.open_file_in_editor")
+    def open_file_in_editor(self, file_path, line=None, column=0):
         current_index = self.project_tabs.currentIndex()
         if current_index < 0:
             return  # Ensure a project exists before opening a file
@@ -166,11 +466,303 @@ class MainWindow(QMainWindow):
         if not isinstance(current_project, QTabWidget):
             return
 
-        with open(file_path, "r") as file:
-            editor = CodeEditor()
-            editor.setPlainText(file.read())
-            current_project.addTab(editor, os.path.basename(file_path))
-            current_project.setCurrentWidget(editor)
+        editor = self.find_editor(current_project, file_path)
+        if editor is None:
+            editor = self.add_editor_tab(current_project, file_path)
+        else:
+            current_project.setCurrentWidget(editor)  # Materializes a placeholder
+            editor = current_project.currentWidget()
+        if line is not None:
+            editor.go_to_line(line, column)
+            editor.setFocus()
+
+    def find_editor(self, project_tab, file_path):
+        """Return the editor (or placeholder) showing ``file_path`` in ``project_tab``, if any."""
+        real_path = os.path.realpath(file_path)
+        for i in range(project_tab.count()):
+            editor = project_tab.widget(i)
+            if (isinstance(editor, (CodeEditor, EditorPlaceholder)) and editor.file_path
+                    and os.path.realpath(editor.file_path) == real_path):
+                return editor
+        return None
+
+    def current_project_path(self):
+        current_index = self.project_tabs.currentIndex()
+        if current_index < 0:
+            return None
+        return self.project_tabs.tabBar().tabData(current_index)
+
+    def current_project_files(self):
+        """The current project root and its indexed files (None until indexed)."""
+        project_path = self.current_project_path()
+        if not project_path:
+            return None, None
+        indexer = self.indexers.get(project_path)
+        if indexer is None or indexer.index is None:
+            return project_path, None
+        return project_path, list(indexer.index.files())
+
+    def selected_query(self):
+        """The current editor's selection, if it can serve as a search query."""
+        editor = self.current_editor()
+        selected = editor.textCursor().selectedText() if editor is not None else ""
+        return "" if "\u2029" in selected else selected  # Multi-line selections are not useful as a query
+
+    def show_find_bar(self, replace=False):
+        editor = self.current_editor()
+        if editor is None:
+            return
+        if self.find_bar is None:
+            from ui.find_bar import FindBar
+
+            self.find_bar = FindBar()
+            self.centralWidget().layout().insertWidget(1, self.find_bar)
+        self.find_bar.set_editor(editor)
+        self.find_bar.show_bar(self.selected_query(), replace)
+
+    def update_find_bar(self):
+        if self.find_bar is not None:
+            self.find_bar.set_editor(self.current_editor())
+
+    def find_in_project(self):
+        selected = self.selected_query()
+        if self.search_dock is None:
+            from ui.search_panel import SearchPanel
+
+            self.search_panel = SearchPanel(self.current_project_files)
+            self.search_panel.open_requested.connect(self.open_file_in_editor)
+            self.search_dock = QDockWidget("Find in Project", self)
+            self.search_dock.setObjectName("search_dock")
+            self.search_dock.setWidget(self.search_panel)
+            self.addDockWidget(Qt.BottomDockWidgetArea, self.search_dock)
+        self.search_dock.show()
+        self.search_panel.focus_query(selected)
+
+    def go_to_file(self):
+        """Fuzzy-find a file of the current project by name or path."""
+        project_path = self.current_project_path()
+        indexer = self.indexers.get(project_path)
+        if indexer is None:
+            return
+        if not indexer.is_ready():
+            self.statusBar().showMessage("Indexing project...", 2000)
+            return
+
+        matcher = indexer.matcher
+        dialog = QuickOpenDialog(
+            "Go to File", lambda query, previous: matcher.search(query, previous=previous), parent=self
+        )
+        dialog.chosen.connect(
+            lambda rel_path: self.open_file_in_editor(os.path.join(project_path, rel_path))
+        )
+        dialog.exec_()
+        dialog.deleteLater()
+
+    def go_to_symbol(self):
+        """Fuzzy-find a class or function anywhere in the current project."""
+        project_path = self.current_project_path()
+        symbols = self.project_symbols.get(project_path)
+        if symbols is None:
+            return
+        if not symbols.is_ready():
+            self.statusBar().showMessage("Indexing symbols...", 2000)
+            return
+
+        matcher, locations = symbols.matcher, symbols.locations
+
+        def open_symbol(entry):
+            rel_path, line, column = locations[entry]
+            self.open_file_in_editor(os.path.join(project_path, rel_path), line, column)
+
+        dialog = QuickOpenDialog(
+            "Go to Symbol", lambda query, previous: matcher.search(query, previous=previous),
+            describe_symbol_entry, parent=self
+        )
+        dialog.chosen.connect(open_symbol)
+        dialog.exec_()
+        dialog.deleteLater()
+
+    #
+    # RUN
+    #
+    def project_python(self, project_path):
+        """The project's virtualenv interpreter, or the one running the IDE."""
+        venv = self.project_envs.get(project_path)
+        return venv["python"] if venv else sys.executable
+
+    def run_current_file(self):
+        """Save the current editor's file and run it with the project's interpreter."""
+        editor = self.current_editor()
+        if editor is None or not editor.file_path or editor.is_loading():
+            return
+        if editor.shared_document.is_modified():
+            try:
+                editor.shared_document.save()
+            except OSError as e:
+                QMessageBox.warning(self, "Run", f"Could not save {editor.file_path}:\n{e}")
+                return
+        project_path = self.current_project_path()
+        self.create_runner()
+        self.runner.submit(editor.file_path, self.project_python(project_path), project_path)
+        self.run_dock.show()
+
+    def create_runner(self):
+        if self.runner is not None:
+            return
+        from ide.runner import RunManager
+        from ui.run_panel import RunPanel
+
+        self.runner = RunManager(parent=self)
+        self.run_panel = RunPanel(self.runner)
+        self.run_dock = QDockWidget("Run", self)
+        self.run_dock.setObjectName("run_dock")
+        self.run_dock.setWidget(self.run_panel)
+        self.addDockWidget(Qt.BottomDockWidgetArea, self.run_dock)
+        self.run_dock.hide()
+
+    def set_warm_interpreters(self, enabled):
+        if not enabled and self.runner is None:
+            return
+        self.create_runner()
+        project_path = self.current_project_path()
+        python = self.project_python(project_path) if project_path else None
+        self.runner.set_warm(enabled, python, project_path)
+
+    #
+    # OUTLINE
+    #
+    def current_editor(self):
+        project_tab = self.project_tabs.currentWidget()
+        if isinstance(project_tab, QTabWidget) and isinstance(project_tab.currentWidget(), CodeEditor):
+            return project_tab.currentWidget()
+        return None
+
+    def update_outline(self):
+        editor = self.current_editor()
+        document = editor.shared_document if editor is not None else None
+        self.outline_panel.show_symbols(self.outline_service.outline(document) if document else None)
+
+    def on_outline_changed(self, document):
+        editor = self.current_editor()
+        if editor is not None and editor.shared_document is document:
+            self.update_outline()
+
+    def on_diagnostics_changed(self, document):
+        diagnostics = self.diagnostics_service.diagnostics_for(document)
+        for view in document.views:
+            view.set_diagnostics(diagnostics)
+
+    def complete_word(self, editor, prefix, qualifier, nearby_text):
+        """Completions for CompletionPopup, from the project the editor belongs to."""
+        project_path = next((self.project_tabs.tabBar().tabData(i) for i in range(self.project_tabs.count())
+                             if isinstance(self.project_tabs.widget(i), QTabWidget)
+                             and self.project_tabs.widget(i).indexOf(editor) >= 0), None)
+        words = self.project_words.get(project_path)
+        venv = self.project_envs.get(project_path)
+        return self.completion_service.complete(
+            editor.shared_document, prefix, qualifier, nearby_text,
+            words.index if words is not None else None, project_path, venv["path"] if venv else None)
+
+    def on_file_written(self, document):
+        for indexer in self.indexers.values():
+            indexer.on_file_written(document.file_path)
+
+    def show_file_status(self, document, message):
+        self.statusBar().showMessage(f"{os.path.basename(document.file_path)} {message}", 5000)
+
+    def changeEvent(self, event):
+        super().changeEvent(event)
+        if event.type() == QEvent.ActivationChange and self.isActiveWindow():
+            # Files beyond the watch limit are only compared when the user comes back
+            self.file_watcher.check_all()
+
+    def go_to_outline_symbol(self, line, column):
+        editor = self.current_editor()
+        if editor is not None:
+            editor.go_to_line(line, column)
+            editor.setFocus()
+
+    def add_editor_tab(self, project_tab, file_path, index=-1):
+        """
+        Add an editor tab for ``file_path``.  Editors of the same file share
+        one document, which loads in the background the first time.
+        """
+        editor = CodeEditor(self.documents.open(file_path))
+        title = os.path.basename(file_path)
+        project_tab.insertTab(index, editor, title)
+        project_tab.setCurrentWidget(editor)
+
+        def set_title(text):
+            index = project_tab.indexOf(editor)
+            if index >= 0:
+                project_tab.setTabText(index, text)
+
+        def on_failed(message):
+            set_title(title)
+            QMessageBox.warning(self, "Open File", f"Could not read {file_path}:\n{message}")
+
+        editor.load_progress.connect(lambda percent: set_title(f"{title} ({percent}%)"))
+        editor.load_finished.connect(lambda: set_title(title))
+        editor.load_failed.connect(on_failed)
+        if is_python_file(file_path):
+            self.outline_service.watch(editor.shared_document)
+            self.diagnostics_service.watch(editor.shared_document)
+            editor.set_diagnostics(self.diagnostics_service.diagnostics_for(editor.shared_document))
+        self.file_watcher.watch(editor.shared_document)
+        self.completion_service.watch(editor.shared_document)
+        self.completion_popup.attach(editor)
+        self.documents.schedule_trim()
+        self.update_outline()
+        self.update_find_bar()
+        return editor
+
+    def add_placeholder_tab(self, project_tab, entry):
+        """Add a restored file as a placeholder; it becomes an editor when first shown."""
+        placeholder = EditorPlaceholder(entry["path"], entry["cursor"], entry["scroll"])
+        project_tab.addTab(placeholder, os.path.basename(entry["path"]))
+        return placeholder
+
+    def materialize_tab(self, project_tab, index):
+        """Replace the placeholder at ``index`` with a real editor."""
+        placeholder = project_tab.widget(index)
+        if self.swapping_tabs or not isinstance(placeholder, EditorPlaceholder):
+            return
+        editor = self.add_editor_tab(project_tab, placeholder.file_path, index)
+        project_tab.removeTab(project_tab.indexOf(placeholder))
+        placeholder.deleteLater()
+        editor.restore_view_state(*placeholder.view_state())
+
+    def unload_document(self, document):
+        """Turn every editor of ``document`` back into a placeholder, freeing the document."""
+        self.swapping_tabs = True
+        for i in range(self.project_tabs.count()):
+            project_tab = self.project_tabs.widget(i)
+            if not isinstance(project_tab, QTabWidget):
+                continue
+            for j in range(project_tab.count()):
+                editor = project_tab.widget(j)
+                if isinstance(editor, CodeEditor) and editor.shared_document is document:
+                    cursor, scroll = editor.view_state()
+                    placeholder = EditorPlaceholder(editor.file_path, cursor, scroll)
+                    current = project_tab.currentIndex() == j
+                    project_tab.insertTab(j, placeholder, project_tab.tabText(j))
+                    if current:
+                        project_tab.setCurrentIndex(j)
+                    self.close_editor(project_tab, j + 1)
+        self.swapping_tabs = False
+
+    def close_editor(self, project_tab, index):
+        """Remove an editor tab; its document goes when no other editor shows it."""
+        editor = project_tab.widget(index)
+        if self.find_bar is not None and self.find_bar.editor is editor:
+            self.find_bar.set_editor(None)
+        project_tab.removeTab(index)
+        if isinstance(editor, CodeEditor):
+            document = editor.shared_document
+            editor.release_document()
+            self.documents.release(document)
+        if isinstance(editor, (CodeEditor, EditorPlaceholder)):
+            editor.deleteLater()
 
     def close_file(self, index=None):
         current_index = self.project_tabs.currentIndex()
@@ -181,12 +773,76 @@ class MainWindow(QMainWindow):
             if index is None:
                 index = current_project.currentIndex()
             if index >= 0:
-                current_project.removeTab(index)
+                self.close_editor(current_project, index)
 
     def close_project_tab(self, index):
+        project_path = self.project_tabs.tabBar().tabData(index)
+        project_tab = self.project_tabs.widget(index)
         self.project_tabs.removeTab(index)
+        if isinstance(project_tab, QTabWidget):
+            while project_tab.count():
+                self.close_editor(project_tab, 0)
+            project_tab.deleteLater()
+        if all(self.project_tabs.tabBar().tabData(i) != project_path for i in range(self.project_tabs.count())):
+            self.stop_project_loader(project_path)
+            self.project_envs.pop(project_path, None)
+            if self.console is not None:
+                self.console.close_project(project_path)
+            indexer = self.indexers.pop(project_path, None)
+            if indexer is not None:
+                indexer.stop()
+                indexer.deleteLater()
+            symbols = self.project_symbols.pop(project_path, None)
+            if symbols is not None:
+                symbols.stop()
+                symbols.deleteLater()
+            words = self.project_words.pop(project_path, None)
+            if words is not None:
+                words.stop()
+                words.deleteLater()
         self.update_project_view()  # Refresh project tree
 
+    def closeEvent(self, event):
+        """Save the session, then stop background loads before the editors are destroyed."""
+        self.startup_stages.clear()  # A window closed during startup skips the remaining stages
+        try:
+            self.save_session()
+        except OSError as e:
+            QMessageBox.warning(self, "Save Session", f"Could not save the open projects and files:\n{e}")
+        for document in self.documents.documents.values():
+            document.cancel_load()
+        for path in list(self.project_loaders):
+            self.stop_project_loader(path)
+        for creator in self.project_creators:
+            creator.requestInterruption()
+            creator.wait()
+        for indexer in self.indexers.values():
+            indexer.stop()
+        for symbols in self.project_symbols.values():
+            symbols.stop()
+        for words in self.project_words.values():
+            words.stop()
+        self.outline_service.stop()
+        self.diagnostics_service.stop()
+        self.completion_service.stop()
+        self.file_watcher.stop()
+        if self.find_bar is not None:
+            self.find_bar.shutdown()
+        if self.search_panel is not None:
+            self.search_panel.shutdown()
+        if self.runner is not None:
+            self.runner.shutdown()
+        if self.console is not None:
+            self.console.shutdown()
+        shutdown_process_pool()
+        self.stall_detector.stop()
+        if perf.trace_path:
+            try:
+                perf.export_chrome_trace(perf.trace_path)
+            except OSError as e:
+                QMessageBox.warning(self, "Export Trace", f"Could not write {perf.trace_path}:\n{e}")
+        super().closeEvent(event)
+
     def update_project_view(self):
         """Ensure the file tree updates based on the active project."""
         current_index = self.project_tabs.currentIndex()
@@ -194,38 +850,157 @@ class MainWindow(QMainWindow):
             return
         project_path = self.project_tabs.tabBar().tabData(current_index)
         if project_path and os.path.exists(project_path):
-            self.file_model.setRootPath(project_path)
-            self.project_tree.setRootIndex(self.file_model.index(project_path))
+            self.show_project_tree(project_path)
             self.project_tree.setHidden(False)
-            self.console.update_path(project_path)
-
+            if self.console is not None:
+                self.console.show_project(project_path)
+        project_tab = self.project_tabs.widget(current_index)
+        if isinstance(project_tab, QTabWidget):
+            self.materialize_tab(project_tab, project_tab.currentIndex())
+        self.update_outline()
+        self.update_find_bar()
+
+    #
+    # SESSION
+    #
     def save_session(self):
-        open_projects = []
+        """Record open projects and files, cursors and active tabs (see ide.session)."""
+        projects = []
+        active_project = 0  # Index into projects, which leaves out tabs that are not projects
         for i in range(self.project_tabs.count()):
             project_path = self.project_tabs.tabBar().tabData(i)
-            open_projects.append(project_path)
-        with open(SESSION_FILE, "wb") as f:
-            pickle.dump(open_projects, f)
-
+            project_tab = self.project_tabs.widget(i)
+            if not project_path or not isinstance(project_tab, QTabWidget):
+                continue
+            files = []
+            for j in range(project_tab.count()):
+                editor = project_tab.widget(j)
+                if isinstance(editor, (CodeEditor, EditorPlaceholder)) and editor.file_path:
+                    cursor, scroll = editor.view_state()
+                    files.append({"path": editor.file_path, "cursor": cursor, "scroll": scroll})
+            current = project_tab.currentWidget()
+            if i == self.project_tabs.currentIndex():
+                active_project = len(projects)
+            projects.append({
+                "path": project_path,
+                "active_file": getattr(current, "file_path", None),
+                "files": files,
+            })
+        session.save_session({"active_project": active_project, "projects": projects})
+
+    @perf.timed("window.load_session")
     def load_session(self):
-        if os.path.exists(SESSION_FILE):
-            with open(SESSION_FILE, "rb") as f:
-                open_projects = pickle.load(f)
-                for project_path in open_projects:
-                    if project_path:
-                        self.load_project(project_path)
-
-    def load_project(self, path):
-        """Load a project and update UI elements."""
+        """Reopen the saved session; only the active editor of the active project loads now."""
+        saved = session.load_session()
+        active_tab = None
+        for i, project in enumerate(saved["projects"]):
+            # Projects whose directory is gone are skipped, so tab and saved indexes can differ
+            if os.path.isdir(project["path"]):
+                self.load_project(project["path"], project["files"], project["active_file"])
+                if i == saved["active_project"]:
+                    active_tab = self.project_tabs.currentWidget()  # load_project selects the new tab
+        if active_tab is not None:
+            self.project_tabs.setCurrentWidget(active_tab)
+
+    @perf.timed("window.load_project")
+    def load_project(self, path, open_files=(), active_file=None):
+        """
+        Add the project's tab at once and prepare the rest on a
+        ProjectLoaderThread; the tab fills in as each stage reports back.
+        """
         new_project_tab = QTabWidget()
         new_project_tab.setTabsClosable(True)
-        new_project_tab.tabCloseRequested.connect(self.close_project_tab)
+        new_project_tab.tabCloseRequested.connect(self.close_file)
+        new_project_tab.currentChanged.connect(
+            lambda i, tab=new_project_tab: self.materialize_tab(tab, i)
+        )
+        new_project_tab.currentChanged.connect(self.update_outline)
+        new_project_tab.currentChanged.connect(self.update_find_bar)
         index = self.project_tabs.addTab(new_project_tab, os.path.basename(path))
         self.project_tabs.setCurrentWidget(new_project_tab)
 
-        self.file_model.setRootPath(path)
-        self.project_tree.setRootIndex(self.file_model.index(path))
+        self.show_project_tree(path)
         self.project_tree.setHidden(False)
 
         self.project_tabs.tabBar().setTabData(index, path)
+        if path not in self.indexers:
+            self.indexers[path] = indexer = ProjectIndexer(path, self)
+            self.project_symbols[path] = symbols = ProjectSymbols(path, self)
+            self.project_words[path] = words = ProjectWords(path, self)
+            indexer.updated.connect(lambda: symbols.refresh(indexer.index))
+            indexer.updated.connect(lambda: words.refresh(indexer.index))
+            self.queued_projects.append((path, list(open_files), active_file))
+            self.start_project_loaders()
         self.update_project_view()
+
+    #
+    # PROJECT LOADING
+    #
+    def start_project_loaders(self):
+        while self.queued_projects and len(self.project_loaders) < MAX_PROJECT_LOADERS:
+            path, open_files, active_file = self.queued_projects.pop(0)
+            loader = ProjectLoaderThread(path, open_files, active_file, self)
+            loader.stage_started.connect(lambda stage, l=loader: self.on_project_stage(l, stage))
+            loader.venv_found.connect(lambda venv, l=loader: self.on_venv_found(l, venv))
+            loader.files_ready.connect(lambda files, l=loader: self.on_project_files_ready(l, files))
+            loader.index_ready.connect(lambda index, matcher, l=loader: self.on_project_indexed(l, index, matcher))
+            loader.finished.connect(lambda l=loader: self.on_project_loader_finished(l))
+            self.project_loaders[path] = loader
+            loader.start()
+
+    def is_current_project_loader(self, loader):
+        # Signals from the loader of a project that was closed are ignored
+        return self.project_loaders.get(loader.project_path) is loader
+
+    def project_tab_for(self, path):
+        for i in range(self.project_tabs.count()):
+            if self.project_tabs.tabBar().tabData(i) == path:
+                return self.project_tabs.widget(i)
+        return None
+
+    def on_project_stage(self, loader, stage):
+        if self.is_current_project_loader(loader):
+            self.statusBar().showMessage(f"{os.path.basename(loader.project_path)}: {stage}...")
+
+    def on_venv_found(self, loader, venv):
+        if self.is_current_project_loader(loader):
+            self.project_envs[loader.project_path] = venv
+
+    def on_project_files_ready(self, loader, files):
+        project_tab = self.project_tab_for(loader.project_path)
+        if not self.is_current_project_loader(loader) or project_tab is None:
+            return
+        # Every restored file starts as a placeholder; only the active one is
+        # turned into an editor, and only if its project is the one on screen
+        self.swapping_tabs = True
+        active = None
+        for entry in files:
+            if self.find_editor(project_tab, entry["path"]) is None:
+                placeholder = self.add_placeholder_tab(project_tab, entry)
+                if entry["path"] == loader.active_file:
+                    active = placeholder
+        if active is not None:
+            project_tab.setCurrentWidget(active)
+        self.swapping_tabs = False
+        if project_tab is self.project_tabs.currentWidget():
+            self.materialize_tab(project_tab, project_tab.currentIndex())
+
+    def on_project_indexed(self, loader, index, matcher):
+        indexer = self.indexers.get(loader.project_path)
+        if self.is_current_project_loader(loader) and indexer is not None:
+            indexer.set_index(index, matcher)
+
+    def on_project_loader_finished(self, loader):
+        if self.is_current_project_loader(loader):
+            del self.project_loaders[loader.project_path]
+            if not self.project_loaders and not self.queued_projects:
+                self.statusBar().clearMessage()
+        loader.deleteLater()
+        self.start_project_loaders()
+
+    def stop_project_loader(self, path):
+        self.queued_projects = [item for item in self.queued_projects if item[0] != path]
+        loader = self.project_loaders.pop(path, None)
+        if loader is not None:
+            loader.requestInterruption()
+            loader.wait()
@@ -0,0 +1,87 @@
+import os
+
+from PyQt5.QtWidgets import (
+    QDialog, QFormLayout, QHBoxLayout, QLineEdit, QPushButton, QCheckBox, QDialogButtonBox, QFileDialog,
+    QMessageBox, QWidget
+)
+
+
+class NewProjectDialog(QDialog):
+    """
+    Asks where to create a project and how to set up its virtualenv: an
+    optional pinned requirements file, a local wheel directory to install
+    it from, and whether to clone a cached environment template.
+    """
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.setWindowTitle("New Project")
+        self.resize(560, 0)
+
+        self.location_input = QLineEdit(os.path.expanduser("~"))
+        self.name_input = QLineEdit()
+        self.requirements_input = QLineEdit()
+        self.requirements_input.setPlaceholderText("Optional, e.g. requirements.txt with pinned versions")
+        self.wheelhouse_input = QLineEdit()
+        self.wheelhouse_input.setPlaceholderText("Optional; install only from these wheels")
+        self.template_check = QCheckBox("Clone a cached environment template (much faster)")
+        self.template_check.setChecked(True)
+
+        layout = QFormLayout(self)
+        layout.addRow("Location:", self.with_browse(self.location_input, self.browse_location))
+        layout.addRow("Project name:", self.name_input)
+        layout.addRow("Requirements:", self.with_browse(self.requirements_input, self.browse_requirements))
+        layout.addRow("Wheel cache:", self.with_browse(self.wheelhouse_input, self.browse_wheelhouse))
+        layout.addRow(self.template_check)
+        buttons = QDialogButtonBox(QDialogButtonBox.Ok | QDialogButtonBox.Cancel)
+        buttons.accepted.connect(self.accept)
+        buttons.rejected.connect(self.reject)
+        layout.addRow(buttons)
+
+    def with_browse(self, line_edit, browse):
+        row = QWidget()
+        row_layout = QHBoxLayout(row)
+        row_layout.setContentsMargins(0, 0, 0, 0)
+        row_layout.addWidget(line_edit)
+        button = QPushButton("Browse...")
+        button.clicked.connect(browse)
+        row_layout.addWidget(button)
+        return row
+
+    def browse_location(self):
+        path = QFileDialog.getExistingDirectory(self, "Select Project Directory", self.location_input.text())
+        if path:
+            self.location_input.setText(path)
+
+    def browse_requirements(self):
+        path, _ = QFileDialog.getOpenFileName(self, "Requirements File", "", "Requirements (*.txt);;All Files (*)")
+        if path:
+            self.requirements_input.setText(path)
+
+    def browse_wheelhouse(self):
+        path = QFileDialog.getExistingDirectory(self, "Wheel Cache Directory")
+        if path:
+            self.wheelhouse_input.setText(path)
+
+    def accept(self):
+        location = self.location_input.text().strip()
+        name = self.name_input.text().strip()
+        requirements = self.requirements_input.text().strip()
+        wheelhouse = self.wheelhouse_input.text().strip()
+        if not name or not os.path.isdir(location):
+            QMessageBox.warning(self, "New Project", "Choose an existing location and a project name.")
+        elif requirements and not os.path.isfile(requirements):
+            QMessageBox.warning(self, "New Project", f"{requirements} does not exist.")
+        elif wheelhouse and not os.path.isdir(wheelhouse):
+            QMessageBox.warning(self, "New Project", f"{wheelhouse} is not a directory.")
+        else:
+            super().accept()
+
+    def options(self):
+        """Keyword arguments for ProjectCreatorThread."""
+        return {
+            "project_path": os.path.join(self.location_input.text().strip(), self.name_input.text().strip()),
+            "requirements": self.requirements_input.text().strip() or None,
+            "wheelhouse": self.wheelhouse_input.text().strip() or None,
+            "use_template": self.template_check.isChecked(),
+        }
@@ -0,0 +1,45 @@
+from PyQt5.QtWidgets import QTreeWidget, QTreeWidgetItem
+from PyQt5.QtGui import QColor
+from PyQt5.QtCore import Qt, pyqtSignal
+from ide.symbols import CLASS, FUNCTION
+
+KIND_COLORS = {CLASS: "#d2a8ff", FUNCTION: "#79c0ff"}
+
+
+class OutlinePanel(QTreeWidget):
+    """Classes, functions and imports of the current editor, nested as in the code."""
+
+    symbol_activated = pyqtSignal(int, int)  # Line, column
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.setHeaderHidden(True)
+        self.setUniformRowHeights(True)
+        self.symbols = None
+        self.itemActivated.connect(self.on_item_activated)
+
+    def show_symbols(self, symbols):
+        if symbols is self.symbols:
+            return
+        self.symbols = symbols
+        self.setUpdatesEnabled(False)
+        self.clear()
+        parents = []  # Item of the innermost enclosing symbol at each depth
+        for kind, name, line, column, depth in symbols or []:
+            item = QTreeWidgetItem([name.rpartition(".")[2]])
+            item.setData(0, Qt.UserRole, (line, column))
+            item.setToolTip(0, f"{kind} {name}, line {line}")
+            if kind in KIND_COLORS:
+                item.setForeground(0, QColor(KIND_COLORS[kind]))
+            del parents[depth:]
+            if parents:
+                parents[-1].addChild(item)
+            else:
+                self.addTopLevelItem(item)
+            parents.append(item)
+        self.expandAll()
+        self.setUpdatesEnabled(True)
+
+    def on_item_activated(self, item, column):
+        line, text_column = item.data(0, Qt.UserRole)
+        self.symbol_activated.emit(line, text_column)
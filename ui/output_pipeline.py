@@ -0,0 +1,172 @@
+import codecs
+import re
+
+from PyQt5.QtGui import QColor, QFont, QTextCharFormat
+
+# CSI sequences (SGR is the one ending in "m"), OSC sequences such as window
+# titles, and other escapes such as charset selection.  Everything except SGR
+# is dropped.
+_ESCAPE_RE = re.compile(
+    r"\x1b(?:\[(?P<params>[0-?]*)[ -/]*(?P<final>[@-~])"
+    r"|\][^\x07\x1b]*(?:\x07|\x1b\\)"
+    r"|[ -/]*[0-Z\\^-~])"
+)
+MAX_ESCAPE_LENGTH = 256  # A longer unterminated escape is treated as text
+
+# xterm's 16 colors: normal then bright
+ANSI_COLORS = [
+    "#000000", "#cd3131", "#0dbc79", "#e5e510", "#2472c8", "#bc3fbc", "#11a8cd", "#e5e5e5",
+    "#666666", "#f14c4c", "#23d18b", "#f5f543", "#3b8eea", "#d670d6", "#29b8db", "#ffffff",
+]
+
+
+def _color_256(index):
+    """Map an xterm 256-color index to a hex color."""
+    if index < 16:
+        return ANSI_COLORS[index]
+    if index < 232:
+        index -= 16
+        levels = [0, 95, 135, 175, 215, 255]
+        return "#%02x%02x%02x" % (levels[index // 36], levels[index // 6 % 6], levels[index % 6])
+    gray = 8 + (index - 232) * 10
+    return "#%02x%02x%02x" % (gray, gray, gray)
+
+
+class OutputPipeline:
+    """
+    Turns a stream of raw process output into ``(text, QTextCharFormat)`` runs.
+
+    Bytes are decoded incrementally, so a multi-byte character split across
+    two reads is kept intact, and an escape sequence cut off at the end of a
+    chunk is held back until the rest arrives.  ANSI SGR sequences update the
+    current format; adjacent text with the same format is merged into one run
+    so it can be inserted with a single QTextCursor.insertText call.
+
+    The pipeline needs no widgets and can be driven without a GUI.
+    """
+
+    def __init__(self, encoding="utf-8"):
+        self.encoding = encoding
+        self.decoder = codecs.getincrementaldecoder(encoding)(errors="replace")
+        self.held_back = ""
+        self.formats = {}
+        self.reset_style()
+
+    def reset_style(self):
+        self.bold = False
+        self.italic = False
+        self.underline = False
+        self.foreground = None
+        self.background = None
+
+    def reset(self):
+        """Forget partial input and styling, e.g. when the process restarts."""
+        self.decoder.reset()
+        self.held_back = ""
+        self.reset_style()
+
+    def feed(self, data: bytes, final=False):
+        """Decode ``data`` and return the list of formatted runs it produced."""
+        text = self.held_back + self.decoder.decode(data, final)
+        self.held_back = ""
+        if not final and text.endswith("\r"):
+            # Might be the first half of a "\r\n"
+            self.held_back, text = "\r", text[:-1]
+        if "\r\n" in text:
+            text = text.replace("\r\n", "\n")
+        if "\x1b" not in text:
+            return [(text, self.current_format())] if text else []
+
+        runs = []
+        pos = 0
+        for match in _ESCAPE_RE.finditer(text):
+            if match.start() > pos:
+                self.add_run(runs, text[pos:match.start()])
+            if match.group("final") == "m":
+                self.apply_sgr(match.group("params"))
+            pos = match.end()
+
+        tail = text[pos:]
+        escape = tail.rfind("\x1b")
+        if not final and escape >= 0 and len(tail) - escape < MAX_ESCAPE_LENGTH:
+            # Probably the start of a sequence that continues in the next chunk
+            self.held_back = tail[escape:] + self.held_back
+            tail = tail[:escape]
+        if tail:
+            self.add_run(runs, tail)
+        return runs
+
+    def add_run(self, runs, text):
+        fmt = self.current_format()
+        if runs and runs[-1][1] is fmt:
+            runs[-1] = (runs[-1][0] + text, fmt)
+        else:
+            runs.append((text, fmt))
+
+    def current_format(self):
+        """Return the (cached) QTextCharFormat for the current SGR state."""
+        key = (self.bold, self.italic, self.underline, self.foreground, self.background)
+        fmt = self.formats.get(key)
+        if fmt is None:
+            fmt = QTextCharFormat()
+            if self.bold:
+                fmt.setFontWeight(QFont.Bold)
+            if self.italic:
+                fmt.setFontItalic(True)
+            if self.underline:
+                fmt.setFontUnderline(True)
+            if self.foreground:
+                fmt.setForeground(QColor(self.foreground))
+            if self.background:
+                fmt.setBackground(QColor(self.background))
+            self.formats[key] = fmt
+        return fmt
+
+    def apply_sgr(self, params):
+        codes = [int(p) if p.isdigit() else 0 for p in params.split(";")] if params else [0]
+        i = 0
+        while i < len(codes):
+            code = codes[i]
+            if code == 0:
+                self.reset_style()
+            elif code == 1:
+                self.bold = True
+            elif code == 3:
+                self.italic = True
+            elif code == 4:
+                self.underline = True
+            elif code == 22:
+                self.bold = False
+            elif code == 23:
+                self.italic = False
+            elif code == 24:
+                self.underline = False
+            elif 30 <= code <= 37:
+                self.foreground = ANSI_COLORS[code - 30]
+            elif 90 <= code <= 97:
+                self.foreground = ANSI_COLORS[code - 90 + 8]
+            elif code == 39:
+                self.foreground = None
+            elif 40 <= code <= 47:
+                self.background = ANSI_COLORS[code - 40]
+            elif 100 <= code <= 107:
+                self.background = ANSI_COLORS[code - 100 + 8]
+            elif code == 49:
+                self.background = None
+            elif code in (38, 48):
+                color, i = self.extended_color(codes, i)
+                if code == 38:
+                    self.foreground = color
+                else:
+                    self.background = color
+            i += 1
+
+    def extended_color(self, codes, i):
+        """Parse ``38;5;n`` / ``38;2;r;g;b``; returns the color and the last index used."""
+        mode = codes[i + 1] if i + 1 < len(codes) else None
+        if mode == 5 and i + 2 < len(codes):
+            return _color_256(min(codes[i + 2], 255)), i + 2
+        if mode == 2 and i + 4 < len(codes):
+            r, g, b = (min(c, 255) for c in codes[i + 2:i + 5])
+            return "#%02x%02x%02x" % (r, g, b), i + 4
+        return None, len(codes)
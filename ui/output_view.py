@@ -0,0 +1,78 @@
+from PyQt5.QtCore import QTimer, pyqtSignal
+from PyQt5.QtWidgets import QPlainTextEdit
+from PyQt5.QtGui import QFont, QTextCursor, QTextCharFormat
+from ide import perf
+from ui.output_pipeline import OutputPipeline
+
+FLUSH_INTERVAL_MS = 16  # Coalesce process output for about one frame
+FLUSH_BYTES = 64 * 1024  # ...or until this much is waiting, whichever is first
+SCROLLBACK_BLOCKS = 10000  # Oldest lines are dropped beyond this many
+
+
+class OutputView(QPlainTextEdit):
+    """
+    Read-only view of process output.  Raw bytes are buffered and appended
+    in one operation every FLUSH_INTERVAL_MS (or FLUSH_BYTES), decoded and
+    colored by an OutputPipeline, and the scrollback is a ring buffer of at
+    most ``scrollback_blocks`` lines.
+    """
+
+    appended = pyqtSignal()  # After a flush reached the document
+
+    def __init__(self, parent=None, scrollback_blocks=SCROLLBACK_BLOCKS):
+        super().__init__(parent)
+        self.setReadOnly(True)
+        self.setFont(QFont("Consolas", 12))
+        self.setMaximumBlockCount(scrollback_blocks)
+
+        # Raw output waiting for the next flush, and the decoder / ANSI parser
+        self.pipeline = OutputPipeline()
+        self.pending_output = []
+        self.pending_bytes = 0
+        self.flush_timer = QTimer(self)
+        self.flush_timer.setSingleShot(True)
+        self.flush_timer.setInterval(FLUSH_INTERVAL_MS)
+        self.flush_timer.timeout.connect(self.flush_output)
+
+    def queue_output(self, data: bytes):
+        """Buffer raw output until the next flush."""
+        if not data:
+            return
+        self.pending_output.append(data)
+        self.pending_bytes += len(data)
+        if self.pending_bytes >= FLUSH_BYTES:
+            self.flush_output()
+        elif not self.flush_timer.isActive():
+            self.flush_timer.start()
+
+    def flush_output(self, final=False):
+        """Append everything buffered; ``final`` also flushes a partial character or escape."""
+        self.flush_timer.stop()
+        if not self.pending_output and not final:
+            return
+        data = b"".join(self.pending_output)
+        self.pending_output = []
+        self.pending_bytes = 0
+        perf.count("output.bytes", len(data))
+        self.append_runs(self.pipeline.feed(data, final))
+
+    def append_text(self, text: str, fmt=None):
+        # Keep ordering with output that is still waiting to be flushed
+        if self.pending_output:
+            self.flush_output()
+        self.append_runs([(text, fmt or QTextCharFormat())])
+
+    @perf.timed("output.append_runs")
+    def append_runs(self, runs):
+        """Insert ``(text, format)`` runs from the pipeline as one edit."""
+        if not runs:
+            return
+        cursor = QTextCursor(self.document())
+        cursor.movePosition(QTextCursor.End)
+        cursor.beginEditBlock()
+        for text, fmt in runs:
+            cursor.insertText(text, fmt)
+        cursor.endEditBlock()
+        scroll_bar = self.verticalScrollBar()
+        scroll_bar.setValue(scroll_bar.maximum())
+        self.appended.emit()
@@ -0,0 +1,114 @@
+from PyQt5.QtWidgets import (
+    QWidget, QVBoxLayout, QHBoxLayout, QPushButton, QCheckBox, QTreeWidget, QTreeWidgetItem, QPlainTextEdit,
+    QSplitter, QFileDialog, QMessageBox
+)
+from PyQt5.QtCore import Qt, QTimer
+from ide import perf
+
+REFRESH_MS = 500
+
+
+class PerfHud(QWidget):
+    """
+    Live view of ide.perf: time spent per instrumented path, counters, and
+    event-loop stalls with the GUI thread's stack.  Recording, reset and
+    trace export are controlled from here.
+    """
+
+    def __init__(self, stall_detector, parent=None):
+        super().__init__(parent)
+        self.stall_detector = stall_detector
+        self.shown_stalls = []  # Stall records behind the rows of stall_list
+
+        self.record_check = QCheckBox("Record")
+        self.record_check.setChecked(perf.enabled)
+        self.record_check.toggled.connect(self.set_recording)
+        reset_button = QPushButton("Reset")
+        reset_button.clicked.connect(self.reset)
+        export_button = QPushButton("Export Trace...")
+        export_button.clicked.connect(self.export_trace)
+        controls = QHBoxLayout()
+        controls.addWidget(self.record_check)
+        controls.addStretch(1)
+        controls.addWidget(reset_button)
+        controls.addWidget(export_button)
+
+        self.timings = QTreeWidget()
+        self.timings.setRootIsDecorated(False)
+        self.timings.setHeaderLabels(["Path", "Calls", "Total ms", "Mean ms", "Max ms"])
+        self.stall_list = QTreeWidget()
+        self.stall_list.setRootIsDecorated(False)
+        self.stall_list.setHeaderLabels(["Stall", "ms"])
+        self.stall_list.currentItemChanged.connect(self.show_stack)
+        self.stack_view = QPlainTextEdit()
+        self.stack_view.setReadOnly(True)
+
+        splitter = QSplitter(Qt.Horizontal)
+        splitter.addWidget(self.timings)
+        splitter.addWidget(self.stall_list)
+        splitter.addWidget(self.stack_view)
+        splitter.setStretchFactor(0, 3)
+        splitter.setStretchFactor(2, 2)
+        layout = QVBoxLayout(self)
+        layout.setContentsMargins(0, 0, 0, 0)
+        layout.addLayout(controls)
+        layout.addWidget(splitter)
+
+        self.refresh_timer = QTimer(self)
+        self.refresh_timer.setInterval(REFRESH_MS)
+        self.refresh_timer.timeout.connect(self.refresh)
+
+    def showEvent(self, event):
+        super().showEvent(event)
+        self.refresh()
+        self.refresh_timer.start()
+
+    def hideEvent(self, event):
+        super().hideEvent(event)
+        self.refresh_timer.stop()
+
+    def set_recording(self, enabled):
+        perf.set_enabled(enabled)
+        if enabled:
+            self.stall_detector.start()
+        else:
+            self.stall_detector.stop()
+
+    def reset(self):
+        perf.reset()
+        self.refresh()
+
+    def refresh(self):
+        self.timings.setUpdatesEnabled(False)
+        self.timings.clear()
+        for name, calls, total, longest in perf.stats():
+            self.timings.addTopLevelItem(QTreeWidgetItem([
+                name, str(calls), f"{total * 1000:.1f}", f"{total * 1000 / calls:.3f}", f"{longest * 1000:.1f}",
+            ]))
+        for name, value in perf.counters():
+            self.timings.addTopLevelItem(QTreeWidgetItem([name, str(value)]))
+        self.timings.setUpdatesEnabled(True)
+
+        stalls = perf.stalls()[::-1]  # Newest first
+        if [id(stall) for stall in stalls] != [id(stall) for stall in self.shown_stalls]:
+            self.shown_stalls = stalls
+            self.stall_list.clear()
+            for stall in stalls:
+                frame = stall["stack"][-1].strip().splitlines()[0] if stall["stack"] else "?"
+                self.stall_list.addTopLevelItem(QTreeWidgetItem([frame, ""]))
+        # Durations are final only once the GUI thread is back
+        for i, stall in enumerate(self.shown_stalls):
+            self.stall_list.topLevelItem(i).setText(1, f"{stall['duration'] * 1000:.0f}")
+
+    def show_stack(self, item, previous=None):
+        index = self.stall_list.indexOfTopLevelItem(item) if item else -1
+        self.stack_view.setPlainText("".join(self.shown_stalls[index]["stack"]) if index >= 0 else "")
+
+    def export_trace(self):
+        path, _ = QFileDialog.getSaveFileName(self, "Export Trace", "ide-trace.json", "Chrome Trace (*.json)")
+        if not path:
+            return
+        try:
+            perf.export_chrome_trace(path)
+        except OSError as e:
+            QMessageBox.warning(self, "Export Trace", f"Could not write {path}:\n{e}")
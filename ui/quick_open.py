@@ -0,0 +1,76 @@
+from PyQt5.QtWidgets import QDialog, QVBoxLayout, QLineEdit, QListWidget, QListWidgetItem
+from PyQt5.QtCore import Qt, QTimer, QEvent, pyqtSignal
+from ide.fuzzy import STEP_BUDGET
+
+
+class QuickOpenDialog(QDialog):
+    """
+    Filter-as-you-type picker.  ``start_search(query, previous)`` must return
+    an object with ``step(budget)`` and ``results()`` (see FuzzySearch);
+    ``describe(result)`` turns a result into the text shown in the list.
+
+    Each keystroke gets one time-budgeted step, so the first results show
+    immediately; unfinished searches continue from the event loop and are
+    dropped as soon as the query changes.
+    """
+
+    chosen = pyqtSignal(object)
+
+    def __init__(self, title, start_search, describe=str, parent=None):
+        super().__init__(parent)
+        self.setWindowTitle(title)
+        self.resize(600, 400)
+        self.start_search = start_search
+        self.describe = describe
+        self.search = None
+
+        layout = QVBoxLayout(self)
+        self.query_input = QLineEdit()
+        self.query_input.setPlaceholderText("Type to search...")
+        self.query_input.textChanged.connect(self.update_results)
+        self.query_input.returnPressed.connect(self.accept_current)
+        self.query_input.installEventFilter(self)
+        layout.addWidget(self.query_input)
+
+        self.result_list = QListWidget()
+        self.result_list.itemActivated.connect(self.accept_current)
+        layout.addWidget(self.result_list)
+
+        self.update_results("")
+
+    def update_results(self, query):
+        self.search = self.start_search(query, self.search)
+        self.continue_search(self.search)
+
+    def continue_search(self, search):
+        if search is not self.search:
+            return  # Superseded by a newer query
+        done = search.step(STEP_BUDGET)
+        self.show_results(search.results())
+        if not done:
+            QTimer.singleShot(0, lambda: self.continue_search(search))
+
+    def show_results(self, results):
+        self.result_list.clear()
+        for result in results:
+            item = QListWidgetItem(self.describe(result))
+            item.setData(Qt.UserRole, result)
+            self.result_list.addItem(item)
+        if results:
+            self.result_list.setCurrentRow(0)
+
+    def accept_current(self, *args):
+        item = self.result_list.currentItem()
+        if item is None:
+            return
+        self.search = None
+        self.chosen.emit(item.data(Qt.UserRole))
+        self.accept()
+
+    def eventFilter(self, obj, event):
+        """Let Up/Down in the query box move the list selection."""
+        if obj is self.query_input and event.type() == QEvent.KeyPress:
+            if event.key() in (Qt.Key_Up, Qt.Key_Down, Qt.Key_PageUp, Qt.Key_PageDown):
+                self.result_list.keyPressEvent(event)
+                return True
+        return super().eventFilter(obj, event)
@@ -0,0 +1,140 @@
+import os
+
+from PyQt5.QtWidgets import QWidget, QVBoxLayout, QHBoxLayout, QTabWidget, QPushButton, QLabel
+from PyQt5.QtGui import QColor, QTextCharFormat
+from ide.runner import QUEUED, RUNNING, FINISHED, STOPPED, FAILED
+from ui.output_view import OutputView
+
+MAX_RUN_TABS = 12  # Finished runs beyond this many are closed, oldest first
+STATE_MARKS = {QUEUED: " (queued)", RUNNING: " (running)", STOPPED: " (stopped)", FAILED: " (failed)"}
+
+
+def _status_format(color):
+    fmt = QTextCharFormat()
+    fmt.setForeground(QColor(color))
+    return fmt
+
+
+class RunPanel(QWidget):
+    """One tab of output per run of a RunManager, with its exit code and time."""
+
+    def __init__(self, runner, parent=None):
+        super().__init__(parent)
+        self.runner = runner
+        self.views = {}  # Run -> OutputView
+
+        self.tabs = QTabWidget()
+        self.tabs.setTabsClosable(True)
+        self.tabs.tabCloseRequested.connect(self.close_run_tab)
+        self.tabs.currentChanged.connect(self.update_controls)
+        self.status_label = QLabel()
+        self.stop_button = QPushButton("Stop")
+        self.stop_button.clicked.connect(self.stop_current)
+        self.rerun_button = QPushButton("Rerun")
+        self.rerun_button.clicked.connect(self.rerun_current)
+
+        controls = QHBoxLayout()
+        controls.addWidget(self.status_label, 1)
+        controls.addWidget(self.rerun_button)
+        controls.addWidget(self.stop_button)
+        layout = QVBoxLayout(self)
+        layout.setContentsMargins(0, 0, 0, 0)
+        layout.addLayout(controls)
+        layout.addWidget(self.tabs)
+
+        runner.run_queued.connect(self.add_run)
+        runner.run_started.connect(self.on_run_started)
+        runner.run_finished.connect(self.on_run_finished)
+        self.update_controls()
+
+    def add_run(self, run):
+        view = OutputView()
+        view.run = run
+        self.views[run] = view
+        run.output.connect(view.queue_output)
+        self.tabs.addTab(view, "")
+        self.tabs.setCurrentWidget(view)
+        self.update_tab(run)
+        self.trim_tabs()
+
+    def on_run_started(self, run):
+        view = self.views.get(run)
+        if view is not None:
+            warm = "  [warm interpreter]" if run.used_warm else ""
+            view.append_text(f"$ {' '.join(run.command())}{warm}\n", _status_format("#8b949e"))
+            self.update_tab(run)
+
+    def on_run_finished(self, run):
+        view = self.views.get(run)
+        if view is None:
+            run.deleteLater()  # Its tab was closed while it ran
+            return
+        view.flush_output(final=True)
+        if run.state == FAILED:
+            message, color = f"Could not start {run.python}: {run.error}", "#f85149"
+        elif run.state == STOPPED:
+            message, color = "Stopped", "#d29922"
+        elif run.exit_code is None:
+            message, color = "Crashed", "#f85149"
+        else:
+            message = f"Process finished with exit code {run.exit_code}"
+            color = "#3fb950" if run.exit_code == 0 else "#f85149"
+        if run.start_time is not None:
+            message += f" in {run.seconds:.2f} s"
+        view.append_text(f"\n{message}\n", _status_format(color))
+        self.update_tab(run)
+
+    def update_tab(self, run):
+        view = self.views[run]
+        index = self.tabs.indexOf(view)
+        title = os.path.basename(run.file_path)
+        if run.state == FINISHED and run.exit_code != 0:
+            title += " (failed)"
+        self.tabs.setTabText(index, title + STATE_MARKS.get(run.state, ""))
+        self.tabs.setTabToolTip(index, run.file_path)
+        if view is self.tabs.currentWidget():
+            self.update_controls()
+
+    def update_controls(self):
+        view = self.tabs.currentWidget()
+        run = view.run if view is not None else None
+        self.stop_button.setEnabled(run is not None and run.is_active())
+        self.rerun_button.setEnabled(run is not None and not run.is_active())
+        if run is None:
+            self.status_label.setText("")
+        elif run.state == RUNNING:
+            self.status_label.setText(f"Running {run.file_path}")
+        elif run.state == QUEUED:
+            self.status_label.setText(f"Waiting for a free slot ({self.runner.max_concurrent} at a time)")
+        else:
+            self.status_label.setText(run.file_path)
+
+    def stop_current(self):
+        view = self.tabs.currentWidget()
+        if view is not None:
+            self.runner.stop(view.run)
+
+    def rerun_current(self):
+        view = self.tabs.currentWidget()
+        if view is not None:
+            self.runner.rerun(view.run)
+
+    def close_run_tab(self, index):
+        view = self.tabs.widget(index)
+        run = view.run
+        self.tabs.removeTab(index)
+        del self.views[run]
+        view.deleteLater()
+        if run.is_active():
+            self.runner.stop(run)  # Deleted once it has finished, see on_run_finished
+        else:
+            run.deleteLater()
+
+    def trim_tabs(self):
+        """Close the oldest finished runs once there are more than MAX_RUN_TABS."""
+        index = 0
+        while self.tabs.count() > MAX_RUN_TABS and index < self.tabs.count():
+            if self.tabs.widget(index).run.is_active():
+                index += 1
+            else:
+                self.close_run_tab(index)
@@ -0,0 +1,224 @@
+import os
+import re
+from concurrent.futures import FIRST_COMPLETED, wait
+
+from PyQt5.QtWidgets import (
+    QWidget, QVBoxLayout, QHBoxLayout, QLineEdit, QCheckBox, QPushButton, QLabel,
+    QTreeWidget, QTreeWidgetItem
+)
+from PyQt5.QtCore import Qt, QThread, pyqtSignal
+from ide.indexer import ProjectIndex, GitIgnore
+from ide.search import compile_query, search_batch
+from ide.workers import process_pool
+
+BATCH_FILES = 64  # Files per task handed to a worker process
+PARALLEL_MIN_FILES = 256  # Smaller projects are searched on the thread itself
+MAX_RESULT_LINES = 20000  # The search stops after this many matching lines
+POLL_INTERVAL = 0.05  # Seconds between cancellation checks while waiting on workers
+
+
+class SearchThread(QThread):
+    """
+    Runs one project search.  Files are split into batches that run on a
+    shared process pool (``executor``), with a bounded number in flight so a
+    cancelled search stops handing out work at once.  Results are streamed
+    per batch as they complete.
+    """
+
+    matches_found = pyqtSignal(object)  # [(rel_path, [(line, column, text)])]
+    progress = pyqtSignal(int, int)  # Files searched, total files
+    search_finished = pyqtSignal(int, int, bool)  # Matching files, matching lines, truncated
+
+    def __init__(self, root, rel_paths, pattern, executor=None, parent=None):
+        super().__init__(parent)
+        self.root = root
+        self.rel_paths = rel_paths
+        self.pattern = pattern
+        self.executor = executor
+        self.file_count = 0
+        self.line_count = 0
+
+    def run(self):
+        rel_paths = self.rel_paths
+        if rel_paths is None:
+            # The project indexer has not finished; walk with the same rules
+            index = ProjectIndex.load(self.root)
+            if not index.walk("", GitIgnore(self.root), stop=self.isInterruptionRequested):
+                return
+            rel_paths = list(index.files())
+
+        batches = [rel_paths[i:i + BATCH_FILES] for i in range(0, len(rel_paths), BATCH_FILES)]
+        searched = 0
+        if self.executor is None or len(rel_paths) < PARALLEL_MIN_FILES:
+            for batch in batches:
+                if self.isInterruptionRequested():
+                    return
+                searched += self.report(search_batch(self.root, batch, self.pattern), searched, len(rel_paths))
+                if self.line_count >= MAX_RESULT_LINES:
+                    break
+        else:
+            searched = self.run_parallel(batches, len(rel_paths))
+            if searched is None:
+                return
+        self.search_finished.emit(self.file_count, self.line_count, self.line_count >= MAX_RESULT_LINES)
+
+    def run_parallel(self, batches, total):
+        max_in_flight = 2 * (os.cpu_count() or 1)
+        pending = set()
+        next_batch = 0
+        searched = 0
+        try:
+            while next_batch < len(batches) or pending:
+                while next_batch < len(batches) and len(pending) < max_in_flight:
+                    pending.add(self.executor.submit(search_batch, self.root, batches[next_batch], self.pattern))
+                    next_batch += 1
+                done, pending = wait(pending, timeout=POLL_INTERVAL, return_when=FIRST_COMPLETED)
+                if self.isInterruptionRequested():
+                    return None
+                for future in done:
+                    searched += self.report(future.result(), searched, total)
+                if self.line_count >= MAX_RESULT_LINES:
+                    break
+        finally:
+            for future in pending:
+                future.cancel()
+        return searched
+
+    def report(self, batch_result, searched, total):
+        count, results = batch_result
+        if results:
+            self.file_count += len(results)
+            self.line_count += sum(len(matches) for _, matches in results)
+            self.matches_found.emit(results)
+        self.progress.emit(searched + count, total)
+        return count
+
+
+class SearchPanel(QWidget):
+    """
+    "Find in Project": a query box with regex / match case options and a
+    results tree that fills in while the search runs.  ``project_source``
+    returns ``(root, rel_paths)`` for the project to search; rel_paths may
+    be None if the project is not indexed yet.
+    """
+
+    open_requested = pyqtSignal(str, int, int)  # File path, line, column
+
+    def __init__(self, project_source, parent=None):
+        super().__init__(parent)
+        self.project_source = project_source
+        self.thread = None
+        self.root = None
+
+        layout = QVBoxLayout(self)
+        layout.setContentsMargins(4, 4, 4, 4)
+        query_row = QHBoxLayout()
+        self.query_input = QLineEdit()
+        self.query_input.setPlaceholderText("Find in project...")
+        self.query_input.returnPressed.connect(self.start_search)
+        self.regex_check = QCheckBox("Regex")
+        self.case_check = QCheckBox("Match case")
+        self.search_button = QPushButton("Search")
+        self.search_button.clicked.connect(self.toggle_search)
+        query_row.addWidget(self.query_input)
+        query_row.addWidget(self.regex_check)
+        query_row.addWidget(self.case_check)
+        query_row.addWidget(self.search_button)
+        layout.addLayout(query_row)
+
+        self.status_label = QLabel()
+        layout.addWidget(self.status_label)
+
+        self.results = QTreeWidget()
+        self.results.setHeaderHidden(True)
+        self.results.setUniformRowHeights(True)
+        self.results.itemActivated.connect(self.on_item_activated)
+        layout.addWidget(self.results)
+
+    def focus_query(self, text=""):
+        if text:
+            self.query_input.setText(text)
+        self.query_input.setFocus()
+        self.query_input.selectAll()
+
+    def toggle_search(self):
+        if self.thread is not None:
+            self.cancel_search()
+            self.status_label.setText("Search cancelled")
+        else:
+            self.start_search()
+
+    def start_search(self):
+        self.cancel_search()
+        self.results.clear()
+        query = self.query_input.text()
+        root, rel_paths = self.project_source()
+        if not query or root is None:
+            return
+        try:
+            pattern = compile_query(query, self.regex_check.isChecked(), self.case_check.isChecked())
+        except re.error as e:
+            self.status_label.setText(f"Invalid regex: {e}")
+            return
+
+        executor = None
+        if rel_paths is None or len(rel_paths) >= PARALLEL_MIN_FILES:
+            executor = process_pool()
+        self.root = root
+        self.thread = SearchThread(root, rel_paths, pattern, executor, self)
+        self.thread.matches_found.connect(self.on_matches_found)
+        self.thread.progress.connect(self.on_progress)
+        self.thread.search_finished.connect(self.on_search_finished)
+        self.thread.start()
+        self.search_button.setText("Stop")
+        self.status_label.setText("Searching...")
+
+    def cancel_search(self):
+        if self.thread is None:
+            return
+        thread, self.thread = self.thread, None
+        thread.requestInterruption()
+        thread.wait()
+        thread.deleteLater()
+        self.search_button.setText("Search")
+
+    def is_current_thread(self):
+        # Signals queued by a cancelled search may still arrive; ignore them
+        return self.thread is not None and self.sender() is self.thread
+
+    def on_matches_found(self, results):
+        if not self.is_current_thread():
+            return
+        self.results.setUpdatesEnabled(False)
+        for rel_path, matches in results:
+            file_item = QTreeWidgetItem([f"{rel_path} ({len(matches)})"])
+            file_item.setData(0, Qt.UserRole, (rel_path, 1, 0))
+            for line, column, text in matches:
+                item = QTreeWidgetItem([f"{line}: {text.strip()}"])
+                item.setData(0, Qt.UserRole, (rel_path, line, column))
+                file_item.addChild(item)
+            self.results.addTopLevelItem(file_item)
+            file_item.setExpanded(True)
+        self.results.setUpdatesEnabled(True)
+
+    def on_progress(self, searched, total):
+        if self.is_current_thread():
+            self.status_label.setText(f"Searching... {searched}/{total} files")
+
+    def on_search_finished(self, files, lines, truncated):
+        if not self.is_current_thread():
+            return
+        thread, self.thread = self.thread, None
+        thread.wait()
+        thread.deleteLater()
+        self.search_button.setText("Search")
+        note = f" (stopped after {lines} lines)" if truncated else ""
+        self.status_label.setText(f"{lines} matches in {files} files{note}")
+
+    def on_item_activated(self, item, column):
+        rel_path, line, text_column = item.data(0, Qt.UserRole)
+        self.open_requested.emit(os.path.join(self.root, rel_path), line, text_column)
+
+    def shutdown(self):
+        """Cancel the running search."""
+        self.cancel_search()